@@ -293,6 +293,100 @@ class AssignmentDriverV9(AssignmentDriverBase):
         """Delete all assignments for a domain."""
         raise exception.NotImplemented()
 
+    def get_effective_role_ids(self, user_id, target_id):
+        """Get the materialized effective roles of a user on a target.
+
+        :param user_id: the ID of the user
+        :param target_id: the ID of the project or domain
+        :returns: the list of role IDs, or None if they are not materialized.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def claim_effective_role_ids(self, user_id, target_id):
+        """Claim the materialization of the effective roles on a target.
+
+        Any invalidation of the effective roles of the user or the target
+        withdraws the claim, so that roles computed before the invalidation
+        are not stored.
+
+        :param user_id: the ID of the user
+        :param target_id: the ID of the project or domain
+        :returns: the ID of the claim, or None if the roles are already
+                  materialized or another claim could not be replaced.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def set_effective_role_ids(self, user_id, target_id, claim_id, role_ids):
+        """Store the effective roles of a user on a target.
+
+        Nothing is stored if the claim has been withdrawn.
+
+        :param user_id: the ID of the user
+        :param target_id: the ID of the project or domain
+        :param claim_id: the ID returned by claim_effective_role_ids
+        :param role_ids: the list of role IDs
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def delete_effective_role_ids(self, user_ids=None, target_id=None):
+        """Invalidate the materialized effective roles.
+
+        :param user_ids: the IDs of the users whose effective roles are
+                         invalidated
+        :param target_id: the ID of a project or domain whose effective
+                          roles are invalidated
+        If neither is given, all the effective roles are invalidated.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def list_effective_role_ids(self):
+        """List the materialized effective roles.
+
+        :returns: a list of dicts with the user_id, target_id and role_ids
+                  of each user and target.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def replace_effective_role_ids(self, refs):
+        """Replace all the materialized effective roles.
+
+        :param refs: a list of dicts with the user_id, target_id and role_ids
+                     of each user and target.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def create_grants(self, grants):
+        """Create several assignments/grants at once.
+
+        Grants that already exist are ignored, as in create_grant.
+
+        :param grants: a list of dicts with the role_id, user_id or group_id,
+                       domain_id or project_id and inherited_to_projects of
+                       each grant.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def delete_grants(self, grants):
+        """Delete several assignments/grants at once.
+
+        Either all of the grants are deleted or none of them are.
+
+        :param grants: a list of dicts with the role_id, user_id or group_id,
+                       domain_id or project_id and inherited_to_projects of
+                       each grant.
+        :raises keystone.exception.RoleAssignmentNotFound: If one of the role
+            assignments doesn't exist.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
 
 class V9AssignmentWrapperForV8Driver(AssignmentDriverV9):
     """Wrapper class to supported a V8 legacy driver.
@@ -12,6 +12,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import uuid
+
 from keystone.assignment.backends import base
 from keystone.common import sql
 from keystone import exception
@@ -41,6 +43,8 @@ class AssignmentType(object):
 
 
 class Assignment(base.AssignmentDriverV9):
+    # Maximum number of actor IDs in the IN clause of a role assignment query.
+    _ACTOR_IDS_PER_QUERY = 100
 
     def default_role_driver(self):
         return 'sql'
@@ -115,6 +119,64 @@ class Assignment(base.AssignmentDriverV9):
                                                        actor_id=actor_id,
                                                        target_id=target_id)
 
+    def _grant_key(self, grant):
+        return (AssignmentType.calculate_type(grant.get('user_id'),
+                                              grant.get('group_id'),
+                                              grant.get('project_id'),
+                                              grant.get('domain_id')),
+                grant.get('user_id') or grant.get('group_id'),
+                grant.get('project_id') or grant.get('domain_id'),
+                grant['role_id'],
+                bool(grant.get('inherited_to_projects')))
+
+    def _get_grant_refs(self, session, keys):
+        """Return the existing assignments matching the keys, by key."""
+        actors = sorted(set(key[1] for key in keys))
+        refs = {}
+        for i in range(0, len(actors), self._ACTOR_IDS_PER_QUERY):
+            chunk = actors[i:i + self._ACTOR_IDS_PER_QUERY]
+            query = session.query(RoleAssignment)
+            query = query.filter(RoleAssignment.actor_id.in_(chunk))
+            for ref in query.all():
+                key = (ref.type, ref.actor_id, ref.target_id, ref.role_id,
+                       ref.inherited)
+                if key in keys:
+                    refs[key] = ref
+        return refs
+
+    def create_grants(self, grants):
+        keys = set(self._grant_key(grant) for grant in grants)
+        try:
+            with sql.session_for_write() as session:
+                existing = self._get_grant_refs(session, keys)
+                for key in keys - set(existing):
+                    session.add(RoleAssignment(
+                        type=key[0], actor_id=key[1], target_id=key[2],
+                        role_id=key[3], inherited=key[4]))
+        except sql.DBDuplicateEntry:
+            # NOTE: A concurrent request created one of the grants, fall back
+            # to creating them one by one, which ignores existing grants.
+            for grant in grants:
+                self.create_grant(grant['role_id'],
+                                  user_id=grant.get('user_id'),
+                                  group_id=grant.get('group_id'),
+                                  domain_id=grant.get('domain_id'),
+                                  project_id=grant.get('project_id'),
+                                  inherited_to_projects=bool(
+                                      grant.get('inherited_to_projects')))
+
+    def delete_grants(self, grants):
+        keys = set(self._grant_key(grant) for grant in grants)
+        with sql.session_for_write() as session:
+            existing = self._get_grant_refs(session, keys)
+            for key in keys:
+                if key not in existing:
+                    raise exception.RoleAssignmentNotFound(role_id=key[3],
+                                                           actor_id=key[1],
+                                                           target_id=key[2])
+            for ref in existing.values():
+                session.delete(ref)
+
     def add_role_to_user_and_project(self, user_id, tenant_id, role_id):
         try:
             with sql.session_for_write() as session:
@@ -238,8 +300,6 @@ class Assignment(base.AssignmentDriverV9):
 
             if role_id:
                 query = query.filter_by(role_id=role_id)
-            if actors:
-                query = query.filter(RoleAssignment.actor_id.in_(actors))
             if targets:
                 query = query.filter(RoleAssignment.target_id.in_(targets))
             if assignment_types:
@@ -247,7 +307,19 @@ class Assignment(base.AssignmentDriverV9):
             if inherited_to_projects is not None:
                 query = query.filter_by(inherited=inherited_to_projects)
 
-            return [denormalize_role(ref) for ref in query.all()]
+            if not actors:
+                return [denormalize_role(ref) for ref in query.all()]
+
+            # NOTE: Users can be members of hundreds of groups, so the actors
+            # are queried in chunks rather than in one huge IN clause. Each
+            # assignment has a single actor, so the chunks don't overlap.
+            actors = sorted(set(actors))
+            refs = []
+            for i in range(0, len(actors), self._ACTOR_IDS_PER_QUERY):
+                chunk = actors[i:i + self._ACTOR_IDS_PER_QUERY]
+                chunk_query = query.filter(RoleAssignment.actor_id.in_(chunk))
+                refs += [denormalize_role(ref) for ref in chunk_query.all()]
+            return refs
 
     def delete_project_assignments(self, project_id):
         with sql.session_for_write() as session:
@@ -290,6 +362,64 @@ class Assignment(base.AssignmentDriverV9):
             )
             q.delete(False)
 
+    def get_effective_role_ids(self, user_id, target_id):
+        with sql.session_for_read() as session:
+            ref = session.query(EffectiveRole).get((user_id, target_id))
+            if ref is not None and ref.claim_id is None:
+                return ref.role_ids
+
+    def claim_effective_role_ids(self, user_id, target_id):
+        claim_id = uuid.uuid4().hex
+        try:
+            with sql.session_for_write() as session:
+                ref = session.query(EffectiveRole).get((user_id, target_id))
+                if ref is None:
+                    session.add(EffectiveRole(user_id=user_id,
+                                              target_id=target_id,
+                                              role_ids=[],
+                                              claim_id=claim_id))
+                elif ref.claim_id is None:
+                    return
+                else:
+                    # The previous claim may have been left by a process that
+                    # never completed it, so it is replaced.
+                    ref.claim_id = claim_id
+        except sql.DBDuplicateEntry:
+            return
+        return claim_id
+
+    def set_effective_role_ids(self, user_id, target_id, claim_id, role_ids):
+        with sql.session_for_write() as session:
+            q = session.query(EffectiveRole)
+            q = q.filter_by(user_id=user_id, target_id=target_id,
+                            claim_id=claim_id)
+            q.update({'role_ids': role_ids, 'claim_id': None},
+                     synchronize_session=False)
+
+    def delete_effective_role_ids(self, user_ids=None, target_id=None):
+        if user_ids is not None and not user_ids:
+            return
+        with sql.session_for_write() as session:
+            q = session.query(EffectiveRole)
+            if user_ids is not None:
+                q = q.filter(EffectiveRole.user_id.in_(user_ids))
+            if target_id is not None:
+                q = q.filter_by(target_id=target_id)
+            q.delete(False)
+
+    def list_effective_role_ids(self):
+        with sql.session_for_read() as session:
+            q = session.query(EffectiveRole).filter_by(claim_id=None)
+            return [ref.to_dict() for ref in q]
+
+    def replace_effective_role_ids(self, refs):
+        with sql.session_for_write() as session:
+            session.query(EffectiveRole).delete(False)
+            for ref in refs:
+                session.add(EffectiveRole(user_id=ref['user_id'],
+                                          target_id=ref['target_id'],
+                                          role_ids=ref['role_ids']))
+
 
 class RoleAssignment(sql.ModelBase, sql.DictBase):
     __tablename__ = 'assignment'
@@ -317,3 +447,15 @@ class RoleAssignment(sql.ModelBase, sql.DictBase):
         parent implementation is not applicable.
         """
         return dict(self.items())
+
+
+class EffectiveRole(sql.ModelBase, sql.ModelDictMixin):
+    """The materialized effective roles of a user on a project or domain."""
+
+    __tablename__ = 'effective_role'
+    user_id = sql.Column(sql.String(64), primary_key=True)
+    target_id = sql.Column(sql.String(64), primary_key=True)
+    role_ids = sql.Column(sql.JsonBlob(), nullable=False)
+    # Set while the roles are being computed, until they are stored.
+    claim_id = sql.Column(sql.String(64), nullable=True)
+    __table_args__ = (sql.Index('ix_effective_role_target_id', 'target_id'),)
@@ -29,7 +29,7 @@ from keystone.common import validation
 from keystone.common import wsgi
 import keystone.conf
 from keystone import exception
-from keystone.i18n import _
+from keystone.i18n import _, _LW
 from keystone import notifications
 
 
@@ -677,6 +677,86 @@ class GrantAssignmentV3(controller.V3Controller):
             self._check_if_inherited(request.context_dict),
             request.context_dict)
 
+    def _get_bulk_grants(self, role_assignments):
+        """Convert the role assignments of a bulk request into grants."""
+        validation.lazy_validate(schema.role_assignments_bulk,
+                                 role_assignments)
+        if len(role_assignments) > CONF.assignment.max_bulk_grants:
+            raise exception.ValidationError(
+                _('At most %d role assignments can be granted or revoked at '
+                  'once.') % CONF.assignment.max_bulk_grants)
+
+        grants = []
+        for assignment in role_assignments:
+            scope = assignment['scope']
+            grant = {
+                'role_id': assignment['role']['id'],
+                'user_id': assignment.get('user', {}).get('id'),
+                'group_id': assignment.get('group', {}).get('id'),
+                'domain_id': scope.get('domain', {}).get('id'),
+                'project_id': scope.get('project', {}).get('id'),
+                'inherited_to_projects': 'OS-INHERIT:inherited_to' in scope}
+            self._require_domain_xor_project(grant['domain_id'],
+                                             grant['project_id'])
+            self._require_user_xor_group(grant['user_id'], grant['group_id'])
+            if (grant['inherited_to_projects'] and
+                    not CONF.os_inherit.enabled):
+                raise exception.ValidationError(
+                    _('Inherited role assignments require the OS-INHERIT '
+                      'extension to be enabled.'))
+            grants.append(grant)
+        return grants
+
+    def _protect_bulk_grants(self, request, role_assignments, action,
+                             allow_no_user=False):
+        """Check protection for the bulk role grant APIs.
+
+        Each grant is checked against the policy of the API granting or
+        revoking it on its own (given by action), with the entities involved
+        in the grant looked up at once for the whole request.
+
+        :returns: the grants and the refs of their entities, as returned by
+                  get_grant_refs(), for the assignment manager to reuse.
+
+        """
+        request.assert_authenticated()
+        grants = self._get_bulk_grants(role_assignments)
+        refs = self.assignment_api.get_grant_refs(
+            grants, allow_missing_users=allow_no_user)
+        if request.context.is_admin:
+            LOG.warning(_LW('RBAC: Bypassing authorization'))
+            return grants, refs
+
+        for grant in grants:
+            input_attr = {'role_id': grant['role_id']}
+            ref = {'role': refs['role'][grant['role_id']]}
+            for entity in ('user', 'group', 'domain', 'project'):
+                entity_id = grant['%s_id' % entity]
+                if entity_id:
+                    input_attr['%s_id' % entity] = entity_id
+                    if entity_id in refs[entity]:
+                        ref[entity] = refs[entity][entity_id]
+            self.check_protection(
+                request, {'f_name': action, 'input_attr': input_attr}, ref)
+        return grants, refs
+
+    # NOTE: The bulk APIs check their protection themselves rather than with
+    # @controller.protected(), so that the grants are validated and their
+    # entities looked up only once per request.
+    def create_grants(self, request, role_assignments=None):
+        """Grant several roles to users or groups on domains or projects."""
+        grants, refs = self._protect_bulk_grants(
+            request, role_assignments, 'create_grant')
+        self.assignment_api.create_grants(grants, request.context_dict,
+                                          refs=refs)
+
+    def revoke_grants(self, request, role_assignments=None):
+        """Revoke several roles from users or groups on domains or projects."""
+        grants, refs = self._protect_bulk_grants(
+            request, role_assignments, 'revoke_grant', allow_no_user=True)
+        self.assignment_api.delete_grants(grants, request.context_dict,
+                                          refs=refs)
+
 
 @dependency.requires('assignment_api', 'identity_api', 'resource_api')
 class RoleAssignmentV3(controller.V3Controller):
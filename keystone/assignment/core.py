@@ -29,8 +29,9 @@ from keystone.common import manager
 import keystone.conf
 from keystone import exception
 from keystone.i18n import _
-from keystone.i18n import _LI, _LE
+from keystone.i18n import _LI, _LE, _LW
 from keystone import notifications
+from keystone.token import provider as token_provider
 
 
 CONF = keystone.conf.CONF
@@ -67,6 +68,10 @@ class Manager(manager.Manager):
     _ROLE_REMOVED_FROM_USER = 'role_removed_from_user'
     _INVALIDATION_USER_PROJECT_TOKENS = 'invalidate_user_project_tokens'
 
+    # Maximum number of IDs listed at once when adding the names of the
+    # entities to role assignments.
+    _IDS_PER_LISTING = 1000
+
     def __init__(self):
         assignment_driver = CONF.assignment.driver
         # If there is no explicit assignment driver specified, we let the
@@ -100,6 +105,8 @@ class Manager(manager.Manager):
         elif not isinstance(self.driver, base.AssignmentDriverV9):
             raise exception.UnsupportedDriverVersion(driver=assignment_driver)
 
+        self._warned_materialize_effective_roles = False
+
         self.event_callbacks = {
             notifications.ACTIONS.deleted: {
                 'domain': [self._delete_domain_assignments],
@@ -111,6 +118,10 @@ class Manager(manager.Manager):
         domain_id = payload['resource_info']
         self.driver.delete_domain_assignments(domain_id)
 
+    # NOTE: Group memberships are looked up for every effective assignment
+    # listing of a user, so they are cached with the computed assignments,
+    # which are invalidated whenever a group membership changes.
+    @MEMOIZE_COMPUTED_ASSIGNMENTS
     def _get_group_ids_for_user_id(self, user_id):
         # TODO(morganfainberg): Implement a way to get only group_ids
         # instead of the more expensive to_dict() call for each record.
@@ -145,10 +156,7 @@ class Manager(manager.Manager):
 
         """
         self.resource_api.get_project(tenant_id)
-        assignment_list = self.list_role_assignments(
-            user_id=user_id, project_id=tenant_id, effective=True)
-        # Use set() to process the list to remove any duplicates
-        return list(set([x['role_id'] for x in assignment_list]))
+        return self._get_effective_role_ids(user_id, project_id=tenant_id)
 
     @MEMOIZE_COMPUTED_ASSIGNMENTS
     def get_roles_for_user_and_domain(self, user_id, domain_id):
@@ -159,11 +167,136 @@ class Manager(manager.Manager):
 
         """
         self.resource_api.get_domain(domain_id)
+        return self._get_effective_role_ids(user_id, domain_id=domain_id)
+
+    def _list_effective_role_ids(self, user_id, project_id=None,
+                                 domain_id=None):
         assignment_list = self.list_role_assignments(
-            user_id=user_id, domain_id=domain_id, effective=True)
+            user_id=user_id, project_id=project_id, domain_id=domain_id,
+            effective=True)
         # Use set() to process the list to remove any duplicates
         return list(set([x['role_id'] for x in assignment_list]))
 
+    def _materialize_effective_roles(self):
+        """Whether the effective roles are stored by the assignment driver.
+
+        The stored effective roles are invalidated when group memberships
+        change through keystone, which identity backends other than SQL don't
+        guarantee, so they are only used with the SQL identity driver.
+
+        """
+        if not CONF.assignment.materialize_effective_roles:
+            return False
+        if (CONF.identity.domain_specific_drivers_enabled or
+                not self.identity_api.driver.is_sql):
+            if not self._warned_materialize_effective_roles:
+                LOG.warning(_LW('[assignment] materialize_effective_roles is '
+                                'ignored since the identity backend is not '
+                                'SQL, or domain specific identity drivers '
+                                'are enabled, and group memberships may '
+                                'change without keystone invalidating the '
+                                'stored effective roles.'))
+                self._warned_materialize_effective_roles = True
+            return False
+        return True
+
+    def _get_effective_role_ids(self, user_id, project_id=None,
+                                domain_id=None):
+        if not self._materialize_effective_roles():
+            return self._list_effective_role_ids(user_id, project_id,
+                                                 domain_id)
+        target_id = project_id or domain_id
+        try:
+            role_ids = self.driver.get_effective_role_ids(user_id, target_id)
+            if role_ids is not None:
+                return role_ids
+            claim_id = self.driver.claim_effective_role_ids(user_id,
+                                                            target_id)
+        except exception.NotImplemented:
+            return self._list_effective_role_ids(user_id, project_id,
+                                                 domain_id)
+        role_ids = self._list_effective_role_ids(user_id, project_id,
+                                                 domain_id)
+        if claim_id is not None:
+            self.driver.set_effective_role_ids(user_id, target_id, claim_id,
+                                               role_ids)
+        return role_ids
+
+    def invalidate_effective_role_ids(self, user_ids=None, target_id=None):
+        """Invalidate the materialized effective roles.
+
+        :param user_ids: the IDs of the users whose effective roles changed
+        :param target_id: the ID of a project or domain whose effective roles
+                          changed
+        If neither is given, all the effective roles are invalidated.
+
+        """
+        if not self._materialize_effective_roles():
+            return
+        try:
+            self.driver.delete_effective_role_ids(user_ids=user_ids,
+                                                  target_id=target_id)
+        except exception.NotImplemented:  # nosec
+            # The driver does not materialize the effective roles.
+            pass
+
+    def _invalidate_effective_role_ids_for_actor(self, user_id=None,
+                                                 group_id=None):
+        if user_id:
+            self.invalidate_effective_role_ids(user_ids=[user_id])
+        elif self._materialize_effective_roles():
+            try:
+                user_ids = [x['id'] for x in
+                            self.identity_api.list_users_in_group(group_id)]
+            except exception.GroupNotFound:
+                user_ids = None
+            self.invalidate_effective_role_ids(user_ids=user_ids)
+
+    def _list_all_effective_role_ids(self):
+        effective_role_ids = {}
+        for assignment in self.list_role_assignments(effective=True):
+            target_id = (assignment.get('project_id') or
+                         assignment.get('domain_id'))
+            key = (assignment['user_id'], target_id)
+            effective_role_ids.setdefault(key, set()).add(
+                assignment['role_id'])
+        return effective_role_ids
+
+    def rebuild_effective_role_ids(self):
+        """Materialize the effective roles of all the users again.
+
+        :returns: the number of users and targets whose effective roles are
+                  stored.
+
+        """
+        refs = [{'user_id': user_id, 'target_id': target_id,
+                 'role_ids': sorted(role_ids)}
+                for (user_id, target_id), role_ids in
+                self._list_all_effective_role_ids().items()]
+        self.driver.replace_effective_role_ids(refs)
+        return len(refs)
+
+    def verify_effective_role_ids(self):
+        """Compare the materialized effective roles with the assignments.
+
+        :returns: a list of dicts with the user_id, target_id, the stored
+                  role_ids and the expected_role_ids of each user and target
+                  whose stored effective roles are wrong.
+
+        """
+        effective_role_ids = self._list_all_effective_role_ids()
+        mismatches = []
+        for ref in self.driver.list_effective_role_ids():
+            expected_role_ids = effective_role_ids.get(
+                (ref['user_id'], ref['target_id']), set())
+            if set(ref['role_ids']) != expected_role_ids:
+                mismatches.append({
+                    'user_id': ref['user_id'],
+                    'target_id': ref['target_id'],
+                    'role_ids': sorted(ref['role_ids']),
+                    'expected_role_ids': sorted(expected_role_ids)})
+        return mismatches
+
     def get_roles_for_groups(self, group_ids, project_id=None, domain_id=None):
         """Get a list of roles for this group on domain and/or project."""
         if project_id is not None:
@@ -213,7 +346,9 @@ class Manager(manager.Manager):
                 user_id,
                 tenant_id,
                 CONF.member_role_id)
+        self.invalidate_effective_role_ids(user_ids=[user_id])
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
 
     @notifications.role_assignment('created')
     def _add_role_to_user_and_project_adapter(self, role_id, user_id=None,
@@ -233,7 +368,9 @@ class Manager(manager.Manager):
     def add_role_to_user_and_project(self, user_id, tenant_id, role_id):
         self._add_role_to_user_and_project_adapter(
             role_id, user_id=user_id, project_id=tenant_id)
+        self.invalidate_effective_role_ids(user_ids=[user_id])
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
 
     def remove_user_from_project(self, tenant_id, user_id):
         """Remove user from a tenant.
@@ -257,7 +394,9 @@ class Manager(manager.Manager):
             except exception.RoleNotFound:
                 LOG.debug("Removing role %s failed because it does not exist.",
                           role_id)
+        self.invalidate_effective_role_ids(user_ids=[user_id])
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
 
     # TODO(henry-nash): We might want to consider list limiting this at some
     # point in the future.
@@ -317,7 +456,9 @@ class Manager(manager.Manager):
     def remove_role_from_user_and_project(self, user_id, tenant_id, role_id):
         self._remove_role_from_user_and_project_adapter(
             role_id, user_id=user_id, project_id=tenant_id)
+        self.invalidate_effective_role_ids(user_ids=[user_id])
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
 
     def _emit_invalidate_user_token_persistence(self, user_id):
         self.identity_api.emit_invalidate_user_token_persistence(user_id)
@@ -346,7 +487,9 @@ class Manager(manager.Manager):
             self.resource_api.get_project(project_id)
         self.driver.create_grant(role_id, user_id, group_id, domain_id,
                                  project_id, inherited_to_projects)
+        self._invalidate_effective_role_ids_for_actor(user_id, group_id)
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
 
     def get_grant(self, role_id, user_id=None, group_id=None,
                   domain_id=None, project_id=None,
@@ -424,7 +567,201 @@ class Manager(manager.Manager):
             self.resource_api.get_project(project_id)
         self.driver.delete_grant(role_id, user_id, group_id, domain_id,
                                  project_id, inherited_to_projects)
+        self._invalidate_effective_role_ids_for_actor(user_id, group_id)
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
+
+    def _unique_grants(self, grants):
+        unique_grants = []
+        seen = set()
+        for grant in grants:
+            grant = {'role_id': grant['role_id'],
+                     'user_id': grant.get('user_id'),
+                     'group_id': grant.get('group_id'),
+                     'domain_id': grant.get('domain_id'),
+                     'project_id': grant.get('project_id'),
+                     'inherited_to_projects': bool(
+                         grant.get('inherited_to_projects'))}
+            key = tuple(sorted(grant.items()))
+            if key not in seen:
+                seen.add(key)
+                unique_grants.append(grant)
+        return unique_grants
+
+    def get_grant_refs(self, grants, allow_missing_users=False):
+        """Look up the entities of several grants at once.
+
+        :param grants: a list of dicts with the role_id, user_id or group_id
+                       and domain_id or project_id of each grant
+        :param allow_missing_users: leave out the users that don't exist,
+                                    rather than raising UserNotFound
+        :returns: a dict with the refs of the roles, users, groups, domains
+                  and projects of the grants, by ID, under the keys 'role',
+                  'user', 'group', 'domain' and 'project'.
+
+        """
+        def _get_ids(id_type):
+            return set(grant[id_type] for grant in grants
+                       if grant.get(id_type))
+
+        get_user = None if allow_missing_users else self.identity_api.get_user
+        return {
+            'role': self._get_refs_from_ids(
+                _get_ids('role_id'), self.role_api.list_roles_from_ids,
+                self.role_api.get_role),
+            'user': self._get_refs_from_ids(
+                _get_ids('user_id'), self.identity_api.list_users_from_ids,
+                get_user),
+            'group': self._get_refs_from_ids(
+                _get_ids('group_id'), self.identity_api.list_groups_from_ids,
+                self.identity_api.get_group),
+            'domain': self._get_refs_from_ids(
+                _get_ids('domain_id'), self.resource_api.list_domains_from_ids,
+                self.resource_api.get_domain),
+            'project': self._get_refs_from_ids(
+                _get_ids('project_id'),
+                self.resource_api.list_projects_from_ids,
+                self.resource_api.get_project),
+        }
+
+    def _list_user_ids_in_groups(self, group_ids):
+        """Return the IDs of the members of each group, or None if unknown."""
+        user_ids = {}
+        for group_id in group_ids:
+            try:
+                user_ids[group_id] = [
+                    x['id'] for x in
+                    self.identity_api.list_users_in_group(group_id)]
+            except exception.GroupNotFound:
+                user_ids[group_id] = None
+        return user_ids
+
+    def _invalidate_effective_role_ids_for_grants(self, grants,
+                                                  group_user_ids):
+        if not self._materialize_effective_roles():
+            return
+        user_ids = set()
+        for grant in grants:
+            if grant['user_id']:
+                user_ids.add(grant['user_id'])
+            elif group_user_ids[grant['group_id']] is None:
+                self.invalidate_effective_role_ids()
+                return
+            else:
+                user_ids.update(group_user_ids[grant['group_id']])
+        self.invalidate_effective_role_ids(user_ids=list(user_ids))
+
+    @notifications.role_assignment('created')
+    def _emit_create_grant(self, role_id, user_id, group_id, domain_id,
+                           project_id, inherited_to_projects, context):
+        # The notification is sent by the decorator.
+        pass
+
+    @notifications.role_assignment('deleted')
+    def _emit_delete_grant(self, role_id, user_id, group_id, domain_id,
+                           project_id, inherited_to_projects, context):
+        # The notification is sent by the decorator.
+        pass
+
+    def create_grants(self, grants, context=None, refs=None):
+        """Grant several roles at once.
+
+        The roles, actors and targets of all the grants are checked before
+        any grant is created. The grants are then created together, and the
+        computed assignments are invalidated once for the whole batch.
+
+        :param grants: a list of dicts with the role_id, user_id or group_id,
+                       domain_id or project_id and inherited_to_projects of
+                       each grant
+        :param context: the request context, for the notifications
+        :param refs: the refs returned by get_grant_refs() for the grants, if
+                     the caller already looked them up
+
+        """
+        grants = self._unique_grants(grants)
+        if refs is None:
+            self.get_grant_refs(grants)
+        try:
+            self.driver.create_grants(grants)
+        except exception.NotImplemented:
+            for grant in grants:
+                self.driver.create_grant(**grant)
+
+        group_user_ids = {}
+        if self._materialize_effective_roles():
+            group_user_ids = self._list_user_ids_in_groups(
+                set(grant['group_id'] for grant in grants
+                    if grant['group_id']))
+        self._invalidate_effective_role_ids_for_grants(grants, group_user_ids)
+        COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
+
+        for grant in grants:
+            self._emit_create_grant(context=context, **grant)
+
+    def delete_grants(self, grants, context=None, refs=None):
+        """Revoke several roles at once.
+
+        The roles and targets of all the grants are checked, and then either
+        all of the grants are deleted or none of them are. The tokens relying
+        on the grants are revoked beforehand, as delete_grant() does, with one
+        set of revocation events, in which an event for a group's role on a
+        target covers the events for single users with the same role on the
+        same target.
+
+        :param grants: a list of dicts with the role_id, user_id or group_id,
+                       domain_id or project_id and inherited_to_projects of
+                       each grant
+        :param context: the request context, for the notifications
+        :param refs: the refs returned by get_grant_refs() for the grants,
+                     with missing users allowed, if the caller already looked
+                     them up
+        :raises keystone.exception.RoleAssignmentNotFound: If one of the role
+            assignments doesn't exist.
+
+        """
+        grants = self._unique_grants(grants)
+        if refs is None:
+            self.get_grant_refs(grants, allow_missing_users=True)
+
+        group_user_ids = {}
+        if (CONF.token.revoke_by_id or
+                self._materialize_effective_roles()):
+            group_user_ids = self._list_user_ids_in_groups(
+                set(grant['group_id'] for grant in grants
+                    if grant['group_id']))
+
+        # NOTE: Group grants are revoked by role and target, since a group may
+        # contain a lot of users, see delete_grant().
+        self.revoke_api.revoke_by_grants(
+            [{'role_id': grant['role_id'],
+              'user_id': grant['user_id'],
+              'domain_id': grant['domain_id'],
+              'project_id': grant['project_id']} for grant in grants])
+
+        try:
+            self.driver.delete_grants(grants)
+        except exception.NotImplemented:
+            for grant in grants:
+                self.driver.delete_grant(**grant)
+
+        self._invalidate_effective_role_ids_for_grants(grants, group_user_ids)
+        COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
+
+        user_projects = set()
+        for grant in grants:
+            if grant['user_id']:
+                user_projects.add((grant['user_id'], grant['project_id']))
+            elif CONF.token.revoke_by_id:
+                user_projects.update(
+                    (user_id, grant['project_id'])
+                    for user_id in group_user_ids[grant['group_id']] or [])
+        for user_id, project_id in user_projects:
+            self._emit_invalidate_grant_token_persistence(user_id, project_id)
+
+        for grant in grants:
+            self._emit_delete_grant(context=context, **grant)
 
     # The methods _expand_indirect_assignment, _list_direct_role_assignments
     # and _list_effective_role_assignments below are only used on
@@ -642,6 +979,44 @@ class Manager(manager.Manager):
             return expand_group_assignment(ref, user_id)
         return [ref]
 
+    # NOTE: The role inference rules are expanded for every effective
+    # assignment listing and every token, so their transitive closure is
+    # cached with the computed assignments, which are invalidated whenever
+    # a role or a rule is created or deleted.
+    @MEMOIZE_COMPUTED_ASSIGNMENTS
+    def _get_implied_role_rules(self):
+        """Get the role inference rules that apply to each prior role.
+
+        :returns: a dict of the rules that apply, directly or transitively,
+                  to each prior role, as lists of the prior role ID and the
+                  implied role ID of each rule.
+
+        """
+        implied_role_ids = {}
+        for rule in self.role_api.list_role_inference_rules():
+            implied_role_ids.setdefault(rule['prior_role_id'], []).append(
+                rule['implied_role_id'])
+
+        implied_role_rules = {}
+        for role_id in implied_role_ids:
+            rules = []
+            visited_role_ids = set([role_id])
+            role_ids_to_check = [role_id]
+            while role_ids_to_check:
+                prior_role_id = role_ids_to_check.pop(0)
+                for implied_role_id in implied_role_ids.get(prior_role_id,
+                                                            []):
+                    rules.append([prior_role_id, implied_role_id])
+                    if implied_role_id == role_id:
+                        msg = _LE('Circular reference found '
+                                  'role inference rules - %(prior_role_id)s.')
+                        LOG.error(msg, {'prior_role_id': prior_role_id})
+                    elif implied_role_id not in visited_role_ids:
+                        visited_role_ids.add(implied_role_id)
+                        role_ids_to_check.append(implied_role_id)
+            implied_role_rules[role_id] = rules
+        return implied_role_rules
+
     def add_implied_roles(self, role_refs):
         """Expand out implied roles.
 
@@ -653,46 +1028,48 @@ class Manager(manager.Manager):
         caller can determine where the assignment came from.
 
         """
-        def _make_implied_ref_copy(prior_ref, implied_role_id):
+        def _make_implied_ref_copy(prior_ref, prior_role_id, implied_role_id):
             # Create a ref for an implied role from the ref of a prior role,
             # setting the new role_id to be the implied role and the indirect
-            # role_id to be the prior role
-            implied_ref = copy.deepcopy(prior_ref)
+            # role_id to be the prior role. Only the indirect dict is changed,
+            # so the rest of the ref is shared.
+            implied_ref = dict(prior_ref)
             implied_ref['role_id'] = implied_role_id
-            indirect = implied_ref.setdefault('indirect', {})
-            indirect['role_id'] = prior_ref['role_id']
+            indirect = dict(prior_ref.get('indirect', {}))
+            indirect['role_id'] = prior_role_id
+            implied_ref['indirect'] = indirect
             return implied_ref
 
+        def _ref_key(ref):
+            return tuple(sorted(
+                (k, tuple(sorted(v.items())) if isinstance(v, dict) else v)
+                for k, v in ref.items()))
+
         if not CONF.token.infer_roles:
             return role_refs
         try:
-            implied_roles_cache = {}
-            role_refs_to_check = list(role_refs)
-            ref_results = list(role_refs)
-            checked_role_refs = list()
-            while(role_refs_to_check):
-                next_ref = role_refs_to_check.pop()
-                checked_role_refs.append(next_ref)
-                next_role_id = next_ref['role_id']
-                if next_role_id in implied_roles_cache:
-                    implied_roles = implied_roles_cache[next_role_id]
-                else:
-                    implied_roles = (
-                        self.role_api.list_implied_roles(next_role_id))
-                    implied_roles_cache[next_role_id] = implied_roles
-                for implied_role in implied_roles:
-                    implied_ref = (
-                        _make_implied_ref_copy(
-                            next_ref, implied_role['implied_role_id']))
-                    if implied_ref in checked_role_refs:
-                        msg = _LE('Circular reference found '
-                                  'role inference rules - %(prior_role_id)s.')
-                        LOG.error(msg, {'prior_role_id': next_ref['role_id']})
-                    else:
-                        ref_results.append(implied_ref)
-                        role_refs_to_check.append(implied_ref)
+            implied_role_rules = self._get_implied_role_rules()
         except exception.NotImplemented:
             LOG.error(_LE('Role driver does not support implied roles.'))
+            return role_refs
+
+        ref_results = list(role_refs)
+        ref_keys = None
+        for ref in role_refs:
+            rules = implied_role_rules.get(ref['role_id'])
+            if not rules:
+                continue
+            if ref_keys is None:
+                ref_keys = set(_ref_key(r) for r in role_refs)
+            for prior_role_id, implied_role_id in rules:
+                implied_ref = _make_implied_ref_copy(
+                    ref, prior_role_id, implied_role_id)
+                # The same rule may apply to several of the refs, for
+                # instance when one of their roles implies another.
+                key = _ref_key(implied_ref)
+                if key not in ref_keys:
+                    ref_keys.add(key)
+                    ref_results.append(implied_ref)
 
         return ref_results
 
@@ -984,42 +1361,79 @@ class Manager(manager.Manager):
             return self._get_names_from_role_assignments(role_assignments)
         return role_assignments
 
+    def _get_refs_from_ids(self, ids, list_refs_from_ids, get_ref=None):
+        # Each kind of entity is listed at once. An entity missing from the
+        # listing is then looked up on its own, so that it raises the same
+        # error as when the entities were looked up one by one. Without
+        # get_ref, the missing entities are left out.
+        refs = {}
+        ids_to_list = list(ids)
+        for i in range(0, len(ids_to_list), self._IDS_PER_LISTING):
+            refs.update((ref['id'], ref) for ref in list_refs_from_ids(
+                ids_to_list[i:i + self._IDS_PER_LISTING]))
+        if get_ref is not None:
+            for id_ in set(ids) - set(refs):
+                refs[id_] = get_ref(id_)
+        return refs
+
     def _get_names_from_role_assignments(self, role_assignments):
+        _get_refs = self._get_refs_from_ids
+
+        def _get_ids(id_type):
+            return set(role_asgmt[id_type] for role_asgmt in role_assignments
+                       if id_type in role_asgmt)
+
+        users = _get_refs(_get_ids('user_id'),
+                          self.identity_api.list_users_from_ids,
+                          self.identity_api.get_user)
+        groups = _get_refs(_get_ids('group_id'),
+                           self.identity_api.list_groups_from_ids,
+                           self.identity_api.get_group)
+        projects = _get_refs(_get_ids('project_id'),
+                             self.resource_api.list_projects_from_ids,
+                             self.resource_api.get_project)
+        roles = _get_refs(_get_ids('role_id'),
+                          self.role_api.list_roles_from_ids,
+                          self.role_api.get_role)
+        domain_ids = _get_ids('domain_id')
+        for refs in (users, groups, projects):
+            domain_ids.update(ref['domain_id'] for ref in refs.values())
+        domains = _get_refs(domain_ids,
+                            self.resource_api.list_domains_from_ids,
+                            self.resource_api.get_domain)
+
         role_assign_list = []
 
         for role_asgmt in role_assignments:
             new_assign = {}
             for id_type, id_ in role_asgmt.items():
                 if id_type == 'domain_id':
-                    _domain = self.resource_api.get_domain(id_)
+                    _domain = domains[id_]
                     new_assign['domain_id'] = _domain['id']
                     new_assign['domain_name'] = _domain['name']
                 elif id_type == 'user_id':
-                    _user = self.identity_api.get_user(id_)
+                    _user = users[id_]
                     new_assign['user_id'] = _user['id']
                     new_assign['user_name'] = _user['name']
                     new_assign['user_domain_id'] = _user['domain_id']
                     new_assign['user_domain_name'] = (
-                        self.resource_api.get_domain(_user['domain_id'])
-                        ['name'])
+                        domains[_user['domain_id']]['name'])
                 elif id_type == 'group_id':
-                    _group = self.identity_api.get_group(id_)
+                    _group = groups[id_]
                     new_assign['group_id'] = _group['id']
                     new_assign['group_name'] = _group['name']
                     new_assign['group_domain_id'] = _group['domain_id']
                     new_assign['group_domain_name'] = (
-                        self.resource_api.get_domain(_group['domain_id'])
-                        ['name'])
+                        domains[_group['domain_id']]['name'])
                 elif id_type == 'project_id':
-                    _project = self.resource_api.get_project(id_)
+                    _project = projects[id_]
                     new_assign['project_id'] = _project['id']
                     new_assign['project_name'] = _project['name']
                     new_assign['project_domain_id'] = _project['domain_id']
                     new_assign['project_domain_name'] = (
-                        self.resource_api.get_domain(_project['domain_id'])
-                        ['name'])
+                        domains[_project['domain_id']]['name'])
                 elif id_type == 'role_id':
-                    _role = self.role_api.get_role(id_)
+                    _role = roles[id_]
                     new_assign['role_id'] = _role['id']
                     new_assign['role_name'] = _role['name']
             role_assign_list.append(new_assign)
@@ -1192,7 +1606,9 @@ class RoleManager(manager.Manager):
         self.driver.delete_role(role_id)
         notifications.Audit.deleted(self._ROLE, role_id, initiator)
         self.get_role.invalidate(self, role_id)
+        self.assignment_api.invalidate_effective_role_ids()
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
 
     # TODO(ayoung): Add notification
     def create_implied_role(self, prior_role_id, implied_role_id):
@@ -1202,12 +1618,16 @@ class RoleManager(manager.Manager):
             raise exception.InvalidImpliedRole(role_id=implied_role_id)
         response = self.driver.create_implied_role(
             prior_role_id, implied_role_id)
+        self.assignment_api.invalidate_effective_role_ids()
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
         return response
 
     def delete_implied_role(self, prior_role_id, implied_role_id):
         self.driver.delete_implied_role(prior_role_id, implied_role_id)
+        self.assignment_api.invalidate_effective_role_ids()
         COMPUTED_ASSIGNMENTS_REGION.invalidate()
+        token_provider.TOKEN_DATA_REGION.invalidate()
 
 
 @versionutils.deprecated(
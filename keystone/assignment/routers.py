@@ -200,6 +200,19 @@ class Routers(wsgi.RoutersBase):
             get_head_action='list_role_assignments_wrapper',
             rel=json_home.build_v3_resource_relation('role_assignments'))
 
+        self._add_resource(
+            mapper, grant_controller,
+            path='/role_assignments/grant',
+            post_action='create_grants',
+            rel=json_home.build_v3_resource_relation('role_assignments_grant'))
+
+        self._add_resource(
+            mapper, grant_controller,
+            path='/role_assignments/revoke',
+            post_action='revoke_grants',
+            rel=json_home.build_v3_resource_relation(
+                'role_assignments_revoke'))
+
         if CONF.os_inherit.enabled:
             self._add_resource(
                 mapper, grant_controller,
@@ -46,3 +46,43 @@ role_update = {
     'minProperties': 1,
     'additionalProperties': True
 }
+
+_entity_reference = {
+    'type': 'object',
+    'properties': {
+        'id': {
+            'type': 'string',
+            'minLength': 1,
+            'maxLength': 64
+        }
+    },
+    'required': ['id'],
+    'additionalProperties': True
+}
+
+role_assignments_bulk = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'role': _entity_reference,
+            'user': _entity_reference,
+            'group': _entity_reference,
+            'scope': {
+                'type': 'object',
+                'properties': {
+                    'domain': _entity_reference,
+                    'project': _entity_reference,
+                    'OS-INHERIT:inherited_to': {
+                        'type': 'string',
+                        'enum': ['projects']
+                    }
+                },
+                'additionalProperties': True
+            }
+        },
+        'required': ['role', 'scope'],
+        'additionalProperties': True
+    },
+    'minItems': 1
+}
@@ -31,6 +31,7 @@ from keystone import exception
 from keystone.federation import constants
 from keystone.i18n import _, _LI, _LW
 from keystone.resource import controllers as resource_controllers
+from keystone.token import provider as token_provider
 
 
 LOG = log.getLogger(__name__)
@@ -41,6 +42,20 @@ CONF = keystone.conf.CONF
 AUTH_METHODS = {}
 AUTH_PLUGINS_LOADED = False
 
+# NOTE: The serialized catalogs served by /v3/auth/catalog are cached in
+# process by entity tag, which changes with the catalog revision, so stale
+# catalogs are never served. There is one per user, project and URL, so the
+# number cached is bounded.
+_MAX_CACHED_CATALOGS = 256
+
+# The query parameters selecting the part of the service catalog to include in
+# tokens, and the get_v3_catalog() arguments they map to.
+CATALOG_FILTER_PARAMS = {
+    'catalog_interface': 'interfaces',
+    'catalog_region': 'regions',
+    'catalog_service_type': 'service_types',
+}
+
 
 def load_auth_method(method):
     plugin_name = CONF.auth.get(method) or 'default'
@@ -388,10 +403,12 @@ class Auth(controller.V3Controller):
     def __init__(self, *args, **kw):
         super(Auth, self).__init__(*args, **kw)
         keystone.conf.auth.setup_authentication()
+        self._auth_catalogs = utils.LRUCache(_MAX_CACHED_CATALOGS)
 
     def authenticate_for_token(self, request, auth=None):
         """Authenticate user and issue a token."""
         include_catalog = 'nocatalog' not in request.params
+        catalog_filter = self._get_catalog_filter(request)
 
         try:
             auth_info = AuthInfo.create(auth=auth)
@@ -419,7 +436,8 @@ class Auth(controller.V3Controller):
             (token_id, token_data) = self.token_provider_api.issue_v3_token(
                 auth_context['user_id'], method_names, expires_at, project_id,
                 is_domain, domain_id, auth_context, trust, metadata_ref,
-                include_catalog, parent_audit_id=token_audit_id)
+                include_catalog, parent_audit_id=token_audit_id,
+                catalog_filter=catalog_filter)
 
             # NOTE(wanghong): We consume a trust use only when we are using
             # trusts and have successfully issued a token.
@@ -431,6 +449,50 @@ class Auth(controller.V3Controller):
         except exception.TrustNotFound as e:
             raise exception.Unauthorized(e)
 
+    def _get_catalog_filter(self, request):
+        """Return the part of the service catalog selected by the request.
+
+        Each query parameter is a comma separated list of values; an empty
+        value selects everything, overriding the configured default.
+
+        :returns: keyword arguments for ``catalog_api.get_v3_catalog()``, with
+                  the configured defaults for the parameters that aren't
+                  given, or None if the request doesn't select any part of
+                  the catalog.
+
+        """
+        params = [param for param in CATALOG_FILTER_PARAMS
+                  if param in request.params]
+        if not params:
+            return None
+
+        catalog_filter = token_provider.default_catalog_filter()
+        for param in params:
+            values = [value.strip()
+                      for value in request.params[param].split(',')
+                      if value.strip()]
+            catalog_filter[CATALOG_FILTER_PARAMS[param]] = values or None
+        return catalog_filter
+
+    def _select_catalog(self, token_data, include_catalog, catalog_filter):
+        """Return the token data with the part of the catalog requested.
+
+        Token data may be shared with the token caches, so it is copied
+        rather than modified in place. The catalog can only be narrowed here,
+        endpoints left out when the token data was built can't be added back.
+
+        """
+        if 'catalog' not in token_data:
+            return token_data
+        if not include_catalog:
+            token_data = dict(token_data)
+            del token_data['catalog']
+        elif catalog_filter:
+            token_data = dict(token_data)
+            token_data['catalog'] = self.catalog_api.filter_v3_catalog(
+                token_data['catalog'], **catalog_filter)
+        return token_data
+
     def _check_and_set_default_scoping(self, auth_info, auth_context):
         (domain_id, project_id, trust, unscoped) = auth_info.get_scope()
         if trust:
@@ -541,12 +603,9 @@ class Auth(controller.V3Controller):
     @controller.protected()
     def check_token(self, request):
         token_id = request.context_dict.get('subject_token_id')
-        token_data = self.token_provider_api.validate_v3_token(
-            token_id)
-        # NOTE(morganfainberg): The code in
-        # ``keystone.common.wsgi.render_response`` will remove the content
-        # body.
-        return render_token_data_response(token_id, token_data)
+        self.token_provider_api.check_v3_token(token_id)
+        return wsgi.render_response(status=(200, 'OK'),
+                                    headers=[('X-Subject-Token', token_id)])
 
     @controller.protected()
     def revoke_token(self, request):
@@ -557,12 +616,43 @@ class Auth(controller.V3Controller):
     def validate_token(self, request):
         token_id = request.context_dict.get('subject_token_id')
         include_catalog = 'nocatalog' not in request.params
+        catalog_filter = self._get_catalog_filter(request)
         token_data = self.token_provider_api.validate_v3_token(
             token_id)
-        if not include_catalog and 'catalog' in token_data['token']:
-            del token_data['token']['catalog']
+        token_data = {'token': self._select_catalog(
+            token_data['token'], include_catalog, catalog_filter)}
         return render_token_data_response(token_id, token_data)
 
+    @controller.protected()
+    def validate_tokens(self, request, tokens=None):
+        if (not isinstance(tokens, list) or
+                not all(isinstance(t, six.string_types) for t in tokens)):
+            raise exception.ValidationError(attribute='list of token IDs',
+                                            target='tokens')
+        if len(tokens) > CONF.token.max_batch_validation_size:
+            raise exception.ValidationError(
+                _('At most %d tokens can be validated at once.') %
+                CONF.token.max_batch_validation_size)
+
+        include_catalog = 'nocatalog' not in request.params
+        catalog_filter = self._get_catalog_filter(request)
+        results = self.token_provider_api.validate_v3_tokens(tokens)
+
+        response = []
+        for token_id in tokens:
+            result = results[token_id]
+            if isinstance(result, exception.Error):
+                error = {'code': result.code,
+                         'title': result.title,
+                         'message': six.text_type(result.args[0])}
+                response.append({'error': error})
+                continue
+            token_data = self._select_catalog(
+                result['token'], include_catalog, catalog_filter)
+            response.append({'token': token_data})
+        return wsgi.render_response(body={'tokens': response},
+                                    status=(200, 'OK'))
+
     @controller.protected()
     def revocation_list(self, request, auth=None):
         if not CONF.token.revoke_by_id:
@@ -651,17 +741,38 @@ class Auth(controller.V3Controller):
                 _('A project-scoped token is required to produce a service '
                   'catalog.'))
 
+        self_url = self.base_url(request.context_dict, path='auth/catalog')
+        revision = self.catalog_api.get_catalog_revision()
+        if revision is None:
+            body = self._render_auth_catalog(user_id, project_id, self_url)
+            etag = wsgi.compute_etag(body)
+        else:
+            # NOTE: The entity tag is derived from the catalog revision, so a
+            # client that already has the catalog gets a 304 response without
+            # it being built, and the serialized catalogs are kept in process
+            # by entity tag.
+            key = '\n'.join([revision, user_id or '', project_id, self_url])
+            etag = wsgi.compute_etag(key.encode('utf-8'))
+            body = self._auth_catalogs.get(etag)
+            if body is None and not wsgi.is_not_modified(request, etag):
+                body = self._render_auth_catalog(user_id, project_id,
+                                                 self_url)
+                self._auth_catalogs.set(etag, body)
+        return wsgi.render_conditional_response(
+            request, body, etag,
+            headers=(('Content-Type', 'application/json'),))
+
+    def _render_auth_catalog(self, user_id, project_id, self_url):
         # The V3Controller base methods mostly assume that you're returning
         # either a collection or a single element from a collection, neither of
         # which apply to the catalog. Because this is a special case, this
         # re-implements a tiny bit of work done by the base controller (such as
         # self-referential link building) to avoid overriding or refactoring
         # several private methods.
-        return {
+        return wsgi.serialize_response_body({
             'catalog': self.catalog_api.get_v3_catalog(user_id, project_id),
-            'links': {'self': self.base_url(request.context_dict,
-                                            path='auth/catalog')}
-        }
+            'links': {'self': self_url}
+        })
 
 
 # FIXME(gyee): not sure if it belongs here or keystone.common. Park it here
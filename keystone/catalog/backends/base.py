@@ -30,21 +30,25 @@ class CatalogDriverV8(object):
     def _get_list_limit(self):
         return CONF.catalog.list_limit or CONF.list_limit
 
+    def _list_region_ancestor_ids(self, region_id):
+        """Return the ids of a region and of all the regions above it."""
+        region_ids = []
+        while region_id and region_id not in region_ids:
+            region_ids.append(region_id)
+            region_id = self.get_region(region_id).get('parent_region_id')
+        return region_ids
+
     def _ensure_no_circle_in_hierarchical_regions(self, region_ref):
-        if region_ref.get('parent_region_id') is None:
+        parent_region_id = region_ref.get('parent_region_id')
+        if parent_region_id is None:
             return
 
-        root_region_id = region_ref['id']
-        parent_region_id = region_ref['parent_region_id']
-
-        while parent_region_id:
-            # NOTE(wanghong): check before getting parent region can ensure no
-            # self circle
-            if parent_region_id == root_region_id:
-                raise exception.CircularRegionHierarchyError(
-                    parent_region_id=parent_region_id)
-            parent_region = self.get_region(parent_region_id)
-            parent_region_id = parent_region.get('parent_region_id')
+        # NOTE(wanghong): check the parent region itself too, to ensure no
+        # self circle
+        if region_ref['id'] in self._list_region_ancestor_ids(
+                parent_region_id):
+            raise exception.CircularRegionHierarchyError(
+                parent_region_id=parent_region_id)
 
     @abc.abstractmethod
     def create_region(self, region_ref):
@@ -188,6 +192,19 @@ class CatalogDriverV8(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_endpoints_by_ids(self, endpoint_ids):
+        """List the endpoints with the given ids.
+
+        :param endpoint_ids: The ids of the endpoints to list.
+        :returns: list of endpoint_refs, without the ids of the endpoints
+                  that don't exist.
+        :raises keystone.exception.NotImplemented: If the driver doesn't
+            support listing endpoints by id, in which case they are
+            retrieved one at a time.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
     @abc.abstractmethod
     def update_endpoint(self, endpoint_id, endpoint_ref):
         """Get endpoint by id.
@@ -299,6 +316,49 @@ class CatalogDriverV8(object):
 
         return v3_catalog
 
+    def get_v3_catalog_skeleton_key(self, project_id):
+        """Return the key of the V3 catalog skeleton for a project.
+
+        Projects with the same key share the same catalog skeleton, see
+        :meth:`get_v3_catalog_skeleton`.
+
+        :param project_id: The id of the project, or None for a catalog to go
+            in a domain scoped token.
+        :returns: A hashable key.
+        :raises keystone.exception.NotImplemented: If the driver doesn't
+            support catalog skeletons, in which case the V3 catalog is built
+            by get_v3_catalog() for every user and project.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def get_v3_catalog_skeleton(self, key):
+        """Retrieve the V3 service catalog without formatting endpoint URLs.
+
+        The skeleton doesn't depend on the user or project, so it can be cached
+        and shared by all the projects with the same skeleton key.
+
+        :param key: A key returned by get_v3_catalog_skeleton_key().
+        :returns: A list representing the service catalog, with the endpoint
+                  URLs not formatted.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def format_v3_catalog(self, skeleton, user_id, tenant_id):
+        """Format the endpoint URLs of a V3 catalog skeleton.
+
+        :param skeleton: A catalog returned by get_v3_catalog_skeleton(),
+            which must not be modified.
+        :param user_id: The id of the user who has been authenticated for
+            creating service catalog.
+        :param tenant_id: The id of the project, or None for a catalog to go
+            in a domain scoped token.
+        :returns: A list representing the service catalog or an empty list
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
     @abc.abstractmethod
     def add_endpoint_to_project(self, endpoint_id, project_id):
         """Create an endpoint to project association.
@@ -13,8 +13,6 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import itertools
-
 import sqlalchemy
 from sqlalchemy.sql import true
 
@@ -30,6 +28,14 @@ from keystone.i18n import _
 CONF = keystone.conf.CONF
 
 
+def _supports_recursive_queries(session):
+    # NOTE: Recursive common table expressions are only used with PostgreSQL.
+    # MySQL doesn't support them before 8.0, and the SQLite versions shipped
+    # with some distributions don't either, so the region tree is walked in
+    # memory with the other databases.
+    return session.get_bind().dialect.name == 'postgresql'
+
+
 class Region(sql.ModelBase, sql.DictBase):
     __tablename__ = 'region'
     attributes = ['id', 'description', 'parent_region_id']
@@ -82,6 +88,20 @@ class Endpoint(sql.ModelBase, sql.DictBase):
 
 
 class Catalog(base.CatalogDriverV8):
+    def __init__(self):
+        super(Catalog, self).__init__()
+        # Compiled endpoint URLs, by endpoint ID.
+        self._url_templates = {}
+
+    def _get_url_template(self, endpoint_id, url):
+        template = self._url_templates.get(endpoint_id)
+        # NOTE: The URL is compared too, since the endpoint may have been
+        # updated by another process.
+        if template is None or template.url != url:
+            template = utils.URLTemplate(url)
+            self._url_templates[endpoint_id] = template
+        return template
+
     # Regions
     def list_regions(self, hints):
         with sql.session_for_read() as session:
@@ -95,20 +115,6 @@ class Catalog(base.CatalogDriverV8):
             raise exception.RegionNotFound(region_id=region_id)
         return ref
 
-    def _delete_child_regions(self, session, region_id, root_region_id):
-        """Delete all child regions.
-
-        Recursively delete any region that has the supplied region
-        as its parent.
-        """
-        children = session.query(Region).filter_by(parent_region_id=region_id)
-        for child in children:
-            if child.id == root_region_id:
-                # Hit a circular region hierarchy
-                return
-            self._delete_child_regions(session, child.id, root_region_id)
-            session.delete(child)
-
     def _check_parent_region(self, session, region_ref):
         """Raise a NotFound if the parent region does not exist.
 
@@ -121,19 +127,72 @@ class Catalog(base.CatalogDriverV8):
             # which is the behavior we want.
             self._get_region(session, parent_region_id)
 
-    def _has_endpoints(self, session, region, root_region):
-        if region.endpoints is not None and len(region.endpoints) > 0:
-            return True
+    def _get_region_adjacency(self, session):
+        """Return the parent and the children of every region.
 
-        q = session.query(Region)
-        q = q.filter_by(parent_region_id=region.id)
-        for child in q.all():
-            if child.id == root_region.id:
-                # Hit a circular region hierarchy
-                return False
-            if self._has_endpoints(session, child, root_region):
-                return True
-        return False
+        This is how the region tree is walked when the database doesn't
+        support recursive queries: all the regions are loaded with a single
+        query, rather than one query per level of the tree.
+        """
+        parents = {}
+        children = {}
+        query = session.query(Region.id, Region.parent_region_id)
+        for region_id, parent_region_id in query:
+            parents[region_id] = parent_region_id
+            children.setdefault(parent_region_id, []).append(region_id)
+        return parents, children
+
+    def _list_descendant_region_ids(self, session, region_id):
+        """Return the ids of all the regions below a region.
+
+        Each region is only returned once, and the region itself is never
+        returned, even if the region hierarchy is circular.
+        """
+        if _supports_recursive_queries(session):
+            tree = session.query(Region.id).filter(
+                Region.parent_region_id == region_id).cte(
+                    name='region_tree', recursive=True)
+            parent = sqlalchemy.orm.aliased(tree, name='parent')
+            child = sqlalchemy.orm.aliased(Region, name='child')
+            # NOTE: UNION rather than UNION ALL stops the recursion when a
+            # region is found again in a circular hierarchy.
+            tree = tree.union(session.query(child.id).filter(
+                child.parent_region_id == parent.c.id))
+            return [ref.id for ref in session.query(tree.c.id)
+                    if ref.id != region_id]
+
+        __, children = self._get_region_adjacency(session)
+        descendants = []
+        regions_examined = set([region_id])
+        to_examine = [region_id]
+        while to_examine:
+            for child_id in children.get(to_examine.pop(), []):
+                if child_id not in regions_examined:
+                    regions_examined.add(child_id)
+                    descendants.append(child_id)
+                    to_examine.append(child_id)
+        return descendants
+
+    def _list_region_ancestor_ids(self, region_id):
+        with sql.session_for_read() as session:
+            if _supports_recursive_queries(session):
+                tree = session.query(
+                    Region.id, Region.parent_region_id).filter(
+                        Region.id == region_id).cte(
+                            name='region_tree', recursive=True)
+                child = sqlalchemy.orm.aliased(tree, name='child')
+                parent = sqlalchemy.orm.aliased(Region, name='parent')
+                tree = tree.union(session.query(
+                    parent.id, parent.parent_region_id).filter(
+                        parent.id == child.c.parent_region_id))
+                return [ref.id for ref in session.query(tree.c.id)]
+
+            parents, __ = self._get_region_adjacency(session)
+            region_ids = []
+            while region_id in parents and region_id not in region_ids:
+                region_ids.append(region_id)
+                region_id = parents[region_id]
+            return region_ids
 
     def get_region(self, region_id):
         with sql.session_for_read() as session:
@@ -142,9 +201,17 @@ class Catalog(base.CatalogDriverV8):
     def delete_region(self, region_id):
         with sql.session_for_write() as session:
             ref = self._get_region(session, region_id)
-            if self._has_endpoints(session, ref, ref):
+            child_region_ids = self._list_descendant_region_ids(session,
+                                                                region_id)
+            region_ids = [region_id] + child_region_ids
+            query = session.query(Endpoint.id).filter(
+                Endpoint.region_id.in_(region_ids))
+            if query.first() is not None:
                 raise exception.RegionDeletionError(region_id=region_id)
-            self._delete_child_regions(session, region_id, region_id)
+            if child_region_ids:
+                query = session.query(Region).filter(
+                    Region.id.in_(child_region_ids))
+                query.delete(synchronize_session=False)
             session.delete(ref)
 
     @sql.handle_conflicts(conflict_type='region')
@@ -221,6 +288,7 @@ class Catalog(base.CatalogDriverV8):
         with sql.session_for_write() as session:
             ref = self._get_endpoint(session, endpoint_id)
             session.delete(ref)
+        self._url_templates.pop(endpoint_id, None)
 
     def _get_endpoint(self, session, endpoint_id):
         try:
@@ -239,6 +307,14 @@ class Catalog(base.CatalogDriverV8):
             endpoints = sql.filter_limit_query(Endpoint, endpoints, hints)
             return [e.to_dict() for e in list(endpoints)]
 
+    def list_endpoints_by_ids(self, endpoint_ids):
+        if not endpoint_ids:
+            return []
+        with sql.session_for_read() as session:
+            endpoints = session.query(Endpoint).filter(
+                Endpoint.id.in_(endpoint_ids))
+            return [e.to_dict() for e in endpoints]
+
     def update_endpoint(self, endpoint_id, endpoint_ref):
         with sql.session_for_write() as session:
             ref = self._get_endpoint(session, endpoint_id)
@@ -249,6 +325,7 @@ class Catalog(base.CatalogDriverV8):
                 if attr != 'id':
                     setattr(ref, attr, getattr(new_endpoint, attr))
             ref.extra = new_endpoint.extra
+            self._url_templates.pop(endpoint_id, None)
             return ref.to_dict()
 
     def get_catalog(self, user_id, tenant_id):
@@ -266,9 +343,7 @@ class Catalog(base.CatalogDriverV8):
                   empty dict.
 
         """
-        substitutions = dict(
-            itertools.chain(CONF.items(), CONF.eventlet_server.items()))
-        substitutions.update({'user_id': user_id})
+        substitutions = {'user_id': user_id}
         silent_keyerror_failures = []
         if tenant_id:
             substitutions.update({
@@ -289,8 +364,10 @@ class Catalog(base.CatalogDriverV8):
                 if not endpoint.service['enabled']:
                     continue
                 try:
-                    formatted_url = utils.format_url(
-                        endpoint['url'], substitutions,
+                    template = self._get_url_template(endpoint['id'],
+                                                      endpoint['url'])
+                    formatted_url = template.format(
+                        substitutions,
                         silent_keyerror_failures=silent_keyerror_failures)
                     if formatted_url is not None:
                         url = formatted_url
@@ -326,18 +403,15 @@ class Catalog(base.CatalogDriverV8):
         :returns: A list representing the service catalog or an empty list
 
         """
-        d = dict(
-            itertools.chain(CONF.items(), CONF.eventlet_server.items()))
-        d.update({'user_id': user_id})
-        silent_keyerror_failures = []
-        if tenant_id:
-            d.update({
-                'tenant_id': tenant_id,
-                'project_id': tenant_id,
-            })
-        else:
-            silent_keyerror_failures = ['tenant_id', 'project_id', ]
+        key = self.get_v3_catalog_skeleton_key(tenant_id)
+        return self.format_v3_catalog(self.get_v3_catalog_skeleton(key),
+                                      user_id, tenant_id)
+
+    def get_v3_catalog_skeleton_key(self, project_id):
+        # The catalog is the same for every project.
+        return None
 
+    def get_v3_catalog_skeleton(self, key):
         with sql.session_for_read() as session:
             services = (session.query(Service).filter(
                 Service.enabled == true()).options(
@@ -350,18 +424,6 @@ class Catalog(base.CatalogDriverV8):
                     del endpoint['legacy_endpoint_id']
                     del endpoint['enabled']
                     endpoint['region'] = endpoint['region_id']
-                    try:
-                        formatted_url = utils.format_url(
-                            endpoint['url'], d,
-                            silent_keyerror_failures=silent_keyerror_failures)
-                        if formatted_url:
-                            endpoint['url'] = formatted_url
-                        else:
-                            continue
-                    except exception.MalformedEndpoint:  # nosec(tkelsey)
-                        # this failure is already logged in format_url()
-                        continue
-
                     yield endpoint
 
             # TODO(davechen): If there is service with no endpoints, we should
@@ -375,6 +437,68 @@ class Catalog(base.CatalogDriverV8):
 
             return [make_v3_service(svc) for svc in services]
 
+    def _get_v3_catalog_skeleton_for_endpoints(self, endpoint_ids):
+        """Return the V3 catalog skeleton of some enabled endpoints."""
+        if not endpoint_ids:
+            return []
+
+        with sql.session_for_read() as session:
+            endpoints = (session.query(Endpoint).
+                         options(sql.joinedload(Endpoint.service)).
+                         filter(Endpoint.id.in_(endpoint_ids)).
+                         filter(Endpoint.enabled == true()).all())
+
+            services = {}
+            for ref in endpoints:
+                endpoint = ref.to_dict()
+                del endpoint['service_id']
+                del endpoint['legacy_endpoint_id']
+                del endpoint['enabled']
+                # Include deprecated region for backwards compatibility
+                endpoint['region'] = endpoint['region_id']
+                svc = ref.service
+                service = services.setdefault(svc.id, {
+                    'endpoints': [], 'id': svc.id, 'type': svc.type,
+                    'name': svc.extra.get('name', '')})
+                service['endpoints'].append(endpoint)
+            return list(services.values())
+
+    def format_v3_catalog(self, skeleton, user_id, tenant_id):
+        d = {'user_id': user_id}
+        silent_keyerror_failures = []
+        if tenant_id:
+            d.update({
+                'tenant_id': tenant_id,
+                'project_id': tenant_id,
+            })
+        else:
+            silent_keyerror_failures = ['tenant_id', 'project_id', ]
+
+        def make_v3_endpoints(endpoints):
+            for endpoint in endpoints:
+                try:
+                    template = self._get_url_template(endpoint['id'],
+                                                      endpoint['url'])
+                    formatted_url = template.format(
+                        d, silent_keyerror_failures=silent_keyerror_failures)
+                    if not formatted_url:
+                        continue
+                except exception.MalformedEndpoint:  # nosec(tkelsey)
+                    # this failure is already logged in format_url()
+                    continue
+
+                endpoint = dict(endpoint)
+                endpoint['url'] = formatted_url
+                yield endpoint
+
+        catalog = []
+        for service in skeleton:
+            service = dict(service)
+            service['endpoints'] = list(make_v3_endpoints(
+                service['endpoints']))
+            catalog.append(service)
+        return catalog
+
     @sql.handle_conflicts(conflict_type='project_endpoint')
     def add_endpoint_to_project(self, endpoint_id, project_id):
         with sql.session_for_write() as session:
@@ -12,17 +12,17 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import itertools
 import os.path
 
 from oslo_log import log
 import six
 
 from keystone.catalog.backends import base
+from keystone.catalog import core as catalog_core
 from keystone.common import utils
 import keystone.conf
 from keystone import exception
-from keystone.i18n import _LC
+from keystone.i18n import _LC, _LE
 
 
 LOG = log.getLogger(__name__)
@@ -57,6 +57,80 @@ def parse_templates(template_lines):
     return o
 
 
+class _CompiledTemplates(object):
+    """The catalog structures built from a set of templates.
+
+    Everything that doesn't depend on the user or the project is computed
+    once, including the endpoint URLs, which are compiled into
+    :class:`keystone.common.utils.URLTemplate` objects.
+
+    """
+
+    def __init__(self, templates):
+        self.templates = templates
+
+        self.regions = []
+        self.services = []
+        self.endpoints = []
+        # The templates of each service of each region, as a list of
+        # (region, [(service type, [(key, URLTemplate)])]).
+        self.catalog = []
+        # The same templates laid out for the V3 catalog, as a list of
+        # (region, service type, [(attribute, URLTemplate)],
+        #  [(interface, URLTemplate)]).
+        self.v3_catalog = []
+        for region_id, region_ref in six.iteritems(templates):
+            self.regions.append({'id': region_id, 'description': '',
+                                 'parent_region_id': ''})
+            region_templates = []
+            for service_type, service_ref in six.iteritems(region_ref):
+                self.services.append({
+                    'id': service_type,
+                    'enabled': True,
+                    'name': service_ref.get('name', ''),
+                    'description': service_ref.get('description', ''),
+                    'type': service_type,
+                })
+                for key in service_ref:
+                    if key.endswith('URL'):
+                        interface = key[:-3]
+                        endpoint_id = ('%s-%s-%s' %
+                                       (region_id, service_type, interface))
+                        self.endpoints.append({
+                            'id': endpoint_id,
+                            'service_id': service_type,
+                            'interface': interface,
+                            'url': service_ref[key],
+                            'legacy_endpoint_id': None,
+                            'region_id': region_id,
+                            'enabled': True,
+                        })
+                service_templates = [
+                    (key, utils.URLTemplate(value))
+                    for key, value in six.iteritems(service_ref)]
+                region_templates.append((service_type, service_templates))
+                attribute_templates = []
+                endpoint_templates = []
+                for key, template in service_templates:
+                    if key.endswith('URL'):
+                        endpoint_templates.append((key[:-3], template))
+                    else:
+                        attribute_templates.append((key, template))
+                self.v3_catalog.append((region_id, service_type,
+                                        attribute_templates,
+                                        endpoint_templates))
+            self.catalog.append((region_id, region_templates))
+
+        # The first service and endpoint with a given ID win, as they did
+        # when the lists were searched.
+        self.services_by_id = {}
+        for service in self.services:
+            self.services_by_id.setdefault(service['id'], service)
+        self.endpoints_by_id = {}
+        for endpoint in self.endpoints:
+            self.endpoints_by_id.setdefault(endpoint['id'], endpoint)
+
+
 class Catalog(base.CatalogDriverV8):
     """A backend that generates endpoints for the Catalog based on templates.
 
@@ -87,10 +161,18 @@ class Catalog(base.CatalogDriverV8):
 
       internalURL - the url of the internal endpoint
 
+    The catalog is built once from the templates, and built again when the
+    template file is modified, so that changes don't require a restart. The
+    file is checked whenever the driver is called, so catalogs that are
+    already cached are only refreshed once they expire or once another call
+    reaches the driver.
+
     """
 
     def __init__(self, templates=None):
         super(Catalog, self).__init__()
+        self._template_file = None
+        self._template_file_info = {}
         if templates:
             self.templates = templates
         else:
@@ -99,13 +181,45 @@ class Catalog(base.CatalogDriverV8):
                 template_file = CONF.find_file(template_file)
             self._load_templates(template_file)
 
+    @property
+    def templates(self):
+        return self._compiled.templates
+
+    @templates.setter
+    def templates(self, templates):
+        # NOTE: The new catalog is fully built before replacing the previous
+        # one, so concurrent requests see either of them, never a mix.
+        self._compiled = _CompiledTemplates(templates)
+
+    def _parse_template_file(self, data):
+        self.templates = parse_templates(data.splitlines())
+
+    def _reparse_template_file(self, data):
+        self._parse_template_file(data)
+        # The catalogs computed from the previous templates are stale.
+        catalog_core.COMPUTED_CATALOG_REGION.invalidate()
+
     def _load_templates(self, template_file):
         try:
-            with open(template_file) as f:
-                self.templates = parse_templates(f)
-        except IOError:
+            utils.read_cached_file(template_file, self._template_file_info,
+                                   reload_func=self._parse_template_file)
+        except EnvironmentError:
             LOG.critical(_LC('Unable to open template file %s'), template_file)
             raise
+        self._template_file = template_file
+
+    def _reload_templates(self):
+        """Load the template file again if it has been modified."""
+        if self._template_file is None:
+            return
+        try:
+            utils.read_cached_file(self._template_file,
+                                   self._template_file_info,
+                                   reload_func=self._reparse_template_file)
+        except (EnvironmentError, ValueError):
+            LOG.exception(_LE('Unable to reload template file %s, the '
+                              'previous catalog is still used.'),
+                          self._template_file)
 
     # region crud
 
@@ -113,10 +227,11 @@ class Catalog(base.CatalogDriverV8):
         raise exception.NotImplemented()
 
     def list_regions(self, hints):
-        return [{'id': region_id, 'description': '', 'parent_region_id': ''}
-                for region_id in self.templates]
+        self._reload_templates()
+        return [dict(region) for region in self._compiled.regions]
 
     def get_region(self, region_id):
+        self._reload_templates()
         if region_id in self.templates:
             return {'id': region_id, 'description': '', 'parent_region_id': ''}
         raise exception.RegionNotFound(region_id=region_id)
@@ -132,25 +247,16 @@ class Catalog(base.CatalogDriverV8):
     def create_service(self, service_id, service_ref):
         raise exception.NotImplemented()
 
-    def _list_services(self, hints):
-        for region_ref in six.itervalues(self.templates):
-            for service_type, service_ref in six.iteritems(region_ref):
-                yield {
-                    'id': service_type,
-                    'enabled': True,
-                    'name': service_ref.get('name', ''),
-                    'description': service_ref.get('description', ''),
-                    'type': service_type,
-                }
-
     def list_services(self, hints):
-        return list(self._list_services(hints=None))
+        self._reload_templates()
+        return [dict(service) for service in self._compiled.services]
 
     def get_service(self, service_id):
-        for service in self._list_services(hints=None):
-            if service['id'] == service_id:
-                return service
-        raise exception.ServiceNotFound(service_id=service_id)
+        self._reload_templates()
+        try:
+            return dict(self._compiled.services_by_id[service_id])
+        except KeyError:
+            raise exception.ServiceNotFound(service_id=service_id)
 
     def update_service(self, service_id, service_ref):
         raise exception.NotImplemented()
@@ -163,32 +269,16 @@ class Catalog(base.CatalogDriverV8):
     def create_endpoint(self, endpoint_id, endpoint_ref):
         raise exception.NotImplemented()
 
-    def _list_endpoints(self):
-        for region_id, region_ref in six.iteritems(self.templates):
-            for service_type, service_ref in six.iteritems(region_ref):
-                for key in service_ref:
-                    if key.endswith('URL'):
-                        interface = key[:-3]
-                        endpoint_id = ('%s-%s-%s' %
-                                       (region_id, service_type, interface))
-                        yield {
-                            'id': endpoint_id,
-                            'service_id': service_type,
-                            'interface': interface,
-                            'url': service_ref[key],
-                            'legacy_endpoint_id': None,
-                            'region_id': region_id,
-                            'enabled': True,
-                        }
-
     def list_endpoints(self, hints):
-        return list(self._list_endpoints())
+        self._reload_templates()
+        return [dict(endpoint) for endpoint in self._compiled.endpoints]
 
     def get_endpoint(self, endpoint_id):
-        for endpoint in self._list_endpoints():
-            if endpoint['id'] == endpoint_id:
-                return endpoint
-        raise exception.EndpointNotFound(endpoint_id=endpoint_id)
+        self._reload_templates()
+        try:
+            return dict(self._compiled.endpoints_by_id[endpoint_id])
+        except KeyError:
+            raise exception.EndpointNotFound(endpoint_id=endpoint_id)
 
     def update_endpoint(self, endpoint_id, endpoint_ref):
         raise exception.NotImplemented()
@@ -210,30 +300,22 @@ class Catalog(base.CatalogDriverV8):
                   empty dict.
 
         """
-        substitutions = dict(
-            itertools.chain(CONF.items(), CONF.eventlet_server.items()))
-        substitutions.update({'user_id': user_id})
-        silent_keyerror_failures = []
-        if tenant_id:
-            substitutions.update({
-                'tenant_id': tenant_id,
-                'project_id': tenant_id,
-            })
-        else:
-            silent_keyerror_failures = ['tenant_id', 'project_id', ]
+        self._reload_templates()
+        substitutions, silent_keyerror_failures = self._get_substitutions(
+            user_id, tenant_id)
 
         catalog = {}
         # TODO(davechen): If there is service with no endpoints, we should
         # skip the service instead of keeping it in the catalog.
         # see bug #1436704.
-        for region, region_ref in self.templates.items():
+        for region, region_templates in self._compiled.catalog:
             catalog[region] = {}
-            for service, service_ref in region_ref.items():
+            for service, service_templates in region_templates:
                 service_data = {}
                 try:
-                    for k, v in service_ref.items():
-                        formatted_value = utils.format_url(
-                            v, substitutions,
+                    for k, template in service_templates:
+                        formatted_value = template.format(
+                            substitutions,
                             silent_keyerror_failures=silent_keyerror_failures)
                         if formatted_value:
                             service_data[k] = formatted_value
@@ -243,6 +325,56 @@ class Catalog(base.CatalogDriverV8):
 
         return catalog
 
+    def get_v3_catalog(self, user_id, tenant_id):
+        """Retrieve and format the V3 service catalog.
+
+        The catalog is the one the default implementation derives from the V2
+        catalog, but it is formatted directly from the compiled templates.
+
+        """
+        self._reload_templates()
+        substitutions, silent_keyerror_failures = self._get_substitutions(
+            user_id, tenant_id)
+
+        v3_catalog = []
+        for (region, service_type, attribute_templates,
+                endpoint_templates) in self._compiled.v3_catalog:
+            service = {'type': service_type, 'endpoints': []}
+            try:
+                for attr, template in attribute_templates:
+                    value = template.format(
+                        substitutions,
+                        silent_keyerror_failures=silent_keyerror_failures)
+                    if value:
+                        service[attr] = value
+                for interface, template in endpoint_templates:
+                    url = template.format(
+                        substitutions,
+                        silent_keyerror_failures=silent_keyerror_failures)
+                    if url:
+                        service['endpoints'].append({
+                            'interface': interface,
+                            'region': region,
+                            'url': url,
+                        })
+            except exception.MalformedEndpoint:  # nosec(tkelsey)
+                continue  # this failure is already logged in format_url()
+            v3_catalog.append(service)
+
+        return v3_catalog
+
+    def _get_substitutions(self, user_id, tenant_id):
+        substitutions = {'user_id': user_id}
+        silent_keyerror_failures = []
+        if tenant_id:
+            substitutions.update({
+                'tenant_id': tenant_id,
+                'project_id': tenant_id,
+            })
+        else:
+            silent_keyerror_failures = ['tenant_id', 'project_id', ]
+        return substitutions, silent_keyerror_failures
+
     def add_endpoint_to_project(self, endpoint_id, project_id):
         raise exception.NotImplemented()
 
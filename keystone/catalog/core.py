@@ -15,6 +15,8 @@
 
 """Main entry point into the Catalog service."""
 
+import uuid
+
 from oslo_cache import core as oslo_cache
 from oslo_log import versionutils
 
@@ -219,6 +221,25 @@ class Manager(manager.Manager):
     def list_endpoints(self, hints=None):
         return self.driver.list_endpoints(hints or driver_hints.Hints())
 
+    def get_catalog_revision(self):
+        """Return the revision of the service catalog.
+
+        The revision is cached with the computed catalogs, so a new one is
+        generated, and shared by the keystone processes, whenever they are
+        invalidated, which every change to the service catalog does.
+
+        :returns: a string, or None if the computed catalogs aren't cached, in
+                  which case changes to the catalog can't be tracked.
+
+        """
+        if not (CONF.cache.enabled and CONF.catalog.caching):
+            return None
+        return self._get_catalog_revision()
+
+    @MEMOIZE_COMPUTED_CATALOG
+    def _get_catalog_revision(self):
+        return uuid.uuid4().hex
+
     @MEMOIZE_COMPUTED_CATALOG
     def get_catalog(self, user_id, tenant_id):
         try:
@@ -226,10 +247,76 @@ class Manager(manager.Manager):
         except exception.NotFound:
             raise exception.NotFound('Catalog not found for user and tenant')
 
+    def get_v3_catalog(self, user_id, tenant_id, interfaces=None,
+                       regions=None, service_types=None):
+        """Retrieve the V3 service catalog, optionally filtered.
+
+        The catalog is filtered as described in :meth:`filter_v3_catalog`,
+        before the endpoint URLs are formatted when the driver supports it.
+
+        """
+        try:
+            key = self._get_v3_catalog_skeleton_key(tenant_id)
+        except exception.NotImplemented:
+            return self.filter_v3_catalog(
+                self._get_v3_catalog(user_id, tenant_id), interfaces,
+                regions, service_types)
+        skeleton = self.filter_v3_catalog(
+            self._get_v3_catalog_skeleton(key), interfaces, regions,
+            service_types)
+        return self.driver.format_v3_catalog(skeleton, user_id, tenant_id)
+
+    def filter_v3_catalog(self, catalog, interfaces=None, regions=None,
+                          service_types=None):
+        """Select the services and endpoints of a V3 service catalog.
+
+        :param catalog: the V3 service catalog, which isn't modified
+        :param interfaces: the interfaces of the endpoints to keep, or None to
+                           keep all of them
+        :param regions: the IDs of the regions of the endpoints to keep, or
+                        None to keep all of them
+        :param service_types: the types of the services to keep, or None to
+                              keep all of them
+        :returns: the filtered service catalog. Services left without
+                  endpoints by the interfaces or regions are removed.
+
+        """
+        if not (interfaces or regions or service_types):
+            return catalog
+
+        filtered_catalog = []
+        for service in catalog:
+            if service_types and service.get('type') not in service_types:
+                continue
+            if interfaces or regions:
+                endpoints = [
+                    endpoint for endpoint in service['endpoints']
+                    if (not interfaces or
+                        endpoint.get('interface') in interfaces) and
+                    (not regions or
+                     endpoint.get('region_id', endpoint.get('region')) in
+                     regions)]
+                if not endpoints:
+                    continue
+                service = dict(service, endpoints=endpoints)
+            filtered_catalog.append(service)
+        return filtered_catalog
+
     @MEMOIZE_COMPUTED_CATALOG
-    def get_v3_catalog(self, user_id, tenant_id):
+    def _get_v3_catalog(self, user_id, tenant_id):
         return self.driver.get_v3_catalog(user_id, tenant_id)
 
+    # NOTE: The catalog skeletons don't depend on the user, so they are shared
+    # by every token for the projects with the same skeleton key, and only the
+    # endpoint URLs are formatted for each token.
+    @MEMOIZE_COMPUTED_CATALOG
+    def _get_v3_catalog_skeleton_key(self, tenant_id):
+        return self.driver.get_v3_catalog_skeleton_key(tenant_id)
+
+    @MEMOIZE_COMPUTED_CATALOG
+    def _get_v3_catalog_skeleton(self, key):
+        return self.driver.get_v3_catalog_skeleton(key)
+
     def add_endpoint_to_project(self, endpoint_id, project_id):
         self.driver.add_endpoint_to_project(endpoint_id, project_id)
         COMPUTED_CATALOG_REGION.invalidate()
@@ -238,6 +325,22 @@ class Manager(manager.Manager):
         self.driver.remove_endpoint_from_project(endpoint_id, project_id)
         COMPUTED_CATALOG_REGION.invalidate()
 
+    def create_endpoint_group(self, endpoint_group_id, endpoint_group):
+        ref = self.driver.create_endpoint_group(endpoint_group_id,
+                                                endpoint_group)
+        COMPUTED_CATALOG_REGION.invalidate()
+        return ref
+
+    def update_endpoint_group(self, endpoint_group_id, endpoint_group):
+        ref = self.driver.update_endpoint_group(endpoint_group_id,
+                                                endpoint_group)
+        COMPUTED_CATALOG_REGION.invalidate()
+        return ref
+
+    def delete_endpoint_group(self, endpoint_group_id):
+        self.driver.delete_endpoint_group(endpoint_group_id)
+        COMPUTED_CATALOG_REGION.invalidate()
+
     def add_endpoint_group_to_project(self, endpoint_group_id, project_id):
         self.driver.add_endpoint_group_to_project(
             endpoint_group_id, project_id)
@@ -269,51 +372,74 @@ class Manager(manager.Manager):
         except exception.EndpointGroupNotFound:
             return []
 
-    def get_endpoints_filtered_by_endpoint_group(self, endpoint_group_id):
+    @MEMOIZE_COMPUTED_CATALOG
+    def _get_endpoint_group_index(self):
+        """Return the ids of the endpoints matching each endpoint group.
+
+        The index is built with a single pass over the endpoints and is
+        invalidated with the computed catalogs, whenever an endpoint or an
+        endpoint group changes.
+
+        :returns: a dict mapping endpoint group ids to tuples of endpoint ids.
+
+        """
         endpoints = self.list_endpoints()
-        filters = self.get_endpoint_group(endpoint_group_id)['filters']
-        filtered_endpoints = []
-
-        for endpoint in endpoints:
-            is_candidate = True
-            for key, value in filters.items():
-                if endpoint[key] != value:
-                    is_candidate = False
-                    break
-            if is_candidate:
-                filtered_endpoints.append(endpoint)
-        return filtered_endpoints
+        index = {}
+        for endpoint_group in self.list_endpoint_groups():
+            filters = endpoint_group['filters']
+            index[endpoint_group['id']] = tuple(
+                endpoint['id'] for endpoint in endpoints
+                if all(endpoint[key] == value
+                       for key, value in filters.items()))
+        return index
+
+    def _list_endpoints_by_ids(self, endpoint_ids):
+        try:
+            return self.driver.list_endpoints_by_ids(endpoint_ids)
+        except exception.NotImplemented:
+            endpoints = []
+            for endpoint_id in endpoint_ids:
+                try:
+                    endpoints.append(self.get_endpoint(endpoint_id))
+                except exception.EndpointNotFound:  # nosec
+                    # The endpoint was deleted meanwhile.
+                    pass
+            return endpoints
+
+    def get_endpoints_filtered_by_endpoint_group(self, endpoint_group_id):
+        # Make sure the endpoint group exists.
+        self.get_endpoint_group(endpoint_group_id)
+        endpoint_ids = self._get_endpoint_group_index().get(
+            endpoint_group_id, ())
+        return self._list_endpoints_by_ids(list(endpoint_ids))
 
     def list_endpoints_for_project(self, project_id):
         """List all endpoints associated with a project.
 
         :param project_id: project identifier to check
         :type project_id: string
-        :returns: a list of endpoint ids or an empty list.
+        :returns: a dict of endpoint refs keyed by endpoint id, or an empty
+                  dict.
 
         """
         refs = self.driver.list_endpoints_for_project(project_id)
-        filtered_endpoints = {}
-        for ref in refs:
-            try:
-                endpoint = self.get_endpoint(ref['endpoint_id'])
-                filtered_endpoints.update({ref['endpoint_id']: endpoint})
-            except exception.EndpointNotFound:
-                # remove bad reference from association
-                self.remove_endpoint_from_project(ref['endpoint_id'],
-                                                  project_id)
-
-        # need to recover endpoint_groups associated with project
-        # then for each endpoint group return the endpoints.
-        endpoint_groups = self.get_endpoint_groups_for_project(project_id)
-        for endpoint_group in endpoint_groups:
-            endpoint_refs = self.get_endpoints_filtered_by_endpoint_group(
-                endpoint_group['id'])
-            # now check if any endpoints for current endpoint group are not
-            # contained in the list of filtered endpoints
-            for endpoint_ref in endpoint_refs:
-                if endpoint_ref['id'] not in filtered_endpoints:
-                    filtered_endpoints[endpoint_ref['id']] = endpoint_ref
+        direct_endpoint_ids = set(ref['endpoint_id'] for ref in refs)
+
+        # recover the endpoint groups associated with the project and look up
+        # their endpoints in the index.
+        self.resource_api.get_project(project_id)
+        index = self._get_endpoint_group_index()
+        endpoint_ids = set(direct_endpoint_ids)
+        for ref in self.list_endpoint_groups_for_project(project_id):
+            endpoint_ids.update(index.get(ref['endpoint_group_id'], ()))
+
+        filtered_endpoints = dict(
+            (endpoint['id'], endpoint)
+            for endpoint in self._list_endpoints_by_ids(list(endpoint_ids)))
+
+        for endpoint_id in direct_endpoint_ids - set(filtered_endpoints):
+            # remove bad reference from association
+            self.remove_endpoint_from_project(endpoint_id, project_id)
 
         return filtered_endpoints
 
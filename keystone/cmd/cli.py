@@ -580,6 +580,112 @@ class TokenFlush(BaseApp):
                         CONF.token.driver)
 
 
+class RevokePrune(BaseApp):
+    """Remove expired revocation events from the backend."""
+
+    name = 'revoke_prune'
+
+    @classmethod
+    def add_argument_parser(cls, subparsers):
+        parser = super(RevokePrune, cls).add_argument_parser(subparsers)
+        parser.add_argument('--batch-size', default=None, type=int,
+                            help=('Maximum number of events to remove per '
+                                  'transaction, 0 removes all expired events '
+                                  'in a single transaction. Defaults to '
+                                  '[revoke] prune_batch_size.'))
+        return parser
+
+    @classmethod
+    def main(cls):
+        drivers = backends.load_backends()
+        try:
+            pruned = drivers['revoke_api'].prune_expired_events(
+                CONF.command.batch_size)
+        except exception.NotImplemented:
+            LOG.warning(_LW('Revoke driver %s does not support revoke_prune. '
+                            'The revoke_prune command had no effect.'),
+                        CONF.revoke.driver)
+            return
+        print(_('Removed %d expired revocation events.') % pruned)
+
+
+class RevokeCompact(BaseApp):
+    """Remove revocation events made redundant by other events."""
+
+    name = 'revoke_compact'
+
+    @classmethod
+    def add_argument_parser(cls, subparsers):
+        parser = super(RevokeCompact, cls).add_argument_parser(subparsers)
+        parser.add_argument('--dry-run', default=False, action='store_true',
+                            help=('List the redundant revocation events '
+                                  'without removing them.'))
+        return parser
+
+    @classmethod
+    def main(cls):
+        drivers = backends.load_backends()
+        dry_run = CONF.command.dry_run
+        try:
+            redundant = drivers['revoke_api'].compact_events(dry_run=dry_run)
+        except exception.NotImplemented:
+            LOG.warning(_LW('Revoke driver %s does not support '
+                            'revoke_compact. The revoke_compact command had '
+                            'no effect.'), CONF.revoke.driver)
+            return
+        if dry_run:
+            for event in redundant:
+                print(jsonutils.dumps(event.to_dict(), sort_keys=True))
+            print(_('Found %d redundant revocation events.') %
+                  len(redundant))
+        else:
+            print(_('Removed %d redundant revocation events.') %
+                  len(redundant))
+
+
+class EffectiveRolesRebuild(BaseApp):
+    """Rebuild the materialized effective roles of the users."""
+
+    name = 'effective_roles_rebuild'
+
+    @classmethod
+    def add_argument_parser(cls, subparsers):
+        parser = super(EffectiveRolesRebuild, cls).add_argument_parser(
+            subparsers)
+        parser.add_argument('--verify', default=False, action='store_true',
+                            help=('List the materialized effective roles '
+                                  'that do not match the role assignments '
+                                  'without changing them. Exits with a '
+                                  'non-zero code if there are any.'))
+        return parser
+
+    @classmethod
+    def main(cls):
+        drivers = backends.load_backends()
+        assignment_manager = drivers['assignment_api']
+        try:
+            if CONF.command.verify:
+                mismatches = assignment_manager.verify_effective_role_ids()
+            else:
+                count = assignment_manager.rebuild_effective_role_ids()
+        except exception.NotImplemented:
+            LOG.warning(_LW('Assignment driver %s does not support '
+                            'materialized effective roles. The '
+                            'effective_roles_rebuild command had no effect.'),
+                        CONF.assignment.driver)
+            return
+        if not CONF.command.verify:
+            print(_('Stored the effective roles of %d users and targets.') %
+                  count)
+            return
+        for mismatch in mismatches:
+            print(jsonutils.dumps(mismatch, sort_keys=True))
+        print(_('Found %d users and targets with wrong effective roles.') %
+              len(mismatches))
+        if mismatches:
+            raise SystemExit(1)
+
+
 class MappingPurge(BaseApp):
     """Purge the mapping table."""
 
@@ -974,11 +1080,14 @@ CMDS = [
     DbVersion,
     Doctor,
     DomainConfigUpload,
+    EffectiveRolesRebuild,
     FernetRotate,
     FernetSetup,
     MappingPurge,
     MappingEngineTester,
     PKISetup,
+    RevokeCompact,
+    RevokePrune,
     SamlIdentityProviderMetadata,
     TokenFlush,
 ]
@@ -0,0 +1,64 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import sqlalchemy as sql
+
+
+def _build_ancestors(project_id, parent_ids):
+    # NOTE: A circular hierarchy makes the project its own ancestor, the same
+    # way the resource SQL backend records it.
+    ancestors = {}
+    current_id = parent_ids.get(project_id)
+    depth = 1
+    while current_id is not None:
+        if current_id in ancestors:
+            ancestors.setdefault(project_id, 0)
+            break
+        ancestors[current_id] = depth
+        current_id = parent_ids.get(current_id)
+        depth += 1
+    return ancestors
+
+
+def upgrade(migrate_engine):
+    meta = sql.MetaData()
+    meta.bind = migrate_engine
+
+    project_table = sql.Table('project', meta, autoload=True)
+
+    project_tree_table = sql.Table(
+        'project_tree',
+        meta,
+        sql.Column('ancestor_id', sql.String(64),
+                   sql.ForeignKey(project_table.c.id, ondelete='CASCADE'),
+                   primary_key=True),
+        sql.Column('descendant_id', sql.String(64),
+                   sql.ForeignKey(project_table.c.id, ondelete='CASCADE'),
+                   primary_key=True),
+        sql.Column('depth', sql.Integer, nullable=False),
+        sql.Index('ix_project_tree_descendant_id', 'descendant_id'),
+        mysql_engine='InnoDB',
+        mysql_charset='utf8')
+    project_tree_table.create(migrate_engine, checkfirst=True)
+
+    query = sql.select([project_table.c.id, project_table.c.parent_id])
+    parent_ids = dict(migrate_engine.execute(query).fetchall())
+
+    rows = []
+    for project_id in parent_ids:
+        ancestors = _build_ancestors(project_id, parent_ids)
+        for ancestor_id, depth in ancestors.items():
+            rows.append({'ancestor_id': ancestor_id,
+                         'descendant_id': project_id,
+                         'depth': depth})
+    if rows:
+        migrate_engine.execute(project_tree_table.insert(), rows)
@@ -23,6 +23,7 @@ import hashlib
 import itertools
 import os
 import pwd
+import threading
 import uuid
 
 from oslo_log import log
@@ -91,7 +92,9 @@ def read_cached_file(filename, cache_info, reload_func=None):
 
     :param cache_info: dictionary to hold opaque cache.
     :param reload_func: optional function to be called with data when
-                        file is reloaded due to a modification.
+                        file is reloaded due to a modification. If it raises
+                        an exception, the file is read again on the next
+                        call.
 
     :returns: data from file.
 
@@ -99,13 +102,50 @@ def read_cached_file(filename, cache_info, reload_func=None):
     mtime = os.path.getmtime(filename)
     if not cache_info or mtime != cache_info.get('mtime'):
         with open(filename) as fap:
-            cache_info['data'] = fap.read()
-        cache_info['mtime'] = mtime
+            data = fap.read()
         if reload_func:
-            reload_func(cache_info['data'])
+            reload_func(data)
+        cache_info['data'] = data
+        cache_info['mtime'] = mtime
     return cache_info['data']
 
 
+class LRUCache(object):
+    """A thread-safe, bounded, in-process least recently used cache."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._data.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
 class SmarterEncoder(jsonutils.json.JSONEncoder):
     """Help for JSON encoding dict-like objects."""
 
@@ -646,6 +686,97 @@ def format_url(url, substitutions, silent_keyerror_failures=None):
     return result
 
 
+def _conf_substitutions():
+    return dict(itertools.chain(CONF.items(), CONF.eventlet_server.items()))
+
+
+class URLTemplate(object):
+    """A user-defined URL compiled for repeated formatting.
+
+    Substitutions other than the user and project IDs are resolved once, when
+    the template is compiled, leaving a list of static strings and slots for
+    the IDs. URLs that cannot be compiled are formatted with
+    :func:`format_url` every time, using the substitutions as they are at
+    that moment.
+
+    :param string url: the URL to be formatted
+    :param dict substitutions: the substitutions that don't depend on the
+        user or project; defaults to the configuration options
+
+    """
+
+    SLOTS = ('tenant_id', 'project_id', 'user_id')
+    _MARKER = '\x00'
+    _SAMPLE = {'tenant_id': 'tenant', 'project_id': 'project',
+               'user_id': 'user'}
+
+    def __init__(self, url, substitutions=None):
+        self.url = url
+        self._substitutions = substitutions
+        self._pieces = self._compile(self._get_substitutions())
+
+    def _get_substitutions(self):
+        if self._substitutions is None:
+            return _conf_substitutions()
+        return self._substitutions
+
+    @staticmethod
+    def _join(pieces, substitutions):
+        pieces = list(pieces)
+        for i in range(1, len(pieces), 2):
+            pieces[i] = '%s' % substitutions[pieces[i]]
+        return ''.join(pieces)
+
+    def _compile(self, substitutions):
+        """Return the static strings and slots of the URL, or None."""
+        if not isinstance(self.url, six.string_types):
+            return None
+        markers = dict((slot, self._MARKER + slot + self._MARKER)
+                       for slot in self.SLOTS)
+        markers.update(substitutions)
+        try:
+            result = self.url.replace('$(', '%(') % WhiteListedItemFilter(
+                WHITELISTED_PROPERTIES, markers)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        pieces = result.split(self._MARKER)
+        if len(pieces) % 2 == 0:
+            return None
+        for slot in pieces[1::2]:
+            if slot not in self.SLOTS:
+                return None
+        if self._join(pieces, self._SAMPLE) != format_url(
+                self.url, dict(substitutions, **self._SAMPLE)):
+            return None
+        return pieces
+
+    def _format_url(self, substitutions, silent_keyerror_failures):
+        return format_url(
+            self.url, dict(self._get_substitutions(), **substitutions),
+            silent_keyerror_failures=silent_keyerror_failures)
+
+    def format(self, substitutions, silent_keyerror_failures=None):
+        """Format the URL with the user and project IDs.
+
+        :param dict substitutions: the user and project IDs
+        :param list silent_keyerror_failures: keys for which we should be
+            silent if they are needed but missing
+        :returns: a formatted URL, or None if a key listed in
+            silent_keyerror_failures is missing
+
+        """
+        if self._pieces is None:
+            return self._format_url(substitutions, silent_keyerror_failures)
+
+        try:
+            return self._join(self._pieces, substitutions)
+        except KeyError as e:
+            if e.args and e.args[0] in (silent_keyerror_failures or []):
+                return None
+            return self._format_url(substitutions, silent_keyerror_failures)
+
+
 def check_endpoint_url(url):
     """Check substitution of url.
 
@@ -20,6 +20,7 @@
 
 import copy
 import functools
+import hashlib
 import itertools
 import re
 import wsgiref.util
@@ -677,6 +678,7 @@ class V3ExtensionRouter(ExtensionRouter, RoutersBase):
 
     def __init__(self, application, mapper=None):
         self.v3_resources = list()
+        self._json_home = None
         super(V3ExtensionRouter, self).__init__(application, mapper)
 
     def _update_version_response(self, response_data):
@@ -688,8 +690,25 @@ class V3ExtensionRouter(ExtensionRouter, RoutersBase):
             # Not a request for version info so forward to super.
             return super(V3ExtensionRouter, self).__call__(request)
 
+        # NOTE: The JSON Home document is updated with the resources of the
+        # extension, so its entity tag differs from the application's one.
+        # The entity tag of the last document updated is translated back for
+        # the application to tell whether the document changed.
+        if_none_match = request.headers.get('If-None-Match')
+        json_home = self._json_home
+        if json_home is not None and json_home[2] in request.if_none_match:
+            request.headers['If-None-Match'] = '"%s"' % json_home[0]
+
         response = request.get_response(self.application)
 
+        if if_none_match is not None:
+            request.headers['If-None-Match'] = if_none_match
+
+        if (response.status_code == http_client.NOT_MODIFIED and
+                json_home is not None and response.etag == json_home[0]):
+            response.etag = json_home[2]
+            return response
+
         if response.status_code != http_client.OK:
             # The request failed, so don't update the response.
             return response
@@ -699,11 +718,18 @@ class V3ExtensionRouter(ExtensionRouter, RoutersBase):
             # response.
             return response
 
-        response_data = jsonutils.loads(response.body)
-        self._update_version_response(response_data)
-        response.body = jsonutils.dump_as_bytes(response_data,
-                                                cls=utils.SmarterEncoder)
-        return response
+        app_etag = response.etag
+        if app_etag is None or json_home is None or json_home[0] != app_etag:
+            response_data = jsonutils.loads(response.body)
+            self._update_version_response(response_data)
+            body = serialize_response_body(response_data)
+            json_home = (app_etag, body, compute_etag(body))
+            if app_etag is not None:
+                self._json_home = json_home
+
+        return render_conditional_response(
+            request, json_home[1], json_home[2],
+            headers=(('Content-Type', 'application/json-home'),))
 
 
 def render_response(body=None, status=None, headers=None, method=None):
@@ -726,12 +752,65 @@ def render_response(body=None, status=None, headers=None, method=None):
             content_type = None
 
         if content_type is None or content_type in JSON_ENCODE_CONTENT_TYPES:
-            body = jsonutils.dump_as_bytes(body, cls=utils.SmarterEncoder)
+            body = serialize_response_body(body)
             if content_type is None:
                 headers.append(('Content-Type', 'application/json'))
         status = status or (http_client.OK,
                             http_client.responses[http_client.OK])
 
+    return _build_response(body, status, headers, method)
+
+
+def serialize_response_body(body):
+    """Serialize a response body the way render_response() does."""
+    return jsonutils.dump_as_bytes(body, cls=utils.SmarterEncoder)
+
+
+def compute_etag(body):
+    """Return a strong entity tag for a serialized response body."""
+    return hashlib.sha256(body).hexdigest()
+
+
+def is_not_modified(request, etag):
+    """Whether the client already has the response with this entity tag."""
+    return (request.method in ('GET', 'HEAD') and
+            etag in request.if_none_match)
+
+
+def render_conditional_response(request, body, etag, status=None,
+                                headers=None):
+    """Form a WSGI response for a serialized body with an entity tag.
+
+    If the entity tag matches the If-None-Match header of the request, a
+    ``304 Not Modified`` response without a body is formed instead.
+
+    :param request: the request being responded to
+    :param body: the serialized response body
+    :param etag: the strong entity tag of the body, without quotes
+    :param status: the status of the response if it has a body
+    :param headers: the headers of the response, including its Content-Type
+
+    """
+    if headers is None:
+        headers = []
+    else:
+        headers = list(headers)
+    headers.append(('Vary', 'X-Auth-Token'))
+    headers.append(('ETag', '"%s"' % etag))
+
+    if is_not_modified(request, etag):
+        headers = [(h, v) for h, v in headers if h != 'Content-Type']
+        return _build_response(
+            b'',
+            (http_client.NOT_MODIFIED,
+             http_client.responses[http_client.NOT_MODIFIED]),
+            headers, request.method)
+
+    status = status or (http_client.OK, http_client.responses[http_client.OK])
+    return _build_response(body, status, headers, request.method)
+
+
+def _build_response(body, status, headers, method):
     # NOTE(davechen): `mod_wsgi` follows the standards from pep-3333 and
     # requires the value in response header to be binary type(str) on python2,
     # unicode based string(str) on python3, or else keystone will not work
@@ -34,11 +34,39 @@ prohibited_implied_role = cfg.ListOpt(
 A list of role names which are prohibited from being an implied role.
 """))
 
+materialize_effective_roles = cfg.BoolOpt(
+    'materialize_effective_roles',
+    default=False,
+    help=utils.fmt("""
+Store the effective roles of each user on each project and domain in the
+assignment backend once they have been computed, so that issuing a token reads
+them with a single lookup. They are invalidated whenever a role assignment, a
+group membership, a role inference rule or the domain of a project changes.
+After enabling this option, or changing an option that affects the effective
+roles such as `[token] infer_roles` or `[os_inherit] enabled`, run
+`keystone-manage effective_roles_rebuild`. The stored roles don't expire, and
+group memberships kept outside of keystone, such as in LDAP, can change without
+invalidating them, so this option is ignored unless the identity driver is SQL
+and domain specific identity drivers are disabled.
+"""))
+
+max_bulk_grants = cfg.IntOpt(
+    'max_bulk_grants',
+    default=1000,
+    min=1,
+    help=utils.fmt("""
+Maximum number of role assignments that can be granted or revoked in a single
+request to the bulk grant APIs, `POST /v3/role_assignments/grant` and `POST
+/v3/role_assignments/revoke`.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
     driver,
-    prohibited_implied_role
+    prohibited_implied_role,
+    materialize_effective_roles,
+    max_bulk_grants,
 ]
 
 
@@ -82,6 +82,19 @@ Toggle for federation caching. This has no effect unless global caching is
 enabled. There is typically no reason to disable this.
 """))
 
+service_providers_cache_time = cfg.IntOpt(
+    'service_providers_cache_time',
+    default=60,
+    min=0,
+    help=utils.fmt("""
+Time to cache the list of enabled service providers embedded in tokens in each
+keystone process, in seconds. Changes to service providers are seen at once by
+the process making them. Other processes check a version of the service
+providers shared through the cache once this time has passed, and only load
+the list again if it changed, or if caching is disabled. Set this to 0 to
+disable the in-process cache.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
@@ -92,6 +105,7 @@ ALL_OPTS = [
     trusted_dashboard,
     sso_callback_template,
     caching,
+    service_providers_cache_time,
 ]
 
 
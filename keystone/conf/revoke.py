@@ -33,6 +33,43 @@ The number of seconds after a token has expired before a corresponding
 revocation event may be purged from the backend.
 """))
 
+sync_interval = cfg.IntOpt(
+    'sync_interval',
+    default=10,
+    min=0,
+    help=utils.fmt("""
+Each keystone process keeps its own copy of the revocation events and only
+fetches events newer than the ones it already has from the backend. Revocations
+made by a process are seen by it at once. Other processes check a version of
+the events shared through the cache (see the `[cache]` section) at most once
+every this many seconds, and fetch new events if it changed; when caching is
+disabled, they fetch new events once every this many seconds. This bounds how
+long a revocation made by another process takes to be seen. Set this to 0 to
+check on every token validation.
+"""))
+
+prune_interval = cfg.IntOpt(
+    'prune_interval',
+    default=3600,
+    min=0,
+    help=utils.fmt("""
+Number of seconds between two removals of expired revocation events from the
+backend by each keystone server process. Set this to 0 to disable the
+periodic removal, for example when running `keystone-manage revoke_prune`
+from cron instead.
+"""))
+
+prune_batch_size = cfg.IntOpt(
+    'prune_batch_size',
+    default=1000,
+    min=0,
+    help=utils.fmt("""
+Maximum number of expired revocation events removed from the backend per
+transaction, both by the periodic removal and by `keystone-manage
+revoke_prune`. Set this to 0 to remove all expired events in a single
+transaction.
+"""))
+
 caching = cfg.BoolOpt(
     'caching',
     default=True,
@@ -56,6 +93,9 @@ GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
     driver,
     expiration_buffer,
+    sync_interval,
+    prune_interval,
+    prune_batch_size,
     caching,
     cache_time,
 ]
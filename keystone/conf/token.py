@@ -101,6 +101,27 @@ The number of seconds to cache token creation and validation data. This has no
 effect unless both global and `[token] caching` are enabled.
 """))
 
+validated_token_cache_size = cfg.IntOpt(
+    'validated_token_cache_size',
+    default=0,
+    min=0,
+    help=utils.fmt("""
+Maximum number of validated tokens each keystone process keeps in memory. A
+token found in this cache is returned without going through the token caching
+backend and is only checked against the revocation events again after a new
+revocation event has been seen, see `[revoke] sync_interval`. Set this to 0 to
+disable the cache.
+"""))
+
+max_batch_validation_size = cfg.IntOpt(
+    'max_batch_validation_size',
+    default=100,
+    min=1,
+    help=utils.fmt("""
+Maximum number of tokens that can be validated in a single request to the
+batch token validation API, `POST /v3/auth/tokens/validate`.
+"""))
+
 revoke_by_id = cfg.BoolOpt(
     'revoke_by_id',
     default=True,
@@ -152,6 +173,45 @@ directly assigned to the token's scope, but are instead linked implicitly to
 other role assignments.
 """))
 
+catalog_interfaces = cfg.ListOpt(
+    'catalog_interfaces',
+    default=[],
+    help=utils.fmt("""
+The endpoint interfaces (such as `public`, `internal` or `admin`) to include in
+the service catalog of tokens, when they are not selected with the
+`catalog_interface` query parameter. The default is to include all interfaces.
+Services left without endpoints are not included.
+"""))
+
+catalog_regions = cfg.ListOpt(
+    'catalog_regions',
+    default=[],
+    help=utils.fmt("""
+The IDs of the regions whose endpoints are included in the service catalog of
+tokens, when they are not selected with the `catalog_region` query parameter.
+The default is to include the endpoints of all regions. Services left without
+endpoints are not included.
+"""))
+
+catalog_service_types = cfg.ListOpt(
+    'catalog_service_types',
+    default=[],
+    help=utils.fmt("""
+The types of the services to include in the service catalog of tokens, when
+they are not selected with the `catalog_service_type` query parameter. The
+default is to include all services.
+"""))
+
+include_service_providers = cfg.BoolOpt(
+    'include_service_providers',
+    default=True,
+    help=utils.fmt("""
+Toggle for including the enabled service providers in tokens of users which
+are not federated. Disable this if keystone to keystone federation is not used
+by local users, to save looking up the service providers and embedding them in
+every token. Tokens of federated users always include them.
+"""))
+
 
 GROUP_NAME = __name__.split('.')[-1]
 ALL_OPTS = [
@@ -162,10 +222,16 @@ ALL_OPTS = [
     driver,
     caching,
     cache_time,
+    validated_token_cache_size,
+    max_batch_validation_size,
     revoke_by_id,
     allow_rescope_scoped_token,
     hash_algorithm,
     infer_roles,
+    catalog_interfaces,
+    catalog_regions,
+    catalog_service_types,
+    include_service_providers,
 ]
 
 
@@ -103,9 +103,9 @@ class EndpointPolicy(object):
 
         try:
             with sql.session_for_read() as session:
-                policy_id = session.query(PolicyAssociation.policy_id).filter(
+                ref = session.query(PolicyAssociation.policy_id).filter(
                     sql_constraints).distinct().one()
-            return {'policy_id': policy_id}
+            return {'policy_id': ref.policy_id}
         except sql.NotFound:
             raise exception.PolicyAssociationNotFound()
 
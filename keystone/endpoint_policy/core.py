@@ -12,20 +12,33 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from oslo_cache import core as oslo_cache
 from oslo_log import log
 from oslo_log import versionutils
 
+from keystone.common import cache
 from keystone.common import dependency
 from keystone.common import manager
 import keystone.conf
 from keystone.endpoint_policy.backends import base
 from keystone import exception
 from keystone.i18n import _, _LE, _LW
+from keystone import notifications
 
 
 CONF = keystone.conf.CONF
 LOG = log.getLogger(__name__)
 
+# This cache region holds the region tree, the endpoints of each service and
+# region, and the effective policy of each endpoint. They are derived from
+# the catalog, so they follow the catalog caching options, and the whole
+# region is invalidated whenever a region, service, endpoint or policy
+# association changes.
+ENDPOINT_POLICY_REGION = oslo_cache.create_region()
+MEMOIZE_ENDPOINT_POLICY = cache.get_memoization_decorator(
+    group='catalog',
+    region=ENDPOINT_POLICY_REGION)
+
 
 @dependency.provider('endpoint_policy_api')
 @dependency.requires('catalog_api', 'policy_api')
@@ -41,6 +54,7 @@ class Manager(manager.Manager):
 
     def __init__(self):
         super(Manager, self).__init__(CONF.endpoint_policy.driver)
+        self._register_callback_listeners()
 
     def _assert_valid_association(self, endpoint_id, service_id, region_id):
         """Assert that the association is supported.
@@ -71,6 +85,7 @@ class Manager(manager.Manager):
         self._assert_valid_association(endpoint_id, service_id, region_id)
         self.driver.create_policy_association(policy_id, endpoint_id,
                                               service_id, region_id)
+        ENDPOINT_POLICY_REGION.invalidate()
 
     def check_policy_association(self, policy_id, endpoint_id=None,
                                  service_id=None, region_id=None):
@@ -83,6 +98,96 @@ class Manager(manager.Manager):
         self._assert_valid_association(endpoint_id, service_id, region_id)
         self.driver.delete_policy_association(policy_id, endpoint_id,
                                               service_id, region_id)
+        ENDPOINT_POLICY_REGION.invalidate()
+
+    def delete_association_by_endpoint(self, endpoint_id):
+        self.driver.delete_association_by_endpoint(endpoint_id)
+        ENDPOINT_POLICY_REGION.invalidate()
+
+    def delete_association_by_service(self, service_id):
+        self.driver.delete_association_by_service(service_id)
+        ENDPOINT_POLICY_REGION.invalidate()
+
+    def delete_association_by_region(self, region_id):
+        self.driver.delete_association_by_region(region_id)
+        ENDPOINT_POLICY_REGION.invalidate()
+
+    def delete_association_by_policy(self, policy_id):
+        self.driver.delete_association_by_policy(policy_id)
+        ENDPOINT_POLICY_REGION.invalidate()
+
+    def _invalidate_cache_callback(self, service, resource_type, operation,
+                                   payload):
+        ENDPOINT_POLICY_REGION.invalidate()
+
+    def _register_callback_listeners(self):
+        for event in (notifications.ACTIONS.created,
+                      notifications.ACTIONS.updated,
+                      notifications.ACTIONS.deleted):
+            for resource_type in ('region', 'service', 'endpoint'):
+                notifications.register_event_callback(
+                    event, resource_type, self._invalidate_cache_callback)
+
+    @MEMOIZE_ENDPOINT_POLICY
+    def _get_region_tree(self):
+        """Return the parent and the children of each region.
+
+        :returns: a tuple of two dicts, mapping region ids to the id of their
+                  parent region, and to the list of ids of their child regions.
+
+        """
+        parents = {}
+        children = {}
+        for region in self.catalog_api.list_regions():
+            parents[region['id']] = region['parent_region_id']
+            if region['parent_region_id'] is not None:
+                children.setdefault(
+                    region['parent_region_id'], []).append(region['id'])
+        return parents, children
+
+    @MEMOIZE_ENDPOINT_POLICY
+    def _get_endpoints_by_service_and_region(self):
+        """Return the endpoints of each service and region.
+
+        :returns: a dict mapping service ids to dicts mapping region ids to
+                  lists of endpoints.
+
+        """
+        endpoints = {}
+        for endpoint in self.catalog_api.list_endpoints():
+            endpoints.setdefault(endpoint['service_id'], {}).setdefault(
+                endpoint['region_id'], []).append(endpoint)
+        return endpoints
+
+    def _get_region_ancestry(self, region_id):
+        """Return a region followed by its parents, up to the root region."""
+        parents, __ = self._get_region_tree()
+        ancestry = []
+        while region_id is not None:
+            if region_id in ancestry:
+                msg = _LE('Circular reference or a repeated entry found in '
+                          'region tree - %(region_id)s.')
+                LOG.error(msg, {'region_id': region_id})
+                break
+            ancestry.append(region_id)
+            region_id = parents.get(region_id)
+        return ancestry
+
+    def _get_region_descendants(self, region_id):
+        """Return a region followed by all the regions below it."""
+        __, children = self._get_region_tree()
+        descendants = [region_id]
+        regions_examined = set(descendants)
+        for current_region_id in descendants:
+            for child_region_id in children.get(current_region_id, []):
+                if child_region_id in regions_examined:
+                    msg = _LE('Circular reference or a repeated entry found '
+                              'in region tree - %(region_id)s.')
+                    LOG.error(msg, {'region_id': child_region_id})
+                    continue
+                regions_examined.add(child_region_id)
+                descendants.append(child_region_id)
+        return descendants
 
     def list_endpoints_for_policy(self, policy_id):
 
@@ -96,85 +201,32 @@ class Manager(manager.Manager):
                                   'endpoint_id': endpoint_id})
                 raise
 
-        def _get_endpoints_for_service(service_id, endpoints):
-            # TODO(henry-nash): Consider optimizing this in the future by
-            # adding an explicit list_endpoints_for_service to the catalog API.
-            return [ep for ep in endpoints if ep['service_id'] == service_id]
-
-        def _get_endpoints_for_service_and_region(
-                service_id, region_id, endpoints, regions):
-            # TODO(henry-nash): Consider optimizing this in the future.
-            # The lack of a two-way pointer in the region tree structure
-            # makes this somewhat inefficient.
-
-            def _recursively_get_endpoints_for_region(
-                region_id, service_id, endpoint_list, region_list,
-                    endpoints_found, regions_examined):
-                """Recursively search down a region tree for endpoints.
-
-                :param region_id: the point in the tree to examine
-                :param service_id: the service we are interested in
-                :param endpoint_list: list of all endpoints
-                :param region_list: list of all regions
-                :param endpoints_found: list of matching endpoints found so
-                                        far - which will be updated if more are
-                                        found in this iteration
-                :param regions_examined: list of regions we have already looked
-                                         at - used to spot illegal circular
-                                         references in the tree to avoid never
-                                         completing search
-                :returns: list of endpoints that match
-
-                """
-                if region_id in regions_examined:
-                    msg = _LE('Circular reference or a repeated entry found '
-                              'in region tree - %(region_id)s.')
-                    LOG.error(msg, {'region_id': ref.region_id})
-                    return
-
-                regions_examined.append(region_id)
-                endpoints_found += (
-                    [ep for ep in endpoint_list if
-                     ep['service_id'] == service_id and
-                     ep['region_id'] == region_id])
-
-                for region in region_list:
-                    if region['parent_region_id'] == region_id:
-                        _recursively_get_endpoints_for_region(
-                            region['id'], service_id, endpoints, regions,
-                            endpoints_found, regions_examined)
-
-            endpoints_found = []
-            regions_examined = []
-
-            # Now walk down the region tree
-            _recursively_get_endpoints_for_region(
-                region_id, service_id, endpoints, regions,
-                endpoints_found, regions_examined)
-
-            return endpoints_found
+        endpoints_by_service_and_region = (
+            self._get_endpoints_by_service_and_region())
 
         matching_endpoints = []
-        endpoints = self.catalog_api.list_endpoints()
-        regions = self.catalog_api.list_regions()
         for ref in self.list_associations_for_policy(policy_id):
             if ref.get('endpoint_id') is not None:
                 matching_endpoints.append(
                     _get_endpoint(ref['endpoint_id'], policy_id))
                 continue
 
+            endpoints_by_region = endpoints_by_service_and_region.get(
+                ref.get('service_id'), {})
+
             if (ref.get('service_id') is not None and
                     ref.get('region_id') is None):
-                matching_endpoints += _get_endpoints_for_service(
-                    ref['service_id'], endpoints)
+                for endpoints in endpoints_by_region.values():
+                    matching_endpoints += endpoints
                 continue
 
             if (ref.get('service_id') is not None and
                     ref.get('region_id') is not None):
-                matching_endpoints += (
-                    _get_endpoints_for_service_and_region(
-                        ref['service_id'], ref['region_id'],
-                        endpoints, regions))
+                # Walk down the region tree
+                for region_id in self._get_region_descendants(
+                        ref['region_id']):
+                    matching_endpoints += endpoints_by_region.get(
+                        region_id, [])
                 continue
 
             msg = _LW('Unsupported policy association found - '
@@ -185,84 +237,53 @@ class Manager(manager.Manager):
                               'service_id': ref['service_id'],
                               'region_id': ref['region_id']})
 
-        return matching_endpoints
+        # The endpoints come from the cache, don't let them be modified.
+        return [dict(endpoint) for endpoint in matching_endpoints]
 
-    def get_policy_for_endpoint(self, endpoint_id):
+    @MEMOIZE_ENDPOINT_POLICY
+    def _get_policy_id_for_endpoint(self, endpoint_id):
+        """Return the id of the policy in effect for an endpoint, or None."""
 
-        def _get_policy(policy_id, endpoint_id):
+        def _get_policy_id(**kwargs):
             try:
-                return self.policy_api.get_policy(policy_id)
-            except exception.PolicyNotFound:
-                msg = _LW('Policy %(policy_id)s referenced in association '
-                          'for endpoint %(endpoint_id)s not found.')
-                LOG.warning(msg, {'policy_id': policy_id,
-                                  'endpoint_id': endpoint_id})
-                raise
-
-        def _look_for_policy_for_region_and_service(endpoint):
-            """Look in the region and its parents for a policy.
-
-            Examine the region of the endpoint for a policy appropriate for
-            the service of the endpoint. If there isn't a match, then chase up
-            the region tree to find one.
-
-            """
-            region_id = endpoint['region_id']
-            regions_examined = []
-            while region_id is not None:
-                try:
-                    ref = self.get_policy_association(
-                        service_id=endpoint['service_id'],
-                        region_id=region_id)
-                    return ref['policy_id']
-                except exception.PolicyAssociationNotFound:  # nosec
-                    # There wasn't one for that region & service, handle below.
-                    pass
-
-                # There wasn't one for that region & service, let's
-                # chase up the region tree
-                regions_examined.append(region_id)
-                region = self.catalog_api.get_region(region_id)
-                region_id = None
-                if region.get('parent_region_id') is not None:
-                    region_id = region['parent_region_id']
-                    if region_id in regions_examined:
-                        msg = _LE('Circular reference or a repeated entry '
-                                  'found in region tree - %(region_id)s.')
-                        LOG.error(msg, {'region_id': region_id})
-                        break
+                return self.get_policy_association(**kwargs)['policy_id']
+            except exception.PolicyAssociationNotFound:
+                return None
 
         # First let's see if there is a policy explicitly defined for
         # this endpoint.
-
-        try:
-            ref = self.get_policy_association(endpoint_id=endpoint_id)
-            return _get_policy(ref['policy_id'], endpoint_id)
-        except exception.PolicyAssociationNotFound:  # nosec
-            # There wasn't a policy explicitly defined for this endpoint,
-            # handled below.
-            pass
+        policy_id = _get_policy_id(endpoint_id=endpoint_id)
+        if policy_id is not None:
+            return policy_id
 
         # There wasn't a policy explicitly defined for this endpoint, so
-        # now let's see if there is one for the Region & Service.
-
+        # now let's see if there is one for the Region & Service, in the
+        # region of the endpoint or its parents.
         endpoint = self.catalog_api.get_endpoint(endpoint_id)
-        policy_id = _look_for_policy_for_region_and_service(endpoint)
-        if policy_id is not None:
-            return _get_policy(policy_id, endpoint_id)
+        for region_id in self._get_region_ancestry(endpoint['region_id']):
+            policy_id = _get_policy_id(service_id=endpoint['service_id'],
+                                       region_id=region_id)
+            if policy_id is not None:
+                return policy_id
 
         # Finally, just check if there is one for the service.
+        return _get_policy_id(service_id=endpoint['service_id'])
+
+    def get_policy_for_endpoint(self, endpoint_id):
+        policy_id = self._get_policy_id_for_endpoint(endpoint_id)
+        if policy_id is None:
+            msg = _('No policy is associated with endpoint '
+                    '%(endpoint_id)s.') % {'endpoint_id': endpoint_id}
+            raise exception.NotFound(msg)
+
         try:
-            ref = self.get_policy_association(
-                service_id=endpoint['service_id'])
-            return _get_policy(ref['policy_id'], endpoint_id)
-        except exception.PolicyAssociationNotFound:  # nosec
-            # No policy is associated with endpoint, handled below.
-            pass
-
-        msg = _('No policy is associated with endpoint '
-                '%(endpoint_id)s.') % {'endpoint_id': endpoint_id}
-        raise exception.NotFound(msg)
+            return self.policy_api.get_policy(policy_id)
+        except exception.PolicyNotFound:
+            msg = _LW('Policy %(policy_id)s referenced in association '
+                      'for endpoint %(endpoint_id)s not found.')
+            LOG.warning(msg, {'policy_id': policy_id,
+                              'endpoint_id': endpoint_id})
+            raise
 
 
 @versionutils.deprecated(
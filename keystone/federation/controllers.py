@@ -32,6 +32,7 @@ from keystone.federation import schema
 from keystone.federation import utils
 from keystone.i18n import _
 from keystone.models import token_model
+from keystone import notifications
 
 
 CONF = keystone.conf.CONF
@@ -501,7 +502,9 @@ class ServiceProvider(_ControllerBase):
         service_provider.setdefault('enabled', False)
         service_provider.setdefault('relay_state_prefix',
                                     CONF.saml.relay_state_prefix)
-        sp_ref = self.federation_api.create_sp(sp_id, service_provider)
+        initiator = notifications._get_request_audit_info(request.context_dict)
+        sp_ref = self.federation_api.create_sp(sp_id, service_provider,
+                                               initiator)
         response = ServiceProvider.wrap_member(request.context_dict, sp_ref)
         return wsgi.render_response(
             body=response, status=(http_client.CREATED,
@@ -522,14 +525,17 @@ class ServiceProvider(_ControllerBase):
 
     @controller.protected()
     def delete_service_provider(self, request, sp_id):
-        self.federation_api.delete_sp(sp_id)
+        initiator = notifications._get_request_audit_info(request.context_dict)
+        self.federation_api.delete_sp(sp_id, initiator)
 
     @controller.protected()
     def update_service_provider(self, request, sp_id, service_provider):
         validation.lazy_validate(schema.service_provider_update,
                                  service_provider)
         service_provider = self._normalize_dict(service_provider)
-        sp_ref = self.federation_api.update_sp(sp_id, service_provider)
+        initiator = notifications._get_request_audit_info(request.context_dict)
+        sp_ref = self.federation_api.update_sp(sp_id, service_provider,
+                                               initiator)
         return ServiceProvider.wrap_member(request.context_dict, sp_ref)
 
 
@@ -12,7 +12,12 @@
 
 """Main entry point into the Federation service."""
 
+import datetime
+import uuid
+
+from dogpile.cache import api as dogpile_api
 from oslo_log import versionutils
+from oslo_utils import timeutils
 
 from keystone.common import cache
 from keystone.common import dependency
@@ -22,6 +27,7 @@ import keystone.conf
 from keystone import exception
 from keystone.federation.backends import base
 from keystone.federation import utils
+from keystone import notifications
 
 
 # This is a general cache region for service providers.
@@ -44,6 +50,26 @@ EXTENSION_DATA = {
 extension.register_admin_extension(EXTENSION_DATA['alias'], EXTENSION_DATA)
 extension.register_public_extension(EXTENSION_DATA['alias'], EXTENSION_DATA)
 
+# The version of the service providers, shared by the keystone processes
+# through the cache and changed whenever a service provider is changed.
+SERVICE_PROVIDERS_VERSION_KEY = 'federation_service_providers_version'
+
+
+def _get_service_providers_version():
+    if not cache.CACHE_REGION.is_configured:
+        return None
+    version = cache.CACHE_REGION.get(SERVICE_PROVIDERS_VERSION_KEY)
+    if version is dogpile_api.NO_VALUE:
+        return None
+    return version
+
+
+def _bump_service_providers_version():
+    version = uuid.uuid4().hex
+    if cache.CACHE_REGION.is_configured:
+        cache.CACHE_REGION.set(SERVICE_PROVIDERS_VERSION_KEY, version)
+    return version
+
 
 @dependency.provider('federation_api')
 class Manager(manager.Manager):
@@ -56,6 +82,8 @@ class Manager(manager.Manager):
 
     driver_namespace = 'keystone.federation'
 
+    _SERVICE_PROVIDER = 'OS-FEDERATION:service_provider'
+
     def __init__(self):
         super(Manager, self).__init__(CONF.federation.driver)
 
@@ -67,7 +95,26 @@ class Manager(manager.Manager):
             raise exception.UnsupportedDriverVersion(
                 driver=CONF.federation.driver)
 
-    @MEMOIZE
+        # The enabled service providers are embedded in most tokens, so they
+        # are also kept in process, along with the time until which they are
+        # used without checking the version of the service providers shared
+        # through the cache, and the version they were loaded at.
+        self._enabled_service_providers = None
+        self._register_callback_listeners()
+
+    def _register_callback_listeners(self):
+        for event in (notifications.ACTIONS.created,
+                      notifications.ACTIONS.updated,
+                      notifications.ACTIONS.deleted):
+            notifications.register_event_callback(
+                event, self._SERVICE_PROVIDER,
+                self._service_provider_callback)
+
+    def _service_provider_callback(self, service, resource_type, operation,
+                                   payload):
+        self._enabled_service_providers = None
+        self._get_enabled_service_providers.invalidate(self)
+
     def get_enabled_service_providers(self):
         """List enabled service providers for Service Catalog.
 
@@ -79,10 +126,43 @@ class Manager(manager.Manager):
         - sp_url a URL accessible at the remote service provider where SAML
           assertion is transmitted.
 
+        The list is cached in process. Changes made by this process clear it
+        at once. Other processes change the version of the service providers
+        shared through the cache, which is checked at most once every
+        ``[federation] service_providers_cache_time`` seconds; the list is
+        only loaded again if the version changed, or if there is no shared
+        version.
+
         :returns: list of dictionaries with enabled service providers
         :rtype: list of dicts
 
         """
+        current_time = timeutils.utcnow()
+        cached = self._enabled_service_providers
+        if cached is not None:
+            check_at, cached_version, service_providers = cached
+            if current_time < check_at:
+                return service_providers
+
+        cache_time = CONF.federation.service_providers_cache_time
+        check_at = current_time + datetime.timedelta(seconds=cache_time)
+        version = _get_service_providers_version()
+        if (cached is not None and version is not None and
+                version == cached_version):
+            self._enabled_service_providers = (check_at, version,
+                                               service_providers)
+            return service_providers
+        if version is None:
+            version = _bump_service_providers_version()
+
+        service_providers = self._get_enabled_service_providers()
+        if cache_time:
+            self._enabled_service_providers = (check_at, version,
+                                               service_providers)
+        return service_providers
+
+    @MEMOIZE
+    def _get_enabled_service_providers(self):
         def normalize(sp):
             ref = {
                 'auth_url': sp.auth_url,
@@ -94,18 +174,21 @@ class Manager(manager.Manager):
         service_providers = self.driver.get_enabled_service_providers()
         return [normalize(sp) for sp in service_providers]
 
-    def create_sp(self, sp_id, service_provider):
+    def create_sp(self, sp_id, service_provider, initiator=None):
         sp_ref = self.driver.create_sp(sp_id, service_provider)
-        self.get_enabled_service_providers.invalidate(self)
+        _bump_service_providers_version()
+        notifications.Audit.created(self._SERVICE_PROVIDER, sp_id, initiator)
         return sp_ref
 
-    def delete_sp(self, sp_id):
+    def delete_sp(self, sp_id, initiator=None):
         self.driver.delete_sp(sp_id)
-        self.get_enabled_service_providers.invalidate(self)
+        _bump_service_providers_version()
+        notifications.Audit.deleted(self._SERVICE_PROVIDER, sp_id, initiator)
 
-    def update_sp(self, sp_id, service_provider):
+    def update_sp(self, sp_id, service_provider, initiator=None):
         sp_ref = self.driver.update_sp(sp_id, service_provider)
-        self.get_enabled_service_providers.invalidate(self)
+        _bump_service_providers_version()
+        notifications.Audit.updated(self._SERVICE_PROVIDER, sp_id, initiator)
         return sp_ref
 
     def evaluate(self, idp_id, protocol_id, assertion_data):
@@ -253,6 +253,17 @@ class IdentityDriverV8(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_users_from_ids(self, user_ids):
+        """List users by ID.
+
+        :param list user_ids: User IDs.
+
+        :returns: a list of user_refs for the users that exist. See user schema
+                  in :class:`~.IdentityDriverV8`.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
     @abc.abstractmethod
     def update_user(self, user_id, user):
         """Update an existing user.
@@ -392,6 +403,17 @@ class IdentityDriverV8(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_groups_from_ids(self, group_ids):
+        """List groups by ID.
+
+        :param list group_ids: Group IDs.
+
+        :returns: a list of group_refs for the groups that exist. See group
+                  schema in :class:`~.IdentityDriverV8`.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
     @abc.abstractmethod
     def get_group_by_name(self, group_name, domain_id):
         """Get a group by name.
@@ -890,6 +890,52 @@ class Manager(manager.Manager):
         return self._set_domain_id_and_mapping(
             ref, domain_id, driver, mapping.EntityType.USER)
 
+    def _list_entities_from_ids(self, public_ids, entity_type):
+        # Group the IDs by the driver that holds them, so that each driver
+        # lists its entities at once.
+        entity_ids_by_driver = {}
+        for public_id in set(public_ids):
+            try:
+                domain_id, driver, entity_id = (
+                    self._get_domain_driver_and_entity_id(public_id))
+            except exception.PublicIDNotFound:
+                continue
+            entity_ids_by_driver.setdefault((domain_id, driver), []).append(
+                entity_id)
+
+        refs = []
+        for (domain_id, driver), entity_ids in entity_ids_by_driver.items():
+            if entity_type == mapping.EntityType.USER:
+                list_from_ids, get_ref = (driver.list_users_from_ids,
+                                          driver.get_user)
+            else:
+                list_from_ids, get_ref = (driver.list_groups_from_ids,
+                                          driver.get_group)
+            try:
+                driver_refs = list_from_ids(entity_ids)
+            except exception.NotImplemented:
+                driver_refs = []
+                for entity_id in entity_ids:
+                    try:
+                        driver_refs.append(get_ref(entity_id))
+                    except exception.NotFound:  # nosec
+                        # Entities that don't exist are left out.
+                        pass
+            refs += self._set_domain_id_and_mapping(
+                driver_refs, domain_id, driver, entity_type)
+        return refs
+
+    @domains_configured
+    def list_users_from_ids(self, user_ids):
+        """List the users with the given IDs.
+
+        :param user_ids: a list of user IDs
+        :returns: a list of user refs for the users that exist.
+
+        """
+        return self._list_entities_from_ids(user_ids,
+                                            mapping.EntityType.USER)
+
     def assert_user_enabled(self, user_id, user=None):
         """Assert the user and the user's domain are enabled.
 
@@ -999,6 +1045,7 @@ class Manager(manager.Manager):
 
         # Invalidate user role assignments cache region, as it may be caching
         # role assignments where the actor is the specified user
+        self.assignment_api.invalidate_effective_role_ids(user_ids=[user_id])
         assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
 
     @domains_configured
@@ -1035,6 +1082,17 @@ class Manager(manager.Manager):
         return self._set_domain_id_and_mapping(
             ref, domain_id, driver, mapping.EntityType.GROUP)
 
+    @domains_configured
+    def list_groups_from_ids(self, group_ids):
+        """List the groups with the given IDs.
+
+        :param group_ids: a list of group IDs
+        :returns: a list of group refs for the groups that exist.
+
+        """
+        return self._list_entities_from_ids(group_ids,
+                                            mapping.EntityType.GROUP)
+
     @domains_configured
     @exception_translated('group')
     def get_group_by_name(self, group_name, domain_id):
@@ -1067,7 +1125,7 @@ class Manager(manager.Manager):
     def delete_group(self, group_id, initiator=None):
         domain_id, driver, entity_id = (
             self._get_domain_driver_and_entity_id(group_id))
-        user_ids = (u['id'] for u in self.list_users_in_group(group_id))
+        user_ids = [u['id'] for u in self.list_users_in_group(group_id)]
         driver.delete_group(entity_id)
         self.get_group.invalidate(self, group_id)
         self.id_mapping_api.delete_id_mapping(group_id)
@@ -1080,6 +1138,7 @@ class Manager(manager.Manager):
 
         # Invalidate user role assignments cache region, as it may be caching
         # role assignments expanded from the specified group to its users
+        self.assignment_api.invalidate_effective_role_ids(user_ids=user_ids)
         assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
 
     @domains_configured
@@ -1103,6 +1162,7 @@ class Manager(manager.Manager):
 
         # Invalidate user role assignments cache region, as it may now need to
         # include role assignments from the specified group to its users
+        self.assignment_api.invalidate_effective_role_ids(user_ids=[user_id])
         assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
         notifications.Audit.added_to(self._GROUP, group_id, self._USER,
                                      user_id, initiator)
@@ -1129,6 +1189,7 @@ class Manager(manager.Manager):
 
         # Invalidate user role assignments cache region, as it may be caching
         # role assignments expanded from this group to this user
+        self.assignment_api.invalidate_effective_role_ids(user_ids=[user_id])
         assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
         notifications.Audit.removed_from(self._GROUP, group_id, self._USER,
                                          user_id, initiator)
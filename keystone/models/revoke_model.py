@@ -10,6 +10,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import itertools
+
 from oslo_log import log
 from oslo_serialization import msgpackutils
 from oslo_utils import timeutils
@@ -63,6 +65,21 @@ ALTERNATIVES = {
 
 REVOKE_KEYS = _NAMES + _EVENT_ARGS
 
+# Event attributes used to index revocation events, in order of preference.
+# An event is filed under the first of these attributes it has a value for, so
+# the most selective attributes come first.
+_INDEX_NAMES = ['audit_id',
+                'audit_chain_id',
+                'access_token_id',
+                'trust_id',
+                'consumer_id',
+                'user_id',
+                'project_id',
+                'domain_scope_id',
+                'domain_id',
+                'role_id',
+                'expires_at']
+
 
 def blank_token_data(issued_at):
     token_data = dict()
@@ -153,7 +170,7 @@ def is_revoked(events, token_data):
               match any revocation events, meaning the token is considered
               valid by the revocation API.
     """
-    return any([matches(e, token_data) for e in events])
+    return any(matches(e, token_data) for e in events)
 
 
 def matches(event, token_values):
@@ -311,6 +328,126 @@ def matches(event, token_values):
     return True
 
 
+def _event_attributes(event):
+    return frozenset((name, getattr(event, name)) for name in _EVENT_NAMES
+                     if getattr(event, name) is not None)
+
+
+def find_redundant_events(events):
+    """Find the revocation events that are covered by another event.
+
+    An event is redundant if another event has a subset of its attributes,
+    with the same values, and was issued at the same time or later. Every
+    token matching the redundant event also matches the other event, so
+    removing the redundant event doesn't change which tokens are revoked.
+
+    :param events: a list of RevokeEvent instances
+    :returns: the list of redundant RevokeEvent instances
+
+    """
+    # Keep the latest event for each distinct set of attributes, the others
+    # are covered by it.
+    latest = {}
+    for event in events:
+        attributes = _event_attributes(event)
+        current = latest.get(attributes)
+        if current is None or event.issued_before > current.issued_before:
+            latest[attributes] = event
+
+    redundant = []
+    for event in events:
+        attributes = _event_attributes(event)
+        if latest[attributes] is not event:
+            redundant.append(event)
+            continue
+        # Look for a broader event, one with a subset of the attributes.
+        broader_events = (
+            latest.get(frozenset(subset))
+            for size in range(len(attributes))
+            for subset in itertools.combinations(attributes, size))
+        for broader in broader_events:
+            if (broader is not None and
+                    broader.issued_before >= event.issued_before):
+                redundant.append(event)
+                break
+    return redundant
+
+
+class RevokeEventIndex(object):
+    """An index of revocation events keyed on their attributes.
+
+    Each event is filed under the most selective attribute it has a value for
+    (see ``_INDEX_NAMES``); events without any indexed attribute are kept
+    aside and are checked against every token. Since an event can only match
+    a token if all of its attributes match the token, only the events filed
+    under one of the token's own values need to be checked with ``matches()``,
+    which keeps the cost of a check independent of the total number of events.
+
+    """
+
+    def __init__(self, events=None):
+        self._index = {name: {} for name in _INDEX_NAMES}
+        self._unindexed = []
+        self._count = 0
+        for event in events or []:
+            self.add_event(event)
+
+    def __len__(self):
+        return self._count
+
+    def _bucket_for(self, event):
+        for name in _INDEX_NAMES:
+            value = getattr(event, name)
+            if value is not None:
+                return self._index[name].setdefault(value, [])
+        return self._unindexed
+
+    def add_event(self, event):
+        self._bucket_for(event).append(event)
+        self._count += 1
+
+    def remove_event(self, event):
+        bucket = self._bucket_for(event)
+        bucket.remove(event)
+        self._count -= 1
+
+    def _token_index_values(self, token_values):
+        for name in _INDEX_NAMES:
+            if name == 'role_id':
+                values = token_values.get('roles') or []
+            else:
+                values = [token_values.get(alt)
+                          for alt in ALTERNATIVES.get(name, [name])]
+            # NOTE: the same ID may appear under several alternative names
+            # (e.g. user_id and trustee_id), only look each one up once.
+            for value in set(values):
+                if value is not None:
+                    yield name, value
+
+    def candidates(self, token_values):
+        """Return the events that could possibly match the token.
+
+        :param token_values: dictionary with set of values taken from the
+                             token, as built by ``build_token_values()``
+        :returns: a list of RevokeEvent instances
+
+        """
+        candidates = list(self._unindexed)
+        for name, value in self._token_index_values(token_values):
+            candidates.extend(self._index[name].get(value, []))
+        return candidates
+
+    def is_revoked(self, token_values):
+        """Check if a token matches any of the indexed revocation events.
+
+        :param token_values: dictionary with set of values taken from the
+                             token, as built by ``build_token_values()``
+        :returns: True if the token matches an indexed revocation event
+
+        """
+        return is_revoked(self.candidates(token_values), token_values)
+
+
 def build_token_values_v2(access, default_domain_id):
     token_data = access['token']
 
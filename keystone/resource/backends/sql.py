@@ -126,43 +126,35 @@ class Resource(base.ResourceDriverV9):
 
     def list_projects_in_subtree(self, project_id):
         with sql.session_for_read() as session:
-            children = self._get_children(session, [project_id])
+            query = session.query(Project).join(
+                ProjectTree, Project.id == ProjectTree.descendant_id)
+            query = query.filter(ProjectTree.ancestor_id == project_id)
             subtree = []
-            examined = set([project_id])
-            while children:
-                children_ids = set()
-                for ref in children:
-                    if ref['id'] in examined:
-                        msg = _LE('Circular reference or a repeated '
-                                  'entry found in projects hierarchy - '
-                                  '%(project_id)s.')
-                        LOG.error(msg, {'project_id': ref['id']})
-                        return
-                    children_ids.add(ref['id'])
-
-                examined.update(children_ids)
-                subtree += children
-                children = self._get_children(session, children_ids)
+            for project_ref in query.order_by(ProjectTree.depth):
+                if project_ref.id == project_id:
+                    msg = _LE('Circular reference or a repeated '
+                              'entry found in projects hierarchy - '
+                              '%(project_id)s.')
+                    LOG.error(msg, {'project_id': project_id})
+                    return
+                subtree.append(project_ref.to_dict())
             return subtree
 
     def list_project_parents(self, project_id):
         with sql.session_for_read() as session:
-            project = self._get_project(session, project_id).to_dict()
+            self._get_project(session, project_id)
+            query = session.query(Project).join(
+                ProjectTree, Project.id == ProjectTree.ancestor_id)
+            query = query.filter(ProjectTree.descendant_id == project_id)
             parents = []
-            examined = set()
-            while project.get('parent_id') is not None:
-                if project['id'] in examined:
+            for project_ref in query.order_by(ProjectTree.depth):
+                if project_ref.id == project_id:
                     msg = _LE('Circular reference or a repeated '
                               'entry found in projects hierarchy - '
                               '%(project_id)s.')
-                    LOG.error(msg, {'project_id': project['id']})
+                    LOG.error(msg, {'project_id': project_id})
                     return
-
-                examined.add(project['id'])
-                parent_project = self._get_project(
-                    session, project['parent_id']).to_dict()
-                parents.append(parent_project)
-                project = parent_project
+                parents.append(project_ref.to_dict())
             return parents
 
     def is_leaf_project(self, project_id):
@@ -170,6 +162,58 @@ class Resource(base.ResourceDriverV9):
             project_refs = self._get_children(session, [project_id])
             return not project_refs
 
+    def _add_project_to_tree(self, session, project_id, parent_id):
+        if parent_id is None:
+            return
+        query = session.query(ProjectTree).filter_by(descendant_id=parent_id)
+        parent_ancestors = {ref.ancestor_id: ref.depth for ref in query}
+        ancestors = build_project_ancestors(
+            project_id, {project_id: parent_id}, parent_id, parent_ancestors)
+        for ancestor_id, depth in ancestors.items():
+            session.add(ProjectTree(ancestor_id=ancestor_id,
+                                    descendant_id=project_id, depth=depth))
+
+    def _move_project_in_tree(self, session, project_id, parent_id):
+        # The ancestors of the project and of its whole subtree change, so
+        # they are built again from the parent IDs of the moved projects and
+        # the ancestors of the new parent.
+        query = session.query(ProjectTree.descendant_id)
+        query = query.filter_by(ancestor_id=project_id)
+        moved_ids = set(ref.descendant_id for ref in query)
+        moved_ids.add(project_id)
+
+        query = session.query(Project.id, Project.parent_id)
+        query = query.filter(Project.id.in_(moved_ids))
+        parent_ids = {ref.id: ref.parent_id for ref in query}
+        parent_ids[project_id] = parent_id
+
+        # If the new parent is in the subtree, the hierarchy becomes circular
+        # and is only made of the moved projects.
+        outside_parent_id = None
+        parent_ancestors = {}
+        if parent_id is not None and parent_id not in moved_ids:
+            outside_parent_id = parent_id
+            query = session.query(ProjectTree)
+            query = query.filter_by(descendant_id=parent_id)
+            parent_ancestors = {ref.ancestor_id: ref.depth for ref in query}
+
+        query = session.query(ProjectTree)
+        query = query.filter(ProjectTree.descendant_id.in_(moved_ids))
+        query.delete(synchronize_session=False)
+
+        for moved_id in moved_ids:
+            ancestors = build_project_ancestors(
+                moved_id, parent_ids, outside_parent_id, parent_ancestors)
+            for ancestor_id, depth in ancestors.items():
+                session.add(ProjectTree(ancestor_id=ancestor_id,
+                                        descendant_id=moved_id, depth=depth))
+
+    def _remove_projects_from_tree(self, session, project_ids):
+        for column in (ProjectTree.ancestor_id, ProjectTree.descendant_id):
+            query = session.query(ProjectTree)
+            query = query.filter(column.in_(project_ids))
+            query.delete(synchronize_session=False)
+
     # CRUD
     @sql.handle_conflicts(conflict_type='project')
     def create_project(self, project_id, project):
@@ -177,6 +221,9 @@ class Resource(base.ResourceDriverV9):
         with sql.session_for_write() as session:
             project_ref = Project.from_dict(new_project)
             session.add(project_ref)
+            session.flush()
+            self._add_project_to_tree(session, project_id,
+                                      project_ref.parent_id)
             return project_ref.to_dict()
 
     @sql.handle_conflicts(conflict_type='project')
@@ -191,16 +238,21 @@ class Resource(base.ResourceDriverV9):
             # been decoded, so we need to re-encode it
             old_project_dict = self._encode_domain_id(old_project_dict)
             new_project = Project.from_dict(old_project_dict)
+            parent_changed = project_ref.parent_id != new_project.parent_id
             for attr in Project.attributes:
                 if attr != 'id':
                     setattr(project_ref, attr, getattr(new_project, attr))
             project_ref.extra = new_project.extra
+            if parent_changed:
+                self._move_project_in_tree(session, project_id,
+                                           new_project.parent_id)
             return project_ref.to_dict(include_extra_dict=True)
 
     @sql.handle_conflicts(conflict_type='project')
     def delete_project(self, project_id):
         with sql.session_for_write() as session:
             project_ref = self._get_project(session, project_id)
+            self._remove_projects_from_tree(session, [project_id])
             session.delete(project_ref)
 
     @sql.handle_conflicts(conflict_type='project')
@@ -216,9 +268,52 @@ class Resource(base.ResourceDriverV9):
                         project_id == base.NULL_DOMAIN_ID):
                     LOG.warning(_LW('Project %s does not exist and was not '
                                     'deleted.') % project_id)
+            self._remove_projects_from_tree(session, project_ids)
             query.delete(synchronize_session=False)
 
 
+def build_project_ancestors(project_id, parent_ids, outside_parent_id=None,
+                            outside_ancestors=None):
+    """Build the rows of a project in the project tree.
+
+    The parent IDs are followed up from the project until a project without
+    a parent, or until ``outside_parent_id`` whose own ancestors are already
+    known.
+
+    :param project_id: the ID of the project
+    :param parent_ids: a dict of the parent ID of each project to follow
+    :param outside_parent_id: the ID of the project whose ancestors are given
+                              by outside_ancestors
+    :param outside_ancestors: a dict of the depth of each ancestor of
+                              outside_parent_id
+    :returns: a dict of the depth of each ancestor of the project. If the
+              hierarchy above the project is circular, the project is its own
+              ancestor, with a depth of 0 unless it is part of the circle.
+
+    """
+    ancestors = {}
+    circular = False
+    current_id = parent_ids.get(project_id)
+    depth = 1
+    while current_id is not None:
+        if current_id in ancestors:
+            circular = True
+            break
+        ancestors[current_id] = depth
+        if current_id == outside_parent_id:
+            for ancestor_id, ancestor_depth in outside_ancestors.items():
+                if ancestor_id in ancestors or ancestor_id == project_id:
+                    circular = True
+                else:
+                    ancestors[ancestor_id] = depth + ancestor_depth
+            break
+        current_id = parent_ids.get(current_id)
+        depth += 1
+    if circular:
+        ancestors.setdefault(project_id, 0)
+    return ancestors
+
+
 class Project(sql.ModelBase, sql.DictBase):
     # NOTE(henry-nash): From the manager and above perspective, the domain_id
     # is nullable.  However, to ensure uniqueness in multi-process
@@ -250,3 +345,26 @@ class Project(sql.ModelBase, sql.DictBase):
     # Unique constraint across two columns to create the separation
     # rather than just only 'name' being unique
     __table_args__ = (sql.UniqueConstraint('domain_id', 'name'),)
+
+
+class ProjectTree(sql.ModelBase, sql.ModelDictMixin):
+    """The closure table of the project hierarchy.
+
+    There is a row for each project and each of its ancestors, along with the
+    number of levels between them, so that the parents and the subtree of a
+    project are listed with a single query.
+
+    """
+
+    __tablename__ = 'project_tree'
+    ancestor_id = sql.Column(
+        sql.String(64),
+        sql.ForeignKey('project.id', ondelete='CASCADE'),
+        primary_key=True)
+    descendant_id = sql.Column(
+        sql.String(64),
+        sql.ForeignKey('project.id', ondelete='CASCADE'),
+        primary_key=True)
+    depth = sql.Column(sql.Integer, nullable=False)
+    __table_args__ = (
+        sql.Index('ix_project_tree_descendant_id', 'descendant_id'),)
@@ -402,6 +402,7 @@ class Manager(manager.Manager):
                 # If the project's domain_id has been updated, invalidate user
                 # role assignments cache region, as it may be caching inherited
                 # assignments from the old domain to the specified project
+                self.assignment_api.invalidate_effective_role_ids()
                 assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
         finally:
             # attempt to send audit event even if the cache invalidation raises
@@ -480,6 +481,8 @@ class Manager(manager.Manager):
             # Invalidate user role assignments cache region, as it may
             # be caching role assignments where the target is
             # the specified project
+            self.assignment_api.invalidate_effective_role_ids(
+                target_id=project_id)
             assignment.COMPUTED_ASSIGNMENTS_REGION.invalidate()
             self.credential_api.delete_credentials_for_project(project_id)
         finally:
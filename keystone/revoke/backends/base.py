@@ -49,6 +49,18 @@ class RevokeDriverV8(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def list_events_by_id(self, last_id=None):
+        """return the revocation events recorded after a given event.
+
+        :param last_id: ID of the last event already known, as returned by a
+                        previous call. If None, all the events are returned.
+        :returns: A list of (ID, keystone.revoke.model.RevokeEvent) tuples,
+                  ordered by ID. IDs are integers increasing with each new
+                  event.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
     @abc.abstractmethod
     def revoke(self, event):
         """register a revocation event.
@@ -58,3 +70,33 @@ class RevokeDriverV8(object):
 
         """
         raise exception.NotImplemented()  # pragma: no cover
+
+    def revoke_events(self, events):
+        """register several revocation events at once.
+
+        :param events: A list of instances of
+            keystone.revoke.model.RevocationEvent
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def prune_expired_events(self, batch_size=0):
+        """Remove the events that can no longer revoke an unexpired token.
+
+        :param batch_size: maximum number of events to remove per
+                           transaction, or 0 to remove them all at once.
+        :returns: the number of events removed.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
+
+    def compact_events(self, dry_run=False):
+        """Remove the events that are covered by another event.
+
+        See :func:`keystone.models.revoke_model.find_redundant_events`.
+
+        :param dry_run: only report the redundant events, don't remove them.
+        :returns: the list of redundant events.
+
+        """
+        raise exception.NotImplemented()  # pragma: no cover
@@ -39,6 +39,9 @@ class RevocationEvent(sql.ModelBase, sql.ModelDictMixin):
 
 
 class Revoke(base.RevokeDriverV8):
+    # Maximum number of IDs in the IN clause used to remove redundant events.
+    _COMPACT_BATCH_SIZE = 500
+
     def _flush_batch_size(self, dialect):
         batch_size = 0
         if dialect == 'ibm_db_sa':
@@ -57,28 +60,31 @@ class Revoke(base.RevokeDriverV8):
             # been increased beyond the default.
         return batch_size
 
-    def _prune_expired_events(self):
+    def prune_expired_events(self, batch_size=0):
         oldest = base.revoked_before_cutoff_time()
+        pruned = 0
 
-        with sql.session_for_write() as session:
-            dialect = session.bind.dialect.name
-            batch_size = self._flush_batch_size(dialect)
-            if batch_size > 0:
-                query = session.query(RevocationEvent.id)
-                query = query.filter(RevocationEvent.revoked_at < oldest)
-                query = query.limit(batch_size).subquery()
-                delete_query = (session.query(RevocationEvent).
-                                filter(RevocationEvent.id.in_(query)))
-                while True:
-                    rowcount = delete_query.delete(synchronize_session=False)
-                    if rowcount == 0:
-                        break
-            else:
+        while True:
+            with sql.session_for_write() as session:
+                dialect = session.bind.dialect.name
+                limit = batch_size or self._flush_batch_size(dialect)
                 query = session.query(RevocationEvent)
                 query = query.filter(RevocationEvent.revoked_at < oldest)
-                query.delete(synchronize_session=False)
+                if limit <= 0:
+                    return pruned + query.delete(synchronize_session=False)
 
-            session.flush()
+                # NOTE: Select the IDs first rather than deleting with a
+                # LIMIT subquery, which not every database supports. Each
+                # batch is deleted in its own transaction to keep locks short.
+                ids_query = session.query(RevocationEvent.id)
+                ids_query = ids_query.filter(
+                    RevocationEvent.revoked_at < oldest)
+                ids = [row.id for row in ids_query.limit(limit)]
+                if not ids:
+                    return pruned
+                query = session.query(RevocationEvent)
+                query = query.filter(RevocationEvent.id.in_(ids))
+                pruned += query.delete(synchronize_session=False)
 
     def list_events(self, last_fetch=None):
         with sql.session_for_read() as session:
@@ -92,12 +98,52 @@ class Revoke(base.RevokeDriverV8):
 
             return events
 
-    @oslo_db_api.wrap_db_retry(retry_on_deadlock=True)
-    def revoke(self, event):
+    def list_events_by_id(self, last_id=None):
+        with sql.session_for_read() as session:
+            query = session.query(RevocationEvent).order_by(
+                RevocationEvent.id)
+
+            if last_id is not None:
+                query = query.filter(RevocationEvent.id > last_id)
+
+            return [(e.id, revoke_model.RevokeEvent(**e.to_dict()))
+                    for e in query]
+
+    def compact_events(self, dry_run=False):
+        with sql.session_for_write() as session:
+            ids = {}
+            events = []
+            for record in session.query(RevocationEvent):
+                event = revoke_model.RevokeEvent(**record.to_dict())
+                ids[id(event)] = record.id
+                events.append(event)
+
+            redundant = revoke_model.find_redundant_events(events)
+            if dry_run:
+                return redundant
+
+            redundant_ids = [ids[id(event)] for event in redundant]
+            for i in range(0, len(redundant_ids), self._COMPACT_BATCH_SIZE):
+                batch = redundant_ids[i:i + self._COMPACT_BATCH_SIZE]
+                query = session.query(RevocationEvent)
+                query = query.filter(RevocationEvent.id.in_(batch))
+                query.delete(synchronize_session=False)
+            return redundant
+
+    def _event_record(self, event):
         kwargs = dict()
         for attr in revoke_model.REVOKE_KEYS:
             kwargs[attr] = getattr(event, attr)
-        record = RevocationEvent(**kwargs)
+        return RevocationEvent(**kwargs)
+
+    @oslo_db_api.wrap_db_retry(retry_on_deadlock=True)
+    def revoke(self, event):
+        record = self._event_record(event)
         with sql.session_for_write() as session:
             session.add(record)
-            self._prune_expired_events()
+
+    @oslo_db_api.wrap_db_retry(retry_on_deadlock=True)
+    def revoke_events(self, events):
+        records = [self._event_record(event) for event in events]
+        with sql.session_for_write() as session:
+            session.add_all(records)
@@ -12,8 +12,19 @@
 
 """Main entry point into the Revoke service."""
 
+import contextlib
+import datetime
+import heapq
+import itertools
+import threading
+import time
+import uuid
+
+from dogpile.cache import api as dogpile_api
 import oslo_cache
+from oslo_log import log
 from oslo_log import versionutils
+from oslo_utils import timeutils
 
 from keystone.common import cache
 from keystone.common import dependency
@@ -21,13 +32,14 @@ from keystone.common import extension
 from keystone.common import manager
 import keystone.conf
 from keystone import exception
-from keystone.i18n import _
+from keystone.i18n import _, _LE, _LI
 from keystone.models import revoke_model
 from keystone import notifications
 from keystone.revoke.backends import base
 
 
 CONF = keystone.conf.CONF
+LOG = log.getLogger(__name__)
 
 
 EXTENSION_DATA = {
@@ -56,6 +68,170 @@ MEMOIZE = cache.get_memoization_decorator(
     group='revoke',
     region=REVOKE_REGION)
 
+# Event IDs are allocated when the event is inserted, not when it is
+# committed, so an event may become visible after events with higher IDs. The
+# IDs missing from a fetch are fetched again for up to this long, after which
+# they are assumed to belong to rolled back or removed events.
+SYNC_GAP_TIMEOUT = datetime.timedelta(seconds=60)
+
+# This key of the revoke cache region is changed whenever a revocation event is
+# recorded, so that the keystone processes sharing the cache backend only fetch
+# events from the driver when there are new ones.
+EVENTS_VERSION_KEY = 'revocation_events_version'
+
+
+def _event_key(event):
+    return tuple(sorted(event.__dict__.items()))
+
+
+def _get_events_version():
+    if not REVOKE_REGION.is_configured:
+        return None
+    version = REVOKE_REGION.get(EVENTS_VERSION_KEY)
+    if version is dogpile_api.NO_VALUE:
+        return None
+    return version
+
+
+def _bump_events_version():
+    version = uuid.uuid4().hex
+    if REVOKE_REGION.is_configured:
+        REVOKE_REGION.set(EVENTS_VERSION_KEY, version)
+    return version
+
+
+class RevokeEventStore(object):
+    """A per-process copy of the revocation events.
+
+    The store loads every event from the driver once, then only asks the
+    driver for events recorded after the newest one it has seen. It does so
+    as soon as it is told about a new revocation made by this process.
+    Otherwise it checks the events version shared through the revoke cache
+    region at most once every ``[revoke] sync_interval`` seconds, and fetches
+    new events if the version changed, or if there is no shared version.
+    Events that are too old to revoke any unexpired token are dropped
+    locally, mirroring what the backend prunes.
+
+    """
+
+    # Maximum number of missing IDs remembered after a single event.
+    _MAX_GAP_SIZE = 1000
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._lock = threading.Lock()
+        self._index = None
+        self._events = {}
+        self._by_revoked_at = []
+        self._sequence = itertools.count()
+        self._last_id = None
+        self._gaps = {}
+        self._version = None
+        self._last_check = None
+        self._stale = True
+        self._local = threading.local()
+        # Incremented every time a new event is seen, so that anything derived
+        # from the events can tell when it needs to be checked again.
+        self.epoch = 0
+
+    def _add(self, event):
+        key = _event_key(event)
+        if key in self._events:
+            return
+        self._events[key] = event
+        self._index.add_event(event)
+        self.epoch += 1
+        heapq.heappush(self._by_revoked_at,
+                       (event.revoked_at, next(self._sequence), key))
+
+    def _drop_expired(self):
+        oldest = base.revoked_before_cutoff_time()
+        while self._by_revoked_at and self._by_revoked_at[0][0] < oldest:
+            __, __, key = heapq.heappop(self._by_revoked_at)
+            self._index.remove_event(self._events.pop(key))
+
+    def _needs_check(self, now):
+        if self._stale or self._last_check is None:
+            return True
+        interval = datetime.timedelta(seconds=CONF.revoke.sync_interval)
+        return now - self._last_check >= interval
+
+    def invalidate(self):
+        """Fetch new events from the driver on next use."""
+        self._stale = True
+
+    def _fetch_new_events(self, now):
+        if self._gaps:
+            since_id = min(self._gaps) - 1
+        else:
+            since_id = self._last_id
+        for event_id, event in self.driver.list_events_by_id(since_id):
+            self._gaps.pop(event_id, None)
+            if self._last_id is not None:
+                # Remember the IDs skipped since the previous fetch, their
+                # events may not have been committed yet.
+                first_id = max(self._last_id + 1,
+                               event_id - self._MAX_GAP_SIZE)
+                for missing_id in range(first_id, event_id):
+                    self._gaps[missing_id] = now
+            if self._last_id is None or event_id > self._last_id:
+                self._last_id = event_id
+            self._add(event)
+        for missing_id, missed_at in list(self._gaps.items()):
+            if now - missed_at >= SYNC_GAP_TIMEOUT:
+                del self._gaps[missing_id]
+
+    def sync(self):
+        if self._index is not None and getattr(self._local, 'pinned', False):
+            return
+        now = timeutils.utcnow()
+        if not self._needs_check(now):
+            return
+        with self._lock:
+            if not self._needs_check(now):
+                return
+            version = _get_events_version()
+            if (not self._stale and version is not None and
+                    version == self._version):
+                self._drop_expired()
+                self._last_check = now
+                return
+            if version is None:
+                version = _bump_events_version()
+            if self._index is None:
+                self._index = revoke_model.RevokeEventIndex()
+            try:
+                self._fetch_new_events(now)
+            except exception.NotImplemented:
+                # The driver can't tell which events are new, load them all.
+                for event in self.driver.list_events():
+                    self._add(event)
+            self._drop_expired()
+            self._version = version
+            self._last_check = now
+            self._stale = False
+
+    @contextlib.contextmanager
+    def pinned(self):
+        """Sync once, then don't sync again in this thread within the block.
+
+        This lets a batch of tokens be checked against the same events.
+
+        """
+        self.sync()
+        pinned = getattr(self._local, 'pinned', False)
+        self._local.pinned = True
+        try:
+            yield
+        finally:
+            self._local.pinned = pinned
+
+    @property
+    def index(self):
+        """The current revocation events, as a RevokeEventIndex."""
+        self.sync()
+        return self._index
+
 
 @dependency.provider('revoke_api')
 class Manager(manager.Manager):
@@ -74,6 +250,8 @@ class Manager(manager.Manager):
         super(Manager, self).__init__(CONF.revoke.driver)
         self._register_listeners()
         self.model = revoke_model
+        self.event_store = RevokeEventStore(self.driver)
+        self._pruning_thread = None
 
     @MEMOIZE
     def _list_events(self, last_fetch):
@@ -194,6 +372,48 @@ class Manager(manager.Manager):
         self.revoke(revoke_model.RevokeEvent(domain_id=domain_id,
                                              role_id=role_id))
 
+    def revoke_by_grants(self, grants):
+        """Revoke the tokens relying on several role assignments at once.
+
+        :param grants: a list of dicts with the role_id, and the user_id,
+                       domain_id or project_id of each role assignment. Without
+                       a user_id, the tokens of every user with the role on
+                       the domain or project are revoked.
+        :returns: the list of recorded RevokeEvent instances
+
+        """
+        # NOTE: The events share the same time, so that an event for the
+        # whole domain or project covers the events for single users.
+        revoked_at = timeutils.utcnow()
+        events = [revoke_model.RevokeEvent(user_id=grant.get('user_id'),
+                                           role_id=grant['role_id'],
+                                           domain_id=grant.get('domain_id'),
+                                           project_id=grant.get('project_id'),
+                                           revoked_at=revoked_at)
+                  for grant in grants]
+        return self.revoke_events(events)
+
+    @property
+    def revocation_epoch(self):
+        """A number that increases every time a new revocation is seen.
+
+        Tokens found valid at a given epoch don't need to be checked against
+        the revocation events again until the epoch changes.
+
+        """
+        self.event_store.sync()
+        return self.event_store.epoch
+
+    def pinned_events(self):
+        """Return a context manager checking tokens against the same events.
+
+        New revocation events are fetched when entering the block, and not
+        again by this thread until it exits, so a batch of tokens only
+        synchronizes with the backend once.
+
+        """
+        return self.event_store.pinned()
+
     def check_token(self, token_values):
         """Check the values from a token against the revocation list.
 
@@ -204,12 +424,97 @@ class Manager(manager.Manager):
         :raises keystone.exception.TokenNotFound: If the token is invalid.
 
         """
-        if revoke_model.is_revoked(self.list_events(), token_values):
+        if self.event_store.index.is_revoked(token_values):
             raise exception.TokenNotFound(_('Failed to validate token'))
 
     def revoke(self, event):
         self.driver.revoke(event)
         REVOKE_REGION.invalidate()
+        _bump_events_version()
+        self.event_store.invalidate()
+
+    def revoke_events(self, events):
+        """Record several revocation events at once.
+
+        Events covered by a broader event of the batch are dropped, the others
+        are written together and the revocation caches are invalidated once.
+
+        :param events: a list of RevokeEvent instances
+        :returns: the list of recorded RevokeEvent instances
+
+        """
+        redundant = set(id(event) for event in
+                        revoke_model.find_redundant_events(events))
+        events = [event for event in events if id(event) not in redundant]
+        if not events:
+            return events
+        try:
+            self.driver.revoke_events(events)
+        except exception.NotImplemented:
+            for event in events:
+                self.driver.revoke(event)
+        REVOKE_REGION.invalidate()
+        _bump_events_version()
+        self.event_store.invalidate()
+        return events
+
+    def prune_expired_events(self, batch_size=None):
+        """Remove expired revocation events from the backend.
+
+        :param batch_size: maximum number of events removed per transaction,
+                           defaults to ``[revoke] prune_batch_size``.
+        :returns: the number of events removed.
+
+        """
+        if batch_size is None:
+            batch_size = CONF.revoke.prune_batch_size
+        pruned = self.driver.prune_expired_events(batch_size)
+        if pruned:
+            LOG.info(_LI('Removed %d expired revocation events.'), pruned)
+        return pruned
+
+    def compact_events(self, dry_run=False):
+        """Remove revocation events made redundant by other events.
+
+        :param dry_run: only report the redundant events, don't remove them.
+        :returns: the list of redundant RevokeEvent instances.
+
+        """
+        redundant = self.driver.compact_events(dry_run=dry_run)
+        if redundant and not dry_run:
+            REVOKE_REGION.invalidate()
+            LOG.info(_LI('Removed %d redundant revocation events.'),
+                     len(redundant))
+        return redundant
+
+    def start_periodic_pruning(self):
+        """Clean up events every ``[revoke] prune_interval`` seconds.
+
+        Expired events are removed from a daemon thread, so that recording a
+        revocation event is never slowed down by cleaning up the backend.
+        Redundant events are only removed by ``keystone-manage
+        revoke_compact``, since finding them reads the whole backend.
+
+        """
+        interval = CONF.revoke.prune_interval
+        if not interval or self._pruning_thread is not None:
+            return
+
+        def _prune_periodically():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.prune_expired_events()
+                except exception.NotImplemented:  # nosec
+                    # The driver doesn't support removing expired events.
+                    pass
+                except Exception:
+                    LOG.exception(_LE('Failed to clean up revocation events.'))
+
+        self._pruning_thread = threading.Thread(
+            target=_prune_periodically, name='revocation-event-pruning')
+        self._pruning_thread.daemon = True
+        self._pruning_thread.start()
 
 
 @versionutils.deprecated(
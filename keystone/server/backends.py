@@ -42,6 +42,14 @@ def load_backends():
     cache.apply_invalidation_patch(region=revoke.REVOKE_REGION,
                                    region_name=revoke.REVOKE_REGION.name)
     cache.configure_cache(region=token.provider.TOKENS_REGION)
+    cache.configure_cache(region=token.provider.TOKEN_DATA_REGION)
+    cache.apply_invalidation_patch(
+        region=token.provider.TOKEN_DATA_REGION,
+        region_name=token.provider.TOKEN_DATA_REGION.name)
+    cache.configure_cache(region=endpoint_policy.ENDPOINT_POLICY_REGION)
+    cache.apply_invalidation_patch(
+        region=endpoint_policy.ENDPOINT_POLICY_REGION,
+        region_name=endpoint_policy.ENDPOINT_POLICY_REGION.name)
     cache.configure_cache(region=identity.ID_MAPPING_REGION)
     cache.apply_invalidation_patch(region=identity.ID_MAPPING_REGION,
                                    region_name=identity.ID_MAPPING_REGION.name)
@@ -65,9 +65,13 @@ def initialize_application(name,
         return keystone_service.loadapp(
             'config:%s' % find_paste_config(), name)
 
-    _unused, application = common.setup_backends(
+    drivers, application = common.setup_backends(
         startup_application_fn=loadapp)
 
+    # Expired revocation events are removed in the background rather than
+    # every time a new event is recorded.
+    drivers['revoke_api'].start_periodic_pruning()
+
     # setup OSprofiler notifier and enable the profiling if that is configured
     # in Keystone configuration file.
     profiler.setup(name)
@@ -2245,6 +2245,117 @@ class AssignmentTests(AssignmentTestHelperMixin):
         self.assertEqual(new_role['name'],
                          first_asgmt_dmn['role_name'])
 
+    def test_list_role_assignment_names_listed_at_once(self):
+        domain = self._get_domain_fixture()
+        project = unit.new_project_ref(domain_id=domain['id'])
+        self.resource_api.create_project(project['id'], project)
+        users = []
+        for i in range(3):
+            user = unit.new_user_ref(domain_id=domain['id'])
+            user = self.identity_api.create_user(user)
+            self.assignment_api.create_grant(user_id=user['id'],
+                                             project_id=project['id'],
+                                             role_id=self.role_member['id'])
+            users.append(user)
+        assignments = self.assignment_api.list_role_assignments(
+            project_id=project['id'])
+
+        with mock.patch.object(self.identity_api, 'get_user') as get_user, \
+                mock.patch.object(self.resource_api,
+                                  'get_project') as get_project, \
+                mock.patch.object(self.resource_api,
+                                  'get_domain') as get_domain, \
+                mock.patch.object(self.role_api, 'get_role') as get_role:
+            assignments = (
+                self.assignment_api._get_names_from_role_assignments(
+                    assignments))
+            self.assertFalse(get_user.called)
+            self.assertFalse(get_project.called)
+            self.assertFalse(get_domain.called)
+            self.assertFalse(get_role.called)
+
+        self.assertItemsEqual(
+            [(user['id'], user['name'], domain['name']) for user in users],
+            [(a['user_id'], a['user_name'], a['user_domain_name'])
+             for a in assignments])
+        for assignment in assignments:
+            self.assertEqual(project['name'], assignment['project_name'])
+            self.assertEqual(domain['name'],
+                             assignment['project_domain_name'])
+            self.assertEqual(self.role_member['name'],
+                             assignment['role_name'])
+
+    def _create_bulk_grants(self):
+        domain = self._get_domain_fixture()
+        project = unit.new_project_ref(domain_id=domain['id'])
+        self.resource_api.create_project(project['id'], project)
+        grants = []
+        for i in range(3):
+            user = unit.new_user_ref(domain_id=domain['id'])
+            user = self.identity_api.create_user(user)
+            grants.append({'user_id': user['id'],
+                           'project_id': project['id'],
+                           'role_id': self.role_member['id']})
+        return project, grants
+
+    def test_create_and_delete_grants(self):
+        project, grants = self._create_bulk_grants()
+        # Duplicate grants are only created once.
+        self.assignment_api.create_grants(grants + grants[:1])
+        assignments = self.assignment_api.list_role_assignments(
+            project_id=project['id'])
+        self.assertItemsEqual(
+            [grant['user_id'] for grant in grants],
+            [assignment['user_id'] for assignment in assignments])
+
+        # Either all of the grants are deleted or none of them are.
+        missing_grant = {'user_id': grants[0]['user_id'],
+                         'project_id': project['id'],
+                         'role_id': self.role_other['id']}
+        self.assertRaises(exception.RoleAssignmentNotFound,
+                          self.assignment_api.delete_grants,
+                          grants + [missing_grant])
+        self.assertEqual(3, len(self.assignment_api.list_role_assignments(
+            project_id=project['id'])))
+
+        self.assignment_api.delete_grants(grants)
+        self.assertEqual([], self.assignment_api.list_role_assignments(
+            project_id=project['id']))
+
+    def test_create_grants_checks_all_entities_first(self):
+        project, grants = self._create_bulk_grants()
+        grants.append({'user_id': grants[0]['user_id'],
+                       'project_id': uuid.uuid4().hex,
+                       'role_id': self.role_member['id']})
+        self.assertRaises(exception.ProjectNotFound,
+                          self.assignment_api.create_grants,
+                          grants)
+        self.assertEqual([], self.assignment_api.list_role_assignments(
+            project_id=project['id']))
+
+    def test_create_grants_without_driver_support(self):
+        project, grants = self._create_bulk_grants()
+        with mock.patch.object(self.assignment_api.driver, 'create_grants',
+                               side_effect=exception.NotImplemented()):
+            self.assignment_api.create_grants(grants)
+        self.assertEqual(3, len(self.assignment_api.list_role_assignments(
+            project_id=project['id'])))
+
+    def test_delete_grants_revokes_tokens_first(self):
+        project, grants = self._create_bulk_grants()
+        self.assignment_api.create_grants(grants)
+
+        def delete_grants(grants):
+            self.assertTrue(revoke_by_grants.called)
+
+        with mock.patch.object(self.revoke_api,
+                               'revoke_by_grants') as revoke_by_grants:
+            with mock.patch.object(self.assignment_api.driver,
+                                   'delete_grants',
+                                   side_effect=delete_grants) as driver_delete:
+                self.assignment_api.delete_grants(grants)
+        self.assertTrue(driver_delete.called)
+
     def test_list_role_assignment_does_not_contain_names(self):
         """Test names are not included with list role assignments.
 
@@ -3753,3 +3864,30 @@ class ImpliedRoleTests(AssignmentTestHelperMixin):
             ]
         }
         self.execute_assignment_plan(test_plan)
+
+    def test_role_inference_rules_listed_once(self):
+        test_plan = {
+            'entities': {'domains': {'users': 1, 'projects': 1},
+                         'roles': 4},
+            'implied_roles': [{'role': 0, 'implied_roles': 1},
+                              {'role': 1, 'implied_roles': [2, 3]}],
+            'assignments': [{'user': 0, 'role': 0, 'project': 0}],
+        }
+        test_data = self.execute_assignment_plan(test_plan)
+        user_id = test_data['users'][0]['id']
+        roles = test_data['roles']
+
+        with mock.patch.object(
+                self.role_api, 'list_role_inference_rules',
+                wraps=self.role_api.list_role_inference_rules) as list_rules:
+            for i in range(2):
+                assignments = self.assignment_api.list_role_assignments(
+                    user_id=user_id, effective=True)
+                self.assertThat(assignments, matchers.HasLength(4))
+            self.assertEqual(1, list_rules.call_count)
+
+        # A new rule is taken into account at once.
+        self.role_api.create_implied_role(roles[3]['id'], roles[2]['id'])
+        assignments = self.assignment_api.list_role_assignments(
+            user_id=user_id, effective=True)
+        self.assertThat(assignments, matchers.HasLength(5))
@@ -98,3 +98,57 @@ class FormatUrlTests(unit.BaseTestCase):
                   'user_id': 'B'}
         self.assertIsNone(utils.format_url(url_template, values,
                           silent_keyerror_failures=['project_id']))
+
+
+class URLTemplateTests(unit.BaseTestCase):
+
+    def test_formatting_matches_format_url(self):
+        url = ('http://$(public_bind_host)s:$(admin_port)d/'
+               '$(tenant_id)s/$(user_id)s/$(project_id)s')
+        static = {'public_bind_host': 'server', 'admin_port': 9090}
+        values = {'tenant_id': uuid.uuid4().hex, 'user_id': uuid.uuid4().hex,
+                  'project_id': uuid.uuid4().hex}
+        template = utils.URLTemplate(url, static)
+        self.assertEqual(utils.format_url(url, dict(static, **values)),
+                         template.format(values))
+
+    def test_formatting_does_not_reparse_the_url(self):
+        template = utils.URLTemplate('http://server/$(project_id)s', {})
+        url = uuid.uuid4().hex
+        template.url = url
+        self.assertEqual('http://server/A',
+                         template.format({'project_id': 'A'}))
+
+    def test_missing_allowed_key(self):
+        template = utils.URLTemplate('http://server/$(tenant_id)s', {})
+        self.assertIsNone(template.format(
+            {'user_id': 'B'}, silent_keyerror_failures=['tenant_id']))
+
+    def test_missing_key_raises_malformed(self):
+        template = utils.URLTemplate('http://server/$(tenant_id)s', {})
+        self.assertRaises(exception.MalformedEndpoint,
+                          template.format, {'user_id': 'B'})
+
+    def test_malformed_url_raises_when_formatted(self):
+        template = utils.URLTemplate('http://$(public_bind_host)d', {
+            'public_bind_host': 'something'})
+        self.assertRaises(exception.MalformedEndpoint,
+                          template.format, {'user_id': 'B'})
+
+    def test_key_not_allowed_raises_when_formatted(self):
+        template = utils.URLTemplate('http://server/$(admin_token)s',
+                                     {'admin_token': 'C'})
+        self.assertRaises(exception.MalformedEndpoint,
+                          template.format, {'user_id': 'B'})
+
+
+class URLTemplateConfigTests(unit.TestCase):
+
+    def test_uncompiled_url_uses_current_config(self):
+        # The padded project ID can't be compiled, so the URL is formatted
+        # with the options as they are when it is used.
+        template = utils.URLTemplate('http://server:$(public_port)d/'
+                                     '$(project_id)10s')
+        self.config_fixture.config(group='eventlet_server', public_port=5001)
+        self.assertEqual('http://server:5001/         A',
+                         template.format({'project_id': 'A'}))
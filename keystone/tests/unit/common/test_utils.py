@@ -196,6 +196,29 @@ class UtilsTestCase(unit.BaseTestCase):
             self.assertTrue(common_utils.is_not_url_safe(base_str + i))
 
 
+class LRUCacheTests(unit.BaseTestCase):
+
+    def test_least_recently_used_item_is_evicted(self):
+        cache = common_utils.LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.set('c', 3)
+        self.assertEqual(2, len(cache))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+
+    def test_pop_and_clear(self):
+        cache = common_utils.LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.pop('a'))
+        self.assertIsNone(cache.pop('a'))
+        cache.clear()
+        self.assertEqual(0, len(cache))
+
+
 class ServiceHelperTests(unit.BaseTestCase):
 
     @service.fail_gracefully
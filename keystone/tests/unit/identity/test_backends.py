@@ -121,6 +121,24 @@ class IdentityTests(object):
         self.user_foo.pop('password')
         self.assertDictEqual(self.user_foo, user_ref)
 
+    def test_list_users_from_ids(self):
+        user_refs = self.identity_api.list_users_from_ids(
+            [self.user_foo['id'], self.user_two['id'], uuid.uuid4().hex])
+        self.assertItemsEqual([self.user_foo['id'], self.user_two['id']],
+                              [ref['id'] for ref in user_refs])
+        for ref in user_refs:
+            self.assertNotIn('password', ref)
+
+    def test_list_groups_from_ids(self):
+        group_refs = []
+        for i in range(2):
+            group = unit.new_group_ref(
+                domain_id=CONF.identity.default_domain_id)
+            group_refs.append(self.identity_api.create_group(group))
+        refs = self.identity_api.list_groups_from_ids(
+            [ref['id'] for ref in group_refs] + [uuid.uuid4().hex])
+        self.assertItemsEqual(group_refs, refs)
+
     def test_get_user_returns_required_attributes(self):
         user_ref = self.identity_api.get_user(self.user_foo['id'])
         self.assertIn('id', user_ref)
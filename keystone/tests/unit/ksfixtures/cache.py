@@ -15,11 +15,14 @@ import fixtures
 
 from keystone import catalog
 from keystone.common import cache
+from keystone import endpoint_policy
 from keystone import revoke
+from keystone.token import provider as token_provider
 
 
 CACHE_REGIONS = (cache.CACHE_REGION, catalog.COMPUTED_CATALOG_REGION,
-                 revoke.REVOKE_REGION)
+                 revoke.REVOKE_REGION, token_provider.TOKEN_DATA_REGION,
+                 endpoint_policy.ENDPOINT_POLICY_REGION)
 
 
 class Cache(fixtures.Fixture):
@@ -1219,6 +1219,11 @@ class EndpointGroupCRUDTestCase(EndpointFilterTestCase):
         # create a project and endpoint association.
         self.put(self.default_request_url)
 
+        # create an endpoint group, this should also be done before the
+        # catalog is cached since creating it invalidates the cache.
+        endpoint_group_id = self._create_valid_endpoint_group(
+            self.DEFAULT_ENDPOINT_GROUP_URL, self.DEFAULT_ENDPOINT_GROUP_BODY)
+
         # there is only one endpoint associated with the default project.
         user_id = uuid.uuid4().hex
         catalog = self.catalog_api.get_v3_catalog(
@@ -1227,10 +1232,6 @@ class EndpointGroupCRUDTestCase(EndpointFilterTestCase):
 
         self.assertThat(catalog[0]['endpoints'], matchers.HasLength(1))
 
-        # create an endpoint group.
-        endpoint_group_id = self._create_valid_endpoint_group(
-            self.DEFAULT_ENDPOINT_GROUP_URL, self.DEFAULT_ENDPOINT_GROUP_BODY)
-
         # add the endpoint group to default project, bypassing
         # catalog_api API manager.
         self.catalog_api.driver.add_endpoint_group_to_project(
@@ -1348,6 +1349,71 @@ class EndpointGroupCRUDTestCase(EndpointFilterTestCase):
         self.assertThat(catalog[0]['endpoints'], matchers.HasLength(1))
         self.assertEqual(self.endpoint_id, catalog[0]['endpoints'][0]['id'])
 
+    @unit.skip_if_cache_disabled('catalog')
+    def test_update_endpoint_group_invalidates_catalog_cache(self):
+        endpoint_id2 = uuid.uuid4().hex
+        endpoint2 = unit.new_endpoint_ref(service_id=self.service_id,
+                                          region_id=self.region_id,
+                                          interface='admin',
+                                          id=endpoint_id2)
+        self.catalog_api.create_endpoint(endpoint_id2, endpoint2)
+
+        # create an endpoint group matching no endpoint.
+        body = copy.deepcopy(self.DEFAULT_ENDPOINT_GROUP_BODY)
+        body['endpoint_group']['filters'] = {'interface': 'internal'}
+        endpoint_group_id = self._create_valid_endpoint_group(
+            self.DEFAULT_ENDPOINT_GROUP_URL, body)
+        self.catalog_api.add_endpoint_group_to_project(
+            endpoint_group_id,
+            self.default_domain_project_id)
+
+        endpoints = self.catalog_api.list_endpoints_for_project(
+            self.default_domain_project_id)
+        self.assertEqual({}, endpoints)
+
+        # make the endpoint group match the admin endpoint.
+        url = '/OS-EP-FILTER/endpoint_groups/%(endpoint_group_id)s' % {
+            'endpoint_group_id': endpoint_group_id}
+        self.patch(url, body=self.DEFAULT_ENDPOINT_GROUP_BODY)
+
+        endpoints = self.catalog_api.list_endpoints_for_project(
+            self.default_domain_project_id)
+        self.assertEqual([endpoint_id2], list(endpoints))
+        catalog = self.catalog_api.get_v3_catalog(
+            uuid.uuid4().hex, self.default_domain_project_id)
+        self.assertEqual([endpoint_id2],
+                         [ep['id'] for ep in catalog[0]['endpoints']])
+
+    def test_list_endpoints_for_project_with_endpoint_groups(self):
+        endpoint_id2 = uuid.uuid4().hex
+        endpoint2 = unit.new_endpoint_ref(service_id=self.service_id,
+                                          region_id=self.region_id,
+                                          interface='admin',
+                                          id=endpoint_id2)
+        self.catalog_api.create_endpoint(endpoint_id2, endpoint2)
+
+        # create a project and endpoint association.
+        self.put(self.default_request_url)
+
+        # associate two overlapping endpoint groups with the project.
+        for filters in ({'interface': 'admin'},
+                        {'service_id': self.service_id}):
+            body = copy.deepcopy(self.DEFAULT_ENDPOINT_GROUP_BODY)
+            body['endpoint_group']['filters'] = filters
+            endpoint_group_id = self._create_valid_endpoint_group(
+                self.DEFAULT_ENDPOINT_GROUP_URL, body)
+            self.catalog_api.add_endpoint_group_to_project(
+                endpoint_group_id,
+                self.default_domain_project_id)
+
+        with mock.patch.object(self.catalog_api.driver, 'get_endpoint') as (
+                get_endpoint):
+            endpoints = self.catalog_api.list_endpoints_for_project(
+                self.default_domain_project_id)
+            self.assertFalse(get_endpoint.called)
+        self.assertItemsEqual([self.endpoint_id, endpoint_id2],
+                              list(endpoints))
+
     def _create_valid_endpoint_group(self, url, body):
         r = self.post(url, body=body)
         return r.result['endpoint_group']['id']
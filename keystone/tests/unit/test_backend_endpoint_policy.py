@@ -14,6 +14,7 @@
 
 import uuid
 
+import mock
 from six.moves import range
 from testtools import matchers
 
@@ -247,3 +248,37 @@ class PolicyAssociationTests(object):
                           self.endpoint_policy_api.check_policy_association,
                           self.policy[0]['id'],
                           service_id=self.service[0]['id'])
+
+    def test_policy_follows_region_tree_changes(self):
+        self.endpoint_policy_api.create_policy_association(
+            self.policy[0]['id'], service_id=self.service[0]['id'],
+            region_id=self.region[0]['id'])
+        self._assert_correct_policy(self.endpoint[5], self.policy[0])
+        self._assert_correct_endpoints(
+            self.policy[0], [self.endpoint[0], self.endpoint[5]])
+
+        # Detach region 1, and region 2 below it, from region 0.
+        self.catalog_api.update_region(self.region[1]['id'],
+                                       {'parent_region_id': None})
+
+        self.assertRaises(exception.NotFound,
+                          self.endpoint_policy_api.get_policy_for_endpoint,
+                          self.endpoint[5]['id'])
+        self._assert_correct_endpoints(self.policy[0], [self.endpoint[0]])
+
+    @unit.skip_if_cache_disabled('catalog')
+    def test_policy_for_endpoint_is_cached(self):
+        self.endpoint_policy_api.create_policy_association(
+            self.policy[0]['id'], service_id=self.service[0]['id'],
+            region_id=self.region[0]['id'])
+        self._assert_correct_policy(self.endpoint[5], self.policy[0])
+
+        with mock.patch.object(self.endpoint_policy_api.driver,
+                               'get_policy_association') as get_association:
+            self._assert_correct_policy(self.endpoint[5], self.policy[0])
+            self.assertFalse(get_association.called)
+
+        # Changing the associations invalidates the cache.
+        self.endpoint_policy_api.create_policy_association(
+            self.policy[1]['id'], endpoint_id=self.endpoint[5]['id'])
+        self._assert_correct_policy(self.endpoint[5], self.policy[1])
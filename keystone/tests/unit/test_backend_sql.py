@@ -188,6 +188,19 @@ class SqlModels(SqlTests):
                 ('is_domain', sql.Boolean, False))
         self.assertExpectedSchema('project', cols)
 
+    def test_effective_role_model(self):
+        cols = (('user_id', sql.String, 64),
+                ('target_id', sql.String, 64),
+                ('role_ids', sql.JsonBlob, None),
+                ('claim_id', sql.String, 64))
+        self.assertExpectedSchema('effective_role', cols)
+
+    def test_project_tree_model(self):
+        cols = (('ancestor_id', sql.String, 64),
+                ('descendant_id', sql.String, 64),
+                ('depth', sql.Integer, None))
+        self.assertExpectedSchema('project_tree', cols)
+
     def test_role_assignment_model(self):
         cols = (('type', sql.Enum, None),
                 ('actor_id', sql.String, 64),
@@ -626,6 +639,213 @@ class SqlIdentity(SqlTests,
         self.assertNotEqual(len(first_call_users), len(second_call_users))
         self.assertEqual(first_call_counter, counter.calls)
 
+    def _create_user_with_group_roles(self, group_count):
+        user = unit.new_user_ref(domain_id=CONF.identity.default_domain_id)
+        user = self.identity_api.create_user(user)
+        role_ids = []
+        for i in range(group_count):
+            group = unit.new_group_ref(
+                domain_id=CONF.identity.default_domain_id)
+            group = self.identity_api.create_group(group)
+            self.identity_api.add_user_to_group(user['id'], group['id'])
+            role = unit.new_role_ref()
+            self.role_api.create_role(role['id'], role)
+            self.assignment_api.create_grant(
+                role['id'], group_id=group['id'],
+                project_id=self.tenant_bar['id'])
+            role_ids.append(role['id'])
+        return user, role_ids
+
+    def test_list_role_assignments_for_groups_in_chunks(self):
+        user, role_ids = self._create_user_with_group_roles(5)
+
+        with mock.patch.object(self.assignment_api.driver,
+                               '_ACTOR_IDS_PER_QUERY', 2):
+            assignments = self.assignment_api.list_role_assignments(
+                user_id=user['id'], effective=True)
+
+        self.assertItemsEqual(role_ids,
+                              [a['role_id'] for a in assignments])
+
+    def test_group_ids_for_user_cached(self):
+        user, role_ids = self._create_user_with_group_roles(2)
+
+        with mock.patch.object(
+                self.identity_api, 'list_groups_for_user',
+                wraps=self.identity_api.list_groups_for_user) as list_groups:
+            for i in range(2):
+                self.assignment_api.list_role_assignments(
+                    user_id=user['id'], effective=True)
+            self.assertEqual(1, list_groups.call_count)
+
+        # Membership changes are seen at once.
+        group = self.identity_api.list_groups_for_user(user['id'])[0]
+        self.identity_api.remove_user_from_group(user['id'], group['id'])
+        assignments = self.assignment_api.list_role_assignments(
+            user_id=user['id'], effective=True)
+        self.assertEqual(1, len(assignments))
+
+    def test_effective_roles_materialized(self):
+        self.config_fixture.config(group='assignment',
+                                   materialize_effective_roles=True)
+        user, role_ids = self._create_user_with_group_roles(2)
+        project_id = self.tenant_bar['id']
+        driver = self.assignment_api.driver
+
+        self.assertItemsEqual(
+            role_ids, self.assignment_api.get_roles_for_user_and_project(
+                user['id'], project_id))
+        self.assertItemsEqual(
+            role_ids, driver.get_effective_role_ids(user['id'], project_id))
+        with mock.patch.object(self.assignment_api,
+                               'list_role_assignments') as list_assignments:
+            self.assertItemsEqual(
+                role_ids, self.assignment_api._get_effective_role_ids(
+                    user['id'], project_id=project_id))
+            self.assertFalse(list_assignments.called)
+        self.assertEqual([], self.assignment_api.verify_effective_role_ids())
+
+        # A grant to one of the groups of the user invalidates its roles.
+        group = self.identity_api.list_groups_for_user(user['id'])[0]
+        self.assignment_api.create_grant(
+            self.role_member['id'], group_id=group['id'],
+            project_id=project_id)
+        self.assertIsNone(driver.get_effective_role_ids(user['id'],
+                                                        project_id))
+        self.assertIn(self.role_member['id'],
+                      self.assignment_api.get_roles_for_user_and_project(
+                          user['id'], project_id))
+
+        # So does the removal of the user from the group.
+        self.identity_api.remove_user_from_group(user['id'], group['id'])
+        self.assertIsNone(driver.get_effective_role_ids(user['id'],
+                                                        project_id))
+
+    def test_effective_roles_rebuild_and_verify(self):
+        user, role_ids = self._create_user_with_group_roles(2)
+        project_id = self.tenant_bar['id']
+        driver = self.assignment_api.driver
+
+        self.assertGreater(self.assignment_api.rebuild_effective_role_ids(),
+                           0)
+        self.assertItemsEqual(
+            role_ids, driver.get_effective_role_ids(user['id'], project_id))
+        self.assertEqual([], self.assignment_api.verify_effective_role_ids())
+
+        driver.replace_effective_role_ids([{'user_id': user['id'],
+                                            'target_id': project_id,
+                                            'role_ids': role_ids[:1]}])
+        mismatches = self.assignment_api.verify_effective_role_ids()
+        self.assertEqual([{'user_id': user['id'],
+                           'target_id': project_id,
+                           'role_ids': role_ids[:1],
+                           'expected_role_ids': sorted(role_ids)}],
+                         mismatches)
+
+    def test_effective_roles_claim_withdrawn(self):
+        self.config_fixture.config(group='assignment',
+                                   materialize_effective_roles=True)
+        user_id = uuid.uuid4().hex
+        project_id = self.tenant_bar['id']
+        driver = self.assignment_api.driver
+        role_ids = [self.role_member['id']]
+
+        claim_id = driver.claim_effective_role_ids(user_id, project_id)
+        self.assertIsNotNone(claim_id)
+        self.assignment_api.invalidate_effective_role_ids(user_ids=[user_id])
+        driver.set_effective_role_ids(user_id, project_id, claim_id, role_ids)
+        self.assertIsNone(driver.get_effective_role_ids(user_id, project_id))
+
+        claim_id = driver.claim_effective_role_ids(user_id, project_id)
+        driver.set_effective_role_ids(user_id, project_id, claim_id, role_ids)
+        self.assertEqual(role_ids,
+                         driver.get_effective_role_ids(user_id, project_id))
+        self.assertIsNone(driver.claim_effective_role_ids(user_id,
+                                                          project_id))
+
+    def test_effective_roles_not_materialized_without_sql_identity(self):
+        self.config_fixture.config(group='assignment',
+                                   materialize_effective_roles=True)
+        user, role_ids = self._create_user_with_group_roles(1)
+        project_id = self.tenant_bar['id']
+
+        with mock.patch.object(type(self.identity_api.driver), 'is_sql',
+                               new=False):
+            self.assertItemsEqual(
+                role_ids, self.assignment_api.get_roles_for_user_and_project(
+                    user['id'], project_id))
+        self.assertIsNone(self.assignment_api.driver.get_effective_role_ids(
+            user['id'], project_id))
+
+    def _create_project_chain(self, length, parent_id=None):
+        projects = []
+        if parent_id is None:
+            parent_id = CONF.identity.default_domain_id
+        for i in range(length):
+            project = unit.new_project_ref(
+                domain_id=CONF.identity.default_domain_id,
+                parent_id=parent_id)
+            project = self.resource_api.create_project(project['id'], project)
+            projects.append(project)
+            parent_id = project['id']
+        return projects
+
+    def test_project_hierarchy_query_count(self):
+        # Listing the parents or the subtree of a project takes the same
+        # number of queries whatever the depth of the hierarchy.
+        class CallCounter(object):
+            def __init__(self):
+                self.calls = 0
+
+            def query_counter(self, query):
+                self.calls += 1
+
+        calls = []
+        # NOTE: The longest chain, with the domain acting as its root, stays
+        # within the default [DEFAULT] max_project_tree_depth.
+        for length in (2, 4):
+            projects = self._create_project_chain(length)
+            counter = CallCounter()
+            sqlalchemy.event.listen(sqlalchemy.orm.query.Query,
+                                    'before_compile', counter.query_counter)
+            try:
+                parents = self.resource_api.driver.list_project_parents(
+                    projects[-1]['id'])
+                subtree = self.resource_api.driver.list_projects_in_subtree(
+                    projects[0]['id'])
+            finally:
+                sqlalchemy.event.remove(sqlalchemy.orm.query.Query,
+                                        'before_compile',
+                                        counter.query_counter)
+            # The parents include the domain acting as the root project.
+            self.assertEqual(length, len(parents))
+            self.assertEqual(length - 1, len(subtree))
+            calls.append(counter.calls)
+        self.assertEqual(calls[0], calls[1])
+
+    def test_project_tree_follows_moves_and_deletes(self):
+        projects = self._create_project_chain(3)
+        other = self._create_project_chain(1)[0]
+        driver = self.resource_api.driver
+
+        # Move the middle project and its child under the other project.
+        projects[1]['parent_id'] = other['id']
+        driver.update_project(projects[1]['id'], projects[1])
+
+        parent_ids = [p['id'] for p in
+                      driver.list_project_parents(projects[2]['id'])]
+        self.assertEqual([projects[1]['id'], other['id'],
+                          CONF.identity.default_domain_id], parent_ids)
+        self.assertEqual([], driver.list_projects_in_subtree(
+            projects[0]['id']))
+        subtree_ids = [p['id'] for p in
+                       driver.list_projects_in_subtree(other['id'])]
+        self.assertEqual([projects[1]['id'], projects[2]['id']], subtree_ids)
+
+        driver.delete_project(projects[2]['id'])
+        self.assertEqual([projects[1]['id']], [
+            p['id'] for p in driver.list_projects_in_subtree(other['id'])])
+
 
 class SqlTrust(SqlTests, trust_tests.TrustTests):
     pass
@@ -768,6 +988,96 @@ class SqlCatalog(SqlTests, catalog_tests.CatalogTests):
         self.assertIsNone(catalog_endpoint.get('adminURL'))
         self.assertIsNone(catalog_endpoint.get('internalURL'))
 
+    def _count_queries(self, f, *args):
+        statements = []
+
+        def _record_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with sql.session_for_read() as session:
+            engine = session.get_bind()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                _record_statement)
+        try:
+            f(*args)
+        finally:
+            sqlalchemy.event.remove(engine, 'before_cursor_execute',
+                                    _record_statement)
+        return len(statements)
+
+    def _create_region_chain(self, depth):
+        regions = []
+        parent_region_id = None
+        for i in range(depth):
+            region = unit.new_region_ref(parent_region_id=parent_region_id)
+            self.catalog_api.driver.create_region(region)
+            regions.append(region)
+            parent_region_id = region['id']
+        return regions
+
+    def test_benchmark_deep_region_tree(self):
+        # The number of queries needed to walk the region tree doesn't
+        # depend on its depth.
+        queries = []
+        for depth in (10, 200):
+            regions = self._create_region_chain(depth)
+            self.assertRaises(exception.CircularRegionHierarchyError,
+                              self.catalog_api.driver.update_region,
+                              regions[0]['id'],
+                              {'parent_region_id': regions[-1]['id']})
+            queries.append(self._count_queries(
+                self.catalog_api.driver.delete_region, regions[0]['id']))
+            for region in regions:
+                self.assertRaises(exception.RegionNotFound,
+                                  self.catalog_api.driver.get_region,
+                                  region['id'])
+        self.assertEqual(queries[0], queries[1])
+
+    def test_delete_region_with_endpoint_deep_in_tree(self):
+        regions = self._create_region_chain(20)
+        service = unit.new_service_ref()
+        self.catalog_api.create_service(service['id'], service)
+        endpoint = unit.new_endpoint_ref(service_id=service['id'],
+                                         region_id=regions[-1]['id'])
+        self.catalog_api.create_endpoint(endpoint['id'], endpoint)
+
+        self.assertRaises(exception.RegionDeletionError,
+                          self.catalog_api.delete_region,
+                          regions[0]['id'])
+        self.catalog_api.get_region(regions[-1]['id'])
+
+    def test_v3_catalog_skeleton_is_shared(self):
+        service = unit.new_service_ref()
+        self.catalog_api.create_service(service['id'], service)
+        endpoint = unit.new_endpoint_ref(
+            service_id=service['id'], region_id=None,
+            url='http://localhost/$(project_id)s/$(user_id)s')
+        self.catalog_api.create_endpoint(endpoint['id'], endpoint.copy())
+
+        self.catalog_api.get_v3_catalog(uuid.uuid4().hex, uuid.uuid4().hex)
+        user_id = uuid.uuid4().hex
+        project_id = uuid.uuid4().hex
+        with mock.patch.object(self.catalog_api.driver,
+                               'get_v3_catalog_skeleton') as get_skeleton:
+            catalog = self.catalog_api.get_v3_catalog(user_id, project_id)
+            self.assertFalse(get_skeleton.called)
+        self.assertEqual(
+            'http://localhost/%s/%s' % (project_id, user_id),
+            catalog[0]['endpoints'][0]['url'])
+
+    def test_v3_catalog_skeleton_is_invalidated(self):
+        service = unit.new_service_ref()
+        self.catalog_api.create_service(service['id'], service)
+        self.catalog_api.get_v3_catalog(uuid.uuid4().hex, uuid.uuid4().hex)
+
+        endpoint = unit.new_endpoint_ref(service_id=service['id'],
+                                         region_id=None)
+        self.catalog_api.create_endpoint(endpoint['id'], endpoint.copy())
+        catalog = self.catalog_api.get_v3_catalog(uuid.uuid4().hex,
+                                                  uuid.uuid4().hex)
+        self.assertEqual([endpoint['id']],
+                         [e['id'] for e in catalog[0]['endpoints']])
+
     def test_create_endpoint_region_returns_not_found(self):
         service = unit.new_service_ref()
         self.catalog_api.create_service(service['id'], service)
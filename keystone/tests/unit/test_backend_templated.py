@@ -12,12 +12,16 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+import os
 import uuid
 
+import fixtures
 import mock
 from six.moves import zip
 
 from keystone import catalog
+from keystone.catalog.backends import templated
 from keystone.tests import unit
 from keystone.tests.unit.catalog import test_backends as catalog_tests
 from keystone.tests.unit import default_fixtures
@@ -74,8 +78,10 @@ class TestTemplatedCatalog(unit.TestCase, catalog_tests.CatalogTests):
         catalog_ref = self.catalog_api.get_catalog('foo', 'bar')
         self.assertEqual(2, len(catalog_ref['RegionOne']))
 
-        region = self.catalog_api.driver.templates['RegionOne']
+        templates = copy.deepcopy(self.catalog_api.driver.templates)
+        region = templates['RegionOne']
         region['compute']['adminURL'] = 'http://localhost:8774/v1.1/$(tenant)s'
+        self.catalog_api.driver.templates = templates
 
         # the malformed one has been removed
         catalog_ref = self.catalog_api.get_catalog('foo', 'bar')
@@ -280,3 +286,72 @@ class TestTemplatedCatalog(unit.TestCase, catalog_tests.CatalogTests):
         # driver, but it should be silent about it and not raise an error.
         self.catalog_api.delete_association_by_project(
             uuid.uuid4().hex)
+
+
+class TestTemplatedCatalogReload(unit.TestCase):
+
+    TEMPLATE = (
+        'catalog.RegionOne.compute.publicURL = '
+        'http://localhost:8774/v1.1/$(tenant_id)s\n'
+        'catalog.RegionOne.compute.name = Compute Service\n')
+
+    def setUp(self):
+        super(TestTemplatedCatalogReload, self).setUp()
+        self.template_file = os.path.join(self.useFixture(
+            fixtures.TempDir()).path, 'catalog.templates')
+        self._write_templates(self.TEMPLATE, mtime=1000)
+        self.config_fixture.config(group='catalog',
+                                   template_file=self.template_file)
+        self.driver = templated.Catalog()
+
+    def _write_templates(self, templates, mtime):
+        with open(self.template_file, 'w') as f:
+            f.write(templates)
+        os.utime(self.template_file, (mtime, mtime))
+
+    def test_modified_template_file_is_reloaded(self):
+        catalog_ref = self.driver.get_catalog('user', 'project')
+        self.assertEqual(['compute'], list(catalog_ref['RegionOne']))
+
+        self._write_templates(
+            self.TEMPLATE +
+            'catalog.RegionTwo.identity.publicURL = '
+            'http://localhost:5000/v2.0\n',
+            mtime=2000)
+
+        catalog_ref = self.driver.get_catalog('user', 'project')
+        self.assertEqual({'publicURL': 'http://localhost:5000/v2.0'},
+                         catalog_ref['RegionTwo']['identity'])
+        self.assertIsNotNone(self.driver.get_endpoint(
+            'RegionTwo-identity-public'))
+
+    def test_invalid_template_file_keeps_previous_catalog(self):
+        self._write_templates('catalog.RegionOne.compute.publicURL = a = b\n',
+                              mtime=2000)
+
+        catalog_ref = self.driver.get_catalog('user', 'project')
+        self.assertEqual(
+            'http://localhost:8774/v1.1/project',
+            catalog_ref['RegionOne']['compute']['publicURL'])
+
+    def test_template_file_is_reloaded_after_failed_parse(self):
+        self._write_templates('catalog.RegionOne.compute.publicURL = a = b\n',
+                              mtime=2000)
+        self.driver.get_catalog('user', 'project')
+
+        # The file is fixed without changing its modification time.
+        self._write_templates(
+            'catalog.RegionOne.compute.publicURL = http://localhost:8774\n',
+            mtime=2000)
+
+        catalog_ref = self.driver.get_catalog('user', 'project')
+        self.assertEqual('http://localhost:8774',
+                         catalog_ref['RegionOne']['compute']['publicURL'])
+
+    def test_reload_invalidates_computed_catalogs(self):
+        self._write_templates(self.TEMPLATE, mtime=2000)
+        with mock.patch.object(catalog.COMPUTED_CATALOG_REGION,
+                               'invalidate') as invalidate:
+            self.driver.list_regions(None)
+            invalidate.assert_called_once_with()
+
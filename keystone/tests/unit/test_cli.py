@@ -23,10 +23,12 @@ from oslotest import mockpatch
 from six.moves import range
 from testtools import matchers
 
+from keystone.assignment.backends import sql as assignment_sql
 from keystone.cmd import cli
 from keystone.common import dependency
 import keystone.conf
 from keystone.i18n import _
+from keystone.revoke.backends import sql as revoke_sql
 from keystone.tests import unit
 from keystone.tests.unit.ksfixtures import database
 
@@ -58,6 +60,99 @@ class CliTestCase(unit.SQLDriverOverrides, unit.TestCase):
         self.assertIn("token_flush command had no effect", log_info.output)
 
 
+class CliRevokePruneTestCase(unit.SQLDriverOverrides, unit.TestCase):
+
+    def setUp(self):
+        self.useFixture(database.Database())
+        super(CliRevokePruneTestCase, self).setUp()
+
+    def config_files(self):
+        self.config_fixture.register_cli_opt(cli.command_opt)
+        config_files = super(CliRevokePruneTestCase, self).config_files()
+        config_files.append(unit.dirs.tests_conf('backend_sql.conf'))
+        return config_files
+
+    def config(self, config_files):
+        CONF(args=['revoke_prune', '--batch-size', '10'], project='keystone',
+             default_config_files=config_files)
+
+    def test_revoke_prune(self):
+        prune = self.useFixture(mockpatch.PatchObject(
+            revoke_sql.Revoke, 'prune_expired_events', return_value=0))
+        cli.RevokePrune.main()
+        prune.mock.assert_called_once_with(10)
+
+
+class CliRevokeCompactTestCase(unit.SQLDriverOverrides, unit.TestCase):
+
+    def setUp(self):
+        self.useFixture(database.Database())
+        super(CliRevokeCompactTestCase, self).setUp()
+
+    def config_files(self):
+        self.config_fixture.register_cli_opt(cli.command_opt)
+        config_files = super(CliRevokeCompactTestCase, self).config_files()
+        config_files.append(unit.dirs.tests_conf('backend_sql.conf'))
+        return config_files
+
+    def config(self, config_files):
+        CONF(args=['revoke_compact', '--dry-run'], project='keystone',
+             default_config_files=config_files)
+
+    def test_revoke_compact_dry_run(self):
+        compact = self.useFixture(mockpatch.PatchObject(
+            revoke_sql.Revoke, 'compact_events', return_value=[]))
+        cli.RevokeCompact.main()
+        compact.mock.assert_called_once_with(dry_run=True)
+
+
+class CliEffectiveRolesRebuildTestCase(unit.SQLDriverOverrides,
+                                       unit.TestCase):
+
+    args = ['effective_roles_rebuild']
+
+    def setUp(self):
+        self.useFixture(database.Database())
+        super(CliEffectiveRolesRebuildTestCase, self).setUp()
+
+    def config_files(self):
+        self.config_fixture.register_cli_opt(cli.command_opt)
+        config_files = super(CliEffectiveRolesRebuildTestCase,
+                             self).config_files()
+        config_files.append(unit.dirs.tests_conf('backend_sql.conf'))
+        return config_files
+
+    def config(self, config_files):
+        CONF(args=self.args, project='keystone',
+             default_config_files=config_files)
+
+    def test_effective_roles_rebuild(self):
+        replace = self.useFixture(mockpatch.PatchObject(
+            assignment_sql.Assignment, 'replace_effective_role_ids'))
+        cli.EffectiveRolesRebuild.main()
+        self.assertEqual(1, replace.mock.call_count)
+
+
+class CliEffectiveRolesVerifyTestCase(CliEffectiveRolesRebuildTestCase):
+
+    args = ['effective_roles_rebuild', '--verify']
+
+    def test_effective_roles_rebuild(self):
+        # Verifying the effective roles does not change them.
+        replace = self.useFixture(mockpatch.PatchObject(
+            assignment_sql.Assignment, 'replace_effective_role_ids'))
+        cli.EffectiveRolesRebuild.main()
+        self.assertFalse(replace.mock.called)
+
+    def test_effective_roles_verify_mismatch(self):
+        self.useFixture(mockpatch.PatchObject(
+            assignment_sql.Assignment, 'list_effective_role_ids',
+            return_value=[{'user_id': uuid.uuid4().hex,
+                           'target_id': uuid.uuid4().hex,
+                           'role_ids': [uuid.uuid4().hex]}]))
+        self.assertRaises(SystemExit, cli.EffectiveRolesRebuild.main)
+
+
 class CliNoConfigTestCase(unit.BaseTestCase):
 
     def setUp(self):
@@ -21,6 +21,7 @@ from six.moves import range
 from keystone.common import utils
 from keystone import exception
 from keystone.models import revoke_model
+from keystone.revoke import core as revoke_core
 from keystone.tests import unit
 from keystone.tests.unit import test_backend_sql
 from keystone.token import provider
@@ -161,6 +162,168 @@ class RevokeTests(object):
                           self.revoke_api.check_token,
                           token_values)
 
+    def test_check_token_only_fetches_new_events(self):
+        self.config_fixture.config(group='revoke', sync_interval=0)
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.revoke_by_user(user_id=_new_id())
+        self.revoke_api.check_token(token_values)
+
+        driver = self.revoke_api.driver
+        with mock.patch.object(driver, 'list_events_by_id',
+                               wraps=driver.list_events_by_id) as m:
+            self.revoke_api.revoke_by_user(user_id=_new_id())
+            self.revoke_api.check_token(token_values)
+            self.assertIsNotNone(m.call_args[0][0])
+
+    def test_unchanged_events_are_not_fetched(self):
+        self.config_fixture.config(group='revoke', sync_interval=0)
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.revoke_by_user(user_id=_new_id())
+        self.revoke_api.check_token(token_values)
+
+        driver = self.revoke_api.driver
+        with mock.patch.object(driver, 'list_events_by_id',
+                               wraps=driver.list_events_by_id) as m:
+            self.revoke_api.check_token(token_values)
+            self.assertFalse(m.called)
+
+    def test_events_version_checked_once_per_sync_interval(self):
+        self.config_fixture.config(group='revoke', sync_interval=60)
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.check_token(token_values)
+
+        with mock.patch.object(revoke_core, '_get_events_version',
+                               wraps=revoke_core._get_events_version) as m:
+            for i in range(3):
+                self.revoke_api.check_token(token_values)
+            self.assertFalse(m.called)
+
+    def test_events_committed_late_are_synchronized(self):
+        self.config_fixture.config(group='revoke', sync_interval=0)
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.revoke_by_user(user_id=_new_id())
+        self.revoke_api.check_token(token_values)
+
+        # Simulate an event that is committed after a newer event has been
+        # fetched, with an older revocation time. Each process recording an
+        # event changes the events version once it is committed.
+        driver = self.revoke_api.driver
+        late_event = revoke_model.RevokeEvent(
+            user_id=token_values['user_id'],
+            revoked_at=timeutils.utcnow() - datetime.timedelta(seconds=3))
+        driver.revoke(late_event)
+        driver.revoke(revoke_model.RevokeEvent(user_id=_new_id()))
+        revoke_core._bump_events_version()
+        events = driver.list_events_by_id()
+        late_id = [event_id for event_id, event in events
+                   if event.user_id == token_values['user_id']][0]
+        with mock.patch.object(
+                driver, 'list_events_by_id',
+                return_value=[e for e in events if e[0] != late_id]):
+            self.revoke_api.check_token(token_values)
+
+        revoke_core._bump_events_version()
+        self.assertRaises(exception.TokenNotFound,
+                          self.revoke_api.check_token,
+                          token_values)
+
+    def test_events_version_bump_is_synchronized(self):
+        self.config_fixture.config(group='revoke', sync_interval=60)
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.check_token(token_values)
+
+        # Simulate another process recording a revocation event and bumping
+        # the version shared through the cache, which is checked once the
+        # sync interval has passed.
+        self.revoke_api.driver.revoke(
+            revoke_model.RevokeEvent(user_id=token_values['user_id']))
+        revoke_core._bump_events_version()
+        self.revoke_api.check_token(token_values)
+
+        future = timeutils.utcnow() + datetime.timedelta(seconds=61)
+        with mock.patch.object(timeutils, 'utcnow', return_value=future):
+            self.assertRaises(exception.TokenNotFound,
+                              self.revoke_api.check_token,
+                              token_values)
+
+    def test_events_are_synchronized_without_shared_version(self):
+        self.config_fixture.config(group='revoke', sync_interval=60)
+        patcher = mock.patch.object(revoke_core, '_get_events_version',
+                                    return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.check_token(token_values)
+
+        # Simulate another process recording a revocation event.
+        self.revoke_api.driver.revoke(
+            revoke_model.RevokeEvent(user_id=token_values['user_id']))
+        self.revoke_api.check_token(token_values)
+
+        future = timeutils.utcnow() + datetime.timedelta(seconds=61)
+        with mock.patch.object(timeutils, 'utcnow', return_value=future):
+            self.assertRaises(exception.TokenNotFound,
+                              self.revoke_api.check_token,
+                              token_values)
+
+    def test_local_revocation_is_seen_immediately(self):
+        self.config_fixture.config(group='revoke', sync_interval=60)
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.check_token(token_values)
+        self.revoke_api.revoke_by_user(user_id=token_values['user_id'])
+        self.assertRaises(exception.TokenNotFound,
+                          self.revoke_api.check_token,
+                          token_values)
+
+    def test_pinned_events_are_synchronized_once(self):
+        token_values = _sample_blank_token()
+        token_values['user_id'] = _new_id()
+        self.revoke_api.check_token(token_values)
+
+        with mock.patch.object(self.revoke_api.driver, 'list_events',
+                               wraps=self.revoke_api.driver.list_events) as m:
+            with self.revoke_api.pinned_events():
+                self.revoke_api.check_token(token_values)
+                self.revoke_api.check_token(token_values)
+            self.assertEqual(1, m.call_count)
+
+    def test_revoke_by_grants_coalesces_events(self):
+        project_id = _new_id()
+        role_id = _new_id()
+        other_role_id = _new_id()
+        user_id = _new_id()
+        grants = [
+            {'role_id': role_id, 'project_id': project_id},
+            {'role_id': role_id, 'user_id': user_id,
+             'project_id': project_id},
+            {'role_id': other_role_id, 'user_id': user_id,
+             'project_id': project_id},
+            {'role_id': other_role_id, 'user_id': user_id,
+             'project_id': project_id}]
+
+        driver = self.revoke_api.driver
+        with mock.patch.object(driver, 'revoke_events',
+                               wraps=driver.revoke_events) as m:
+            events = self.revoke_api.revoke_by_grants(grants)
+            self.assertEqual(1, m.call_count)
+        self.assertEqual(2, len(events))
+        self.assertEqual(2, len(self.revoke_api.list_events()))
+
+        token_values = _sample_blank_token()
+        token_values['user_id'] = user_id
+        token_values['project_id'] = project_id
+        token_values['roles'] = [other_role_id]
+        self.assertRaises(exception.TokenNotFound,
+                          self.revoke_api.check_token,
+                          token_values)
+
 
 class SqlRevokeTests(test_backend_sql.SqlTests, RevokeTests):
     def config_overrides(self):
@@ -170,6 +333,46 @@ class SqlRevokeTests(test_backend_sql.SqlTests, RevokeTests):
             provider='pki',
             revoke_by_id=False)
 
+    def _revoke_long_ago(self, count):
+        long_ago = timeutils.utcnow() - datetime.timedelta(days=1)
+        with mock.patch.object(timeutils, 'utcnow', return_value=long_ago):
+            for i in range(count):
+                self.revoke_api.revoke_by_user(user_id=_new_id())
+
+    def test_revoke_does_not_prune_expired_events(self):
+        self._revoke_long_ago(2)
+        self.revoke_api.revoke_by_user(user_id=_new_id())
+        self.assertEqual(3, len(self.revoke_api.driver.list_events()))
+
+    def test_prune_expired_events(self):
+        self._revoke_long_ago(5)
+        self.revoke_api.revoke_by_user(user_id=_new_id())
+        self.assertEqual(5, self.revoke_api.prune_expired_events())
+        self.assertEqual(1, len(self.revoke_api.driver.list_events()))
+
+    def test_compact_events(self):
+        user_id = _new_id()
+        self.revoke_api.revoke_by_user_and_project(user_id, _new_id())
+        self.revoke_api.revoke_by_user_and_project(user_id, _new_id())
+        self.revoke_api.revoke_by_user(user_id)
+        self.revoke_api.revoke_by_user(_new_id())
+
+        redundant = self.revoke_api.compact_events(dry_run=True)
+        self.assertEqual(2, len(redundant))
+        self.assertEqual(4, len(self.revoke_api.driver.list_events()))
+
+        redundant = self.revoke_api.compact_events()
+        self.assertEqual(2, len(redundant))
+        events = self.revoke_api.driver.list_events()
+        self.assertEqual(2, len(events))
+        self.assertTrue(all(e.project_id is None for e in events))
+
+    def test_prune_expired_events_in_batches(self):
+        self._revoke_long_ago(5)
+        self.assertEqual(5, self.revoke_api.prune_expired_events(
+            batch_size=2))
+        self.assertEqual(0, len(self.revoke_api.driver.list_events()))
+
 
 def add_event(events, event):
     events.append(event)
@@ -230,12 +433,20 @@ class RevokeListTests(unit.TestCase):
 
     def _assertTokenRevoked(self, token_data):
         self.assertTrue(any([_matches(e, token_data) for e in self.events]))
+        self.assertTrue(
+            revoke_model.RevokeEventIndex(
+                self.revoke_events).is_revoked(token_data),
+            'Token should be revoked by the event index')
         return self.assertTrue(
             revoke_model.is_revoked(self.revoke_events, token_data),
             'Token should be revoked')
 
     def _assertTokenNotRevoked(self, token_data):
         self.assertFalse(any([_matches(e, token_data) for e in self.events]))
+        self.assertFalse(
+            revoke_model.RevokeEventIndex(
+                self.revoke_events).is_revoked(token_data),
+            'Token should not be revoked by the event index')
         return self.assertFalse(
             revoke_model.is_revoked(self.revoke_events, token_data),
             'Token should not be revoked')
@@ -510,3 +721,98 @@ class RevokeListTests(unit.TestCase):
         for event in self.events:
             remove_event(self.revoke_events, event)
         self._assertEmpty(self.revoke_events)
+
+
+class RevokeEventIndexTests(unit.TestCase):
+    def _populate(self, index, count):
+        for i in range(count):
+            index.add_event(revoke_model.RevokeEvent(user_id=_new_id()))
+            index.add_event(revoke_model.RevokeEvent(
+                user_id=_new_id(), project_id=_new_id(), role_id=_new_id()))
+            index.add_event(revoke_model.RevokeEvent(
+                audit_chain_id=_new_id()))
+            index.add_event(revoke_model.RevokeEvent(role_id=_new_id()))
+
+    def _sample_token(self):
+        token_data = _sample_blank_token()
+        token_data['user_id'] = _new_id()
+        token_data['project_id'] = _new_id()
+        token_data['audit_id'] = _new_id()
+        token_data['audit_chain_id'] = token_data['audit_id']
+        token_data['roles'] = [_new_id(), _new_id()]
+        return token_data
+
+    def _count_matches(self, event_count):
+        index = revoke_model.RevokeEventIndex()
+        self._populate(index, event_count)
+        token_data = self._sample_token()
+        index.add_event(
+            revoke_model.RevokeEvent(user_id=token_data['user_id'],
+                                     role_id=token_data['roles'][0]))
+        with mock.patch.object(revoke_model, 'matches',
+                               wraps=revoke_model.matches) as matches:
+            self.assertTrue(index.is_revoked(token_data))
+            return matches.call_count
+
+    def test_validation_cost_is_flat(self):
+        # The number of events evaluated for a token only depends on the
+        # events sharing an attribute with the token, not on the total number
+        # of events in the index.
+        self.assertEqual(self._count_matches(10), self._count_matches(10000))
+        self.assertEqual(1, self._count_matches(10000))
+
+    def test_wildcard_event_matches_every_token(self):
+        index = revoke_model.RevokeEventIndex()
+        self._populate(index, 10)
+        token_data = self._sample_token()
+        self.assertFalse(index.is_revoked(token_data))
+        index.add_event(revoke_model.RevokeEvent())
+        self.assertTrue(index.is_revoked(token_data))
+
+    def test_remove_event(self):
+        index = revoke_model.RevokeEventIndex()
+        token_data = self._sample_token()
+        event = revoke_model.RevokeEvent(
+            domain_id=_new_id(), expires_at=_future_time())
+        token_data['assignment_domain_id'] = event.domain_scope_id
+        token_data['expires_at'] = event.expires_at
+        index.add_event(event)
+        self.assertEqual(1, len(index))
+        self.assertTrue(index.is_revoked(token_data))
+        index.remove_event(event)
+        self.assertEqual(0, len(index))
+        self.assertFalse(index.is_revoked(token_data))
+
+
+class FindRedundantEventsTests(unit.TestCase):
+    def test_later_broader_event_covers_narrower_events(self):
+        user_id = _new_id()
+        narrow = revoke_model.RevokeEvent(user_id=user_id,
+                                          project_id=_new_id(),
+                                          role_id=_new_id())
+        broad = revoke_model.RevokeEvent(user_id=user_id)
+        redundant = revoke_model.find_redundant_events([narrow, broad])
+        self.assertEqual([narrow], redundant)
+
+    def test_earlier_broader_event_does_not_cover_narrower_events(self):
+        user_id = _new_id()
+        broad = revoke_model.RevokeEvent(user_id=user_id,
+                                         revoked_at=_past_time())
+        narrow = revoke_model.RevokeEvent(user_id=user_id,
+                                          project_id=_new_id())
+        self.assertEqual(
+            [], revoke_model.find_redundant_events([broad, narrow]))
+
+    def test_different_attribute_values_are_not_covered(self):
+        event = revoke_model.RevokeEvent(user_id=_new_id(),
+                                         project_id=_new_id())
+        other = revoke_model.RevokeEvent(user_id=_new_id())
+        self.assertEqual(
+            [], revoke_model.find_redundant_events([event, other]))
+
+    def test_only_latest_duplicate_is_kept(self):
+        project_id = _new_id()
+        old = revoke_model.RevokeEvent(project_id=project_id,
+                                       revoked_at=_past_time())
+        new = revoke_model.RevokeEvent(project_id=project_id)
+        self.assertEqual([old], revoke_model.find_redundant_events([old, new]))
@@ -1479,6 +1479,56 @@ class SqlUpgradeTests(SqlMigrateBase):
                                  'failed_auth_count',
                                  'failed_auth_at'])
 
+    def test_migration_109_add_project_tree_table(self):
+        self.upgrade(108)
+        self.assertTableDoesNotExist('project_tree')
+
+        session = self.sessionmaker()
+        domain = unit.new_domain_ref()
+        domain.update(is_domain=True, parent_id=None,
+                      domain_id='<<keystone.domain.root>>',
+                      extra=json.dumps({}))
+        self.insert_dict(session, 'project', domain)
+        parent_id = domain['id']
+        projects = []
+        for i in range(3):
+            project = unit.new_project_ref(domain_id=domain['id'],
+                                           parent_id=parent_id)
+            project['extra'] = json.dumps({})
+            self.insert_dict(session, 'project', project)
+            projects.append(project)
+            parent_id = project['id']
+        session.commit()
+
+        self.upgrade(109)
+        self.assertTableColumns('project_tree',
+                                ['ancestor_id', 'descendant_id', 'depth'])
+        self.assertTrue(self.does_index_exist('project_tree',
+                                              'ix_project_tree_descendant_id'))
+
+        project_tree_table = sqlalchemy.Table('project_tree', self.metadata,
+                                              autoload=True)
+        rows = set((row.ancestor_id, row.descendant_id, row.depth)
+                   for row in session.query(project_tree_table))
+        expected_rows = set([
+            (domain['id'], projects[0]['id'], 1),
+            (domain['id'], projects[1]['id'], 2),
+            (domain['id'], projects[2]['id'], 3),
+            (projects[0]['id'], projects[1]['id'], 1),
+            (projects[0]['id'], projects[2]['id'], 2),
+            (projects[1]['id'], projects[2]['id'], 1)])
+        self.assertEqual(expected_rows, rows)
+
+    def test_migration_110_add_effective_role_table(self):
+        self.upgrade(109)
+        self.assertTableDoesNotExist('effective_role')
+        self.upgrade(110)
+        self.assertTableColumns('effective_role',
+                                ['user_id', 'target_id', 'role_ids',
+                                 'claim_id'])
+        self.assertTrue(self.does_index_exist('effective_role',
+                                              'ix_effective_role_target_id'))
+
 
 class MySQLOpportunisticUpgradeTestCase(SqlUpgradeTests):
     FIXTURE = test_base.MySQLOpportunisticFixture
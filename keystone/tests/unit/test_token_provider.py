@@ -14,6 +14,7 @@
 
 import datetime
 
+import mock
 from oslo_utils import timeutils
 from six.moves import reload_module
 
@@ -791,6 +792,136 @@ class TestTokenProvider(unit.TestCase):
             self.token_provider_api.validate_token,
             None)
 
+    def test_issue_v3_token_with_provider_without_catalog_filter(self):
+        catalog = [
+            {'type': 'compute',
+             'endpoints': [{'interface': 'public', 'region': 'RegionOne',
+                            'url': 'http://localhost:8774'}]},
+            {'type': 'identity',
+             'endpoints': [{'interface': 'public', 'region': 'RegionOne',
+                            'url': 'http://localhost:5000'}]}]
+
+        class LegacyProvider(object):
+            def needs_persistence(self):
+                return False
+
+            def issue_v3_token(self, user_id, method_names, expires_at=None,
+                               project_id=None, domain_id=None,
+                               auth_context=None, trust=None,
+                               metadata_ref=None, include_catalog=True,
+                               parent_audit_id=None):
+                return 'token', {'token': {'catalog': catalog,
+                                           'expires_at': None,
+                                           'user': {'id': user_id}}}
+
+        with mock.patch.object(self.token_provider_api, 'driver',
+                               LegacyProvider()):
+            __, token_data = self.token_provider_api.issue_v3_token(
+                'user', ['password'])
+            self.assertEqual(catalog, token_data['token']['catalog'])
+
+            __, token_data = self.token_provider_api.issue_v3_token(
+                'user', ['password'],
+                catalog_filter={'service_types': ['identity']})
+            self.assertEqual(['identity'],
+                             [service['type'] for service in
+                              token_data['token']['catalog']])
+
+
+class TestValidatedTokenCache(unit.TestCase):
+    def setUp(self):
+        super(TestValidatedTokenCache, self).setUp()
+        self.useFixture(database.Database())
+        self.useFixture(ksfixtures.KeyRepository(self.config_fixture))
+        self.load_backends()
+
+        user_ref = unit.new_user_ref(CONF.identity.default_domain_id)
+        self.user = self.identity_api.create_user(user_ref)
+        self.token_id, __ = self.token_provider_api.issue_v3_token(
+            self.user['id'], ['password'])
+
+    def config_overrides(self):
+        super(TestValidatedTokenCache, self).config_overrides()
+        self.config_fixture.config(group='token', provider='fernet',
+                                   validated_token_cache_size=10)
+
+    def test_validated_token_is_not_validated_again(self):
+        token_data = self.token_provider_api.validate_v3_token(self.token_id)
+        with mock.patch.object(self.token_provider_api,
+                               '_is_valid_token') as is_valid_token:
+            self.assertIs(
+                token_data,
+                self.token_provider_api.validate_v3_token(self.token_id))
+            self.assertFalse(is_valid_token.called)
+
+    def test_revoked_token_is_checked_again(self):
+        self.token_provider_api.validate_v3_token(self.token_id)
+        self.revoke_api.revoke_by_user(self.user['id'])
+        self.assertRaises(exception.TokenNotFound,
+                          self.token_provider_api.validate_v3_token,
+                          self.token_id)
+        self.assertRaises(exception.TokenNotFound,
+                          self.token_provider_api.validate_token,
+                          self.token_id)
+
+    def test_unrelated_revocation_keeps_token_valid(self):
+        self.token_provider_api.validate_token(self.token_id)
+        other_user = self.identity_api.create_user(
+            unit.new_user_ref(CONF.identity.default_domain_id))
+        self.revoke_api.revoke_by_user(other_user['id'])
+        self.token_provider_api.validate_token(self.token_id)
+
+
+class TestCheckToken(unit.TestCase):
+    def setUp(self):
+        super(TestCheckToken, self).setUp()
+        self.useFixture(database.Database())
+        self.useFixture(ksfixtures.KeyRepository(self.config_fixture))
+        self.load_backends()
+
+        domain_id = CONF.identity.default_domain_id
+        self.user = self.identity_api.create_user(
+            unit.new_user_ref(domain_id=domain_id))
+        project_ref = unit.new_project_ref(domain_id=domain_id)
+        self.project = self.resource_api.create_project(project_ref['id'],
+                                                        project_ref)
+        role_ref = unit.new_role_ref()
+        role = self.role_api.create_role(role_ref['id'], role_ref)
+        self.assignment_api.create_grant(
+            role['id'], user_id=self.user['id'],
+            project_id=self.project['id'])
+        self.token_id, __ = self.token_provider_api.issue_v3_token(
+            self.user['id'], ['password'], project_id=self.project['id'])
+
+    def config_overrides(self):
+        super(TestCheckToken, self).config_overrides()
+        self.config_fixture.config(group='token', provider='fernet')
+
+    def test_check_token_skips_catalog(self):
+        with mock.patch.object(self.catalog_api,
+                               'get_v3_catalog') as get_v3_catalog:
+            self.token_provider_api.check_v3_token(self.token_id)
+            self.assertFalse(get_v3_catalog.called)
+
+    def test_check_revoked_token(self):
+        self.token_provider_api.check_v3_token(self.token_id)
+        self.revoke_api.revoke_by_user(self.user['id'])
+        self.assertRaises(exception.TokenNotFound,
+                          self.token_provider_api.check_v3_token,
+                          self.token_id)
+
+    def test_check_token_for_disabled_project(self):
+        self.project['enabled'] = False
+        self.resource_api.update_project(self.project['id'], self.project)
+        self.assertRaises(exception.TokenNotFound,
+                          self.token_provider_api.check_v3_token,
+                          self.token_id)
+
+    def test_check_invalid_token(self):
+        self.assertRaises(exception.TokenNotFound,
+                          self.token_provider_api.check_v3_token,
+                          'invalid')
+
 
 # NOTE(ayoung): renamed to avoid automatic test detection
 class PKIProviderTests(object):
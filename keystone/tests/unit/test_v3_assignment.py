@@ -15,6 +15,7 @@ import random
 import uuid
 
 import freezegun
+import mock
 from six.moves import http_client
 from six.moves import range
 from testtools import matchers
@@ -373,6 +374,124 @@ class AssignmentTestCase(test_v3.RestfulTestCase,
                       headers={'x-subject-token': token},
                       expected_status=http_client.NOT_FOUND)
 
+    # Bulk grants tests
+
+    def _bulk_grants_setup(self):
+        role = unit.new_role_ref()
+        self.role_api.create_role(role['id'], role)
+        role_assignments = [
+            {'role': {'id': role['id']},
+             'user': {'id': self.user['id']},
+             'scope': {'project': {'id': self.project['id']}}},
+            {'role': {'id': role['id']},
+             'group': {'id': self.group['id']},
+             'scope': {'domain': {'id': self.domain['id']}}}]
+        member_urls = [
+            '/projects/%s/users/%s/roles/%s' % (
+                self.project['id'], self.user['id'], role['id']),
+            '/domains/%s/groups/%s/roles/%s' % (
+                self.domain['id'], self.group['id'], role['id'])]
+        return role_assignments, member_urls
+
+    def test_bulk_create_and_revoke_grants(self):
+        role_assignments, member_urls = self._bulk_grants_setup()
+
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.NO_CONTENT)
+        for member_url in member_urls:
+            self.head(member_url, expected_status=http_client.NO_CONTENT)
+
+        # Granting the same roles again is silent, as with the single grant
+        # API.
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.NO_CONTENT)
+
+        self.post('/role_assignments/revoke',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.NO_CONTENT)
+        for member_url in member_urls:
+            self.head(member_url, expected_status=http_client.NOT_FOUND)
+
+    def test_bulk_grants_look_up_entities_once(self):
+        role_assignments, member_urls = self._bulk_grants_setup()
+        for action in ('grant', 'revoke'):
+            with mock.patch.object(
+                    self.assignment_api, 'get_grant_refs',
+                    wraps=self.assignment_api.get_grant_refs) as get_refs:
+                self.post('/role_assignments/%s' % action,
+                          body={'role_assignments': role_assignments},
+                          expected_status=http_client.NO_CONTENT)
+                self.assertEqual(1, get_refs.call_count)
+
+    def test_bulk_create_grants_with_missing_role(self):
+        role_assignments, member_urls = self._bulk_grants_setup()
+        role_assignments.append(
+            {'role': {'id': uuid.uuid4().hex},
+             'user': {'id': self.user['id']},
+             'scope': {'project': {'id': self.project['id']}}})
+
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.NOT_FOUND)
+        for member_url in member_urls:
+            self.head(member_url, expected_status=http_client.NOT_FOUND)
+
+    def test_bulk_revoke_grants_is_atomic(self):
+        role_assignments, member_urls = self._bulk_grants_setup()
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments[:1]},
+                  expected_status=http_client.NO_CONTENT)
+
+        # The group grant doesn't exist, so the user grant is kept.
+        self.post('/role_assignments/revoke',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.NOT_FOUND)
+        self.head(member_urls[0], expected_status=http_client.NO_CONTENT)
+
+    def test_bulk_grants_require_one_actor_and_one_target(self):
+        role_assignments, member_urls = self._bulk_grants_setup()
+        role_assignments[0]['group'] = {'id': self.group['id']}
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.BAD_REQUEST)
+
+        role_assignments, member_urls = self._bulk_grants_setup()
+        role_assignments[0]['scope']['domain'] = {'id': self.domain['id']}
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.BAD_REQUEST)
+
+    def test_bulk_grants_limit(self):
+        self.config_fixture.config(group='assignment', max_bulk_grants=1)
+        role_assignments, member_urls = self._bulk_grants_setup()
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.BAD_REQUEST)
+
+    def test_bulk_revoke_grants_revokes_tokens(self):
+        role_assignments, member_urls = self._bulk_grants_setup()
+        self.post('/role_assignments/grant',
+                  body={'role_assignments': role_assignments},
+                  expected_status=http_client.NO_CONTENT)
+        auth_body = self.build_authentication_request(
+            user_id=self.user['id'],
+            password=self.user['password'],
+            project_id=self.project['id'])
+        token = self.get_requested_token(auth_body)
+
+        with mock.patch.object(
+                self.revoke_api, 'revoke_events',
+                wraps=self.revoke_api.revoke_events) as revoke_events:
+            self.post('/role_assignments/revoke',
+                      body={'role_assignments': role_assignments},
+                      expected_status=http_client.NO_CONTENT)
+            self.assertEqual(1, revoke_events.call_count)
+        self.head('/auth/tokens',
+                  headers={'x-subject-token': token},
+                  expected_status=http_client.NOT_FOUND)
+
     @unit.skip_if_cache_disabled('assignment')
     def test_delete_grant_from_user_and_project_invalidate_cache(self):
         # create a new project
@@ -591,11 +710,11 @@ class AssignmentTestCase(test_v3.RestfulTestCase,
             # Now delete the four we added and make sure they are removed
             # from the collection.
 
-            self.delete(gd_entity['links']['assignment'])
-            self.delete(ud_entity['links']['assignment'])
-            self.delete(gp_entity['links']['assignment'])
-            self.delete(up_entity['links']['assignment'])
-            frozen_datetime.tick(delta=datetime.timedelta(seconds=1))
+            # Each deletion revokes tokens issued up to now, so move the clock
+            # forward before the next request authenticates.
+            for entity in (gd_entity, ud_entity, gp_entity, up_entity):
+                self.delete(entity['links']['assignment'])
+                frozen_datetime.tick(delta=datetime.timedelta(seconds=1))
             r = self.get(collection_url)
             self.assertValidRoleAssignmentListResponse(
                 r,
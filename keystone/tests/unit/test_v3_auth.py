@@ -1485,6 +1485,98 @@ class TokenAPITests(object):
             headers={'X-Subject-Token': v3_token})
         self.assertValidProjectScopedTokenResponse(r, require_catalog=False)
 
+    def _create_internal_endpoint(self):
+        endpoint = unit.new_endpoint_ref(service_id=self.service_id,
+                                         interface='internal',
+                                         region_id=self.region_id)
+        self.catalog_api.create_endpoint(endpoint['id'], endpoint)
+        return endpoint
+
+    def _get_catalog_endpoints(self, token_data):
+        return [endpoint for service in token_data['catalog']
+                for endpoint in service['endpoints']]
+
+    def test_issue_token_with_catalog_interface(self):
+        endpoint = self._create_internal_endpoint()
+        auth_data = self.build_authentication_request(
+            user_id=self.user['id'],
+            password=self.user['password'],
+            project_id=self.project['id'])
+        r = self.post('/auth/tokens?catalog_interface=internal',
+                      body=auth_data, noauth=True)
+        endpoints = self._get_catalog_endpoints(r.result['token'])
+        self.assertEqual([endpoint['id']], [ep['id'] for ep in endpoints])
+
+    def test_issue_token_with_default_catalog_interfaces(self):
+        endpoint = self._create_internal_endpoint()
+        self.config_fixture.config(group='token',
+                                   catalog_interfaces=['internal'])
+        auth_data = self.build_authentication_request(
+            user_id=self.user['id'],
+            password=self.user['password'],
+            project_id=self.project['id'])
+        r = self.post('/auth/tokens', body=auth_data, noauth=True)
+        endpoints = self._get_catalog_endpoints(r.result['token'])
+        self.assertEqual([endpoint['id']], [ep['id'] for ep in endpoints])
+
+        # An empty query parameter selects all the interfaces.
+        r = self.post('/auth/tokens?catalog_interface=', body=auth_data,
+                      noauth=True)
+        endpoints = self._get_catalog_endpoints(r.result['token'])
+        self.assertIn(endpoint['id'], [ep['id'] for ep in endpoints])
+        self.assertIn(self.endpoint_id, [ep['id'] for ep in endpoints])
+
+    def test_validate_token_with_catalog_service_type(self):
+        v3_token = self.get_requested_token(self.build_authentication_request(
+            user_id=self.user['id'],
+            password=self.user['password'],
+            project_id=self.project['id']))
+        r = self.get(
+            '/auth/tokens?catalog_service_type=%s' % uuid.uuid4().hex,
+            headers={'X-Subject-Token': v3_token})
+        self.assertEqual([], r.result['token']['catalog'])
+
+        r = self.get(
+            '/auth/tokens?catalog_service_type=%s' % self.service['type'],
+            headers={'X-Subject-Token': v3_token})
+        self.assertValidProjectScopedTokenResponse(r)
+        self.assertEqual([self.service_id],
+                         [s['id'] for s in r.result['token']['catalog']])
+
+    def test_validate_tokens(self):
+        scoped_token = self._get_project_scoped_token()
+        unscoped_token = self._get_unscoped_token()
+        self._revoke_token(unscoped_token)
+        r = self.post(
+            '/auth/tokens/validate',
+            body={'tokens': [scoped_token, unscoped_token, scoped_token]},
+            expected_status=http_client.OK)
+        results = r.result['tokens']
+        self.assertEqual(3, len(results))
+        self.assertEqual(self.project['id'],
+                         results[0]['token']['project']['id'])
+        self.assertIn('catalog', results[0]['token'])
+        self.assertEqual(http_client.NOT_FOUND, results[1]['error']['code'])
+        self.assertEqual(results[0], results[2])
+
+    def test_validate_tokens_nocatalog(self):
+        r = self.post(
+            '/auth/tokens/validate?nocatalog',
+            body={'tokens': [self._get_project_scoped_token()]},
+            expected_status=http_client.OK)
+        self.assertNotIn('catalog', r.result['tokens'][0]['token'])
+
+    def test_validate_too_many_tokens(self):
+        self.config_fixture.config(group='token', max_batch_validation_size=1)
+        token = self._get_unscoped_token()
+        self.post('/auth/tokens/validate', body={'tokens': [token, token]},
+                  expected_status=http_client.BAD_REQUEST)
+
+    def test_validate_tokens_requires_a_list(self):
+        self.post('/auth/tokens/validate',
+                  body={'tokens': self._get_unscoped_token()},
+                  expected_status=http_client.BAD_REQUEST)
+
     def test_is_admin_token_by_ids(self):
         self.config_fixture.config(
             group='resource',
@@ -4827,6 +4919,43 @@ class TestAuthSpecificData(test_v3.RestfulTestCase):
         r = self.get('/auth/catalog')
         self.assertValidCatalogResponse(r)
 
+    def test_get_catalog_not_modified(self):
+        r = self.get('/auth/catalog')
+        etag = r.headers['ETag']
+
+        r = self.get('/auth/catalog', headers={'If-None-Match': etag},
+                     expected_status=http_client.NOT_MODIFIED)
+        self.assertEqual(b'', r.body)
+        self.assertEqual(etag, r.headers['ETag'])
+
+    def test_get_catalog_not_rebuilt(self):
+        r = self.get('/auth/catalog')
+        etag = r.headers['ETag']
+
+        with mock.patch.object(self.catalog_api, 'get_v3_catalog') as m:
+            r = self.get('/auth/catalog', headers={'If-None-Match': etag},
+                         expected_status=http_client.NOT_MODIFIED)
+            self.assertEqual(etag, r.headers['ETag'])
+
+            r = self.get('/auth/catalog')
+            self.assertValidCatalogResponse(r)
+            self.assertEqual(etag, r.headers['ETag'])
+        self.assertFalse(m.called)
+
+    def test_get_catalog_modified(self):
+        r = self.get('/auth/catalog')
+        etag = r.headers['ETag']
+
+        url = 'http://%s.example.com' % uuid.uuid4().hex
+        self.catalog_api.update_endpoint(self.endpoint_id, {'url': url})
+
+        r = self.get('/auth/catalog', headers={'If-None-Match': etag})
+        self.assertValidCatalogResponse(r)
+        self.assertNotEqual(etag, r.headers['ETag'])
+        self.assertIn(url, [endpoint['url']
+                            for service in r.result['catalog']
+                            for endpoint in service['endpoints']])
+
     def test_get_catalog_domain_scoped_token(self):
         """Call ``GET /auth/catalog`` with a domain-scoped token."""
         # grant a domain role to a user
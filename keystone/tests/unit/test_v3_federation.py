@@ -11,6 +11,7 @@
 # under the License.
 
 import copy
+import datetime
 import os
 import random
 import subprocess
@@ -18,6 +19,7 @@ from testtools import matchers
 import uuid
 
 import fixtures
+import freezegun
 from lxml import etree
 import mock
 from oslo_log import versionutils
@@ -37,6 +39,7 @@ import keystone.conf
 from keystone.contrib.federation import routers
 from keystone import exception
 from keystone.federation import controllers as federation_controllers
+from keystone.federation import core as federation_core
 from keystone.federation import idp as keystone_idp
 from keystone import notifications
 from keystone.tests import unit
@@ -4135,3 +4138,65 @@ class K2KServiceCatalogTests(test_v3.RestfulTestCase):
         self.assertNotIn('service_providers', token['token'],
                          message=('Expected Service Catalog not to have '
                                   'service_providers'))
+
+    def test_service_providers_cached_in_process(self):
+        driver = self.federation_api.driver
+        with mock.patch.object(
+                driver, 'get_enabled_service_providers',
+                wraps=driver.get_enabled_service_providers) as list_sps:
+            for i in range(3):
+                self.token_v3_helper.get_token_data(self.user_id,
+                                                    ['password'])
+        self.assertEqual(1, list_sps.call_count)
+
+    def test_service_providers_in_token_after_update(self):
+        self.token_v3_helper.get_token_data(self.user_id, ['password'])
+
+        sp_ref = {'enabled': False}
+        self.federation_api.update_sp(self.SP1, sp_ref)
+        self.federation_api.delete_sp(self.SP2)
+
+        token = self.token_v3_helper.get_token_data(self.user_id, ['password'])
+        self._validate_service_providers(token, self.sp_gamma)
+
+    def test_service_providers_changed_by_another_process(self):
+        cache_time = CONF.federation.service_providers_cache_time
+        with freezegun.freeze_time(datetime.datetime.utcnow()) as frozen_time:
+            self.token_v3_helper.get_token_data(self.user_id, ['password'])
+
+            # Another process only shares the changes through the backend
+            # and the cache.
+            self.federation_api.driver.update_sp(self.SP1,
+                                                 {'enabled': False})
+            self.federation_api.driver.delete_sp(self.SP2)
+            self.federation_api._get_enabled_service_providers.invalidate(
+                self.federation_api)
+            federation_core._bump_service_providers_version()
+
+            frozen_time.tick(
+                delta=datetime.timedelta(seconds=cache_time + 1))
+            token = self.token_v3_helper.get_token_data(self.user_id,
+                                                        ['password'])
+        self._validate_service_providers(token, self.sp_gamma)
+
+    def test_service_providers_version_checked_once_per_cache_time(self):
+        self.federation_api._enabled_service_providers = None
+        with mock.patch.object(
+                federation_core, '_get_service_providers_version',
+                wraps=federation_core._get_service_providers_version) as (
+                    get_version):
+            for i in range(3):
+                self.token_v3_helper.get_token_data(self.user_id,
+                                                    ['password'])
+        self.assertEqual(1, get_version.call_count)
+
+    def test_service_providers_not_included_in_token(self):
+        self.config_fixture.config(group='token',
+                                   include_service_providers=False)
+        driver = self.federation_api.driver
+        with mock.patch.object(driver,
+                               'get_enabled_service_providers') as list_sps:
+            token = self.token_v3_helper.get_token_data(self.user_id,
+                                                        ['password'])
+        self.assertNotIn('service_providers', token['token'])
+        list_sps.assert_not_called()
@@ -181,6 +181,8 @@ FEDERATED_IDP_SPECIFIC_WEBSSO = ('/auth/OS-FEDERATION/identity_providers/'
 V3_JSON_HOME_RESOURCES = {
     json_home.build_v3_resource_relation('auth_tokens'): {
         'href': '/auth/tokens'},
+    json_home.build_v3_resource_relation('auth_tokens_validate'): {
+        'href': '/auth/tokens/validate'},
     json_home.build_v3_resource_relation('auth_catalog'): {
         'href': '/auth/catalog'},
     json_home.build_v3_resource_relation('auth_projects'): {
@@ -345,6 +347,10 @@ V3_JSON_HOME_RESOURCES = {
         'hints': {'status': 'experimental'}},
     json_home.build_v3_resource_relation('role_assignments'): {
         'href': '/role_assignments'},
+    json_home.build_v3_resource_relation('role_assignments_grant'): {
+        'href': '/role_assignments/grant'},
+    json_home.build_v3_resource_relation('role_assignments_revoke'): {
+        'href': '/role_assignments/revoke'},
     json_home.build_v3_resource_relation('roles'): {'href': '/roles'},
     json_home.build_v3_resource_relation('service'): {
         'href-template': '/services/{service_id}',
@@ -885,6 +891,46 @@ class VersionTestCase(unit.TestCase):
 
         self._test_json_home('/', exp_json_home_data)
 
+    def _test_not_modified(self, path, headers=None):
+        client = TestClient(self.public_app)
+        resp = client.get(path, headers=dict(headers or {}))
+        etag = resp.headers['ETag']
+
+        headers = dict(headers or {}, **{'If-None-Match': etag})
+        resp = client.get(path, headers=headers)
+        self.assertEqual(http_client.NOT_MODIFIED, resp.status_int)
+        self.assertEqual(b'', resp.body)
+        self.assertEqual(etag, resp.headers['ETag'])
+
+    def test_versions_not_modified(self):
+        self._test_not_modified('/')
+
+    def test_version_v3_not_modified(self):
+        self._test_not_modified('/v3')
+
+    def test_json_home_root_not_modified(self):
+        self._test_not_modified(
+            '/', headers={'Accept': 'application/json-home'})
+
+    def test_json_home_v3_not_modified(self):
+        self._test_not_modified(
+            '/v3', headers={'Accept': 'application/json-home'})
+
+    def test_versions_modified_with_endpoint(self):
+        client = TestClient(self.public_app)
+        resp = client.get('/')
+        etag = resp.headers['ETag']
+
+        self.config_fixture.config(
+            public_endpoint='http://localhost:%d' % (self.public_port + 1))
+        resp = client.get('/', headers={'If-None-Match': etag})
+        self.assertEqual(300, resp.status_int)
+        self.assertNotEqual(etag, resp.headers['ETag'])
+        data = jsonutils.loads(resp.body)
+        for version in data['versions']['values']:
+            self.assertIn(':%d/' % (self.public_port + 1),
+                          version['links'][0]['href'])
+
     def test_accept_type_handling(self):
         # Accept headers with multiple types and qvalues are handled.
 
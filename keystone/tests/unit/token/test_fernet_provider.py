@@ -16,6 +16,7 @@ import hashlib
 import os
 import uuid
 
+import fixtures
 import msgpack
 from oslo_utils import timeutils
 from six.moves import urllib
@@ -610,3 +611,50 @@ class TestLoadKeys(unit.TestCase):
         keys = fernet_utils.load_keys()
         self.assertEqual(2, len(keys))
         self.assertTrue(len(keys[0]))
+
+
+class TestKeyRing(unit.TestCase):
+    def setUp(self):
+        super(TestKeyRing, self).setUp()
+        self.useFixture(ksfixtures.KeyRepository(self.config_fixture))
+        self.key_ring = fernet_utils.KeyRing()
+
+    def test_keys_are_loaded_once(self):
+        crypto = self.key_ring.crypto
+        self.assertIsNotNone(crypto)
+        self.assertIs(crypto, self.key_ring.crypto)
+        self.assertEqual(1, self.key_ring.reload_count)
+
+    def test_keys_are_reloaded_after_invalidation(self):
+        crypto = self.key_ring.crypto
+        self.key_ring.invalidate()
+        self.assertIsNot(crypto, self.key_ring.crypto)
+        self.assertEqual(2, self.key_ring.reload_count)
+        self.assertEqual(1, self.key_ring.invalidation_count)
+
+    def test_keys_are_reloaded_when_repository_changes(self):
+        crypto = self.key_ring.crypto
+        new_repository = self.useFixture(fixtures.TempDir()).path
+        self.config_fixture.config(group='fernet_tokens',
+                                   key_repository=new_repository)
+        fernet_utils.initialize_key_repository()
+        self.assertIsNot(crypto, self.key_ring.crypto)
+        self.assertEqual(2, self.key_ring.reload_count)
+
+    def test_rotation_invalidates_global_key_ring(self):
+        token = token_formatters.TokenFormatter().pack(b'payload')
+        invalidations = fernet_utils.KEY_RING.invalidation_count
+        fernet_utils.rotate_keys()
+        self.assertEqual(invalidations + 1,
+                         fernet_utils.KEY_RING.invalidation_count)
+        # tokens issued with the previous primary key are still valid
+        self.assertEqual(
+            b'payload', token_formatters.TokenFormatter().unpack(token))
+
+    def test_empty_repository_is_not_cached(self):
+        empty_repository = self.useFixture(fixtures.TempDir()).path
+        self.config_fixture.config(group='fernet_tokens',
+                                   key_repository=empty_repository)
+        self.assertIsNone(self.key_ring.crypto)
+        self.assertIsNone(self.key_ring.crypto)
+        self.assertEqual(2, self.key_ring.reload_count)
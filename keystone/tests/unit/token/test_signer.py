@@ -0,0 +1,73 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import subprocess
+import uuid
+
+from keystoneclient.common import cms
+import mock
+from oslo_serialization import jsonutils
+
+import keystone.conf
+from keystone.tests import unit
+from keystone.token.providers import signer
+
+
+CONF = keystone.conf.CONF
+
+
+class TestCMSSigner(unit.TestCase):
+    def setUp(self):
+        super(TestCMSSigner, self).setUp()
+        self.certfile = CONF.signing.certfile
+        self.keyfile = CONF.signing.keyfile
+        self.text = jsonutils.dumps({
+            'token': {'id': uuid.uuid4().hex,
+                      'name': u'é' + 'x' * 2000}})
+
+    def test_token_matches_openssl(self):
+        self.assertEqual(
+            cms.cms_sign_token(self.text, self.certfile, self.keyfile),
+            signer.cms_sign_token(self.text, self.certfile, self.keyfile))
+
+    def test_pkiz_token_matches_openssl(self):
+        self.assertEqual(
+            cms.pkiz_sign(self.text, self.certfile, self.keyfile),
+            signer.pkiz_sign(self.text, self.certfile, self.keyfile))
+
+    def test_signed_token_verifies(self):
+        token = signer.cms_sign_token(self.text, self.certfile, self.keyfile)
+        self.assertEqual(
+            self.text,
+            cms.cms_verify(cms.token_to_cms(token), self.certfile,
+                           CONF.signing.ca_certs))
+
+    def test_signer_is_loaded_once(self):
+        self.assertIs(signer.get_signer(self.certfile, self.keyfile),
+                      signer.get_signer(self.certfile, self.keyfile))
+
+    def test_mismatched_key_is_rejected(self):
+        self.assertRaises(ValueError, signer.CMSSigner,
+                          unit.dirs.root('examples/pki/certs/ssl_cert.pem'),
+                          self.keyfile)
+
+    def test_data_with_line_breaks_is_rejected(self):
+        self.assertRaises(
+            ValueError, signer.get_signer(self.certfile, self.keyfile).sign,
+            b'line one\nline two')
+
+    def test_signing_does_not_run_openssl(self):
+        with mock.patch.object(subprocess, 'Popen',
+                               wraps=subprocess.Popen) as popen:
+            signer.cms_sign_token(self.text, self.certfile, self.keyfile)
+            signer.pkiz_sign(self.text, self.certfile, self.keyfile)
+        self.assertFalse(popen.called)
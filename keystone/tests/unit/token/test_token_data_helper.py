@@ -13,13 +13,20 @@
 import base64
 import uuid
 
+import mock
 from testtools import matchers
 
+import keystone.conf
 from keystone import exception
 from keystone.tests import unit
+from keystone.tests.unit import default_fixtures
+from keystone.tests.unit.ksfixtures import database
 from keystone.token.providers import common
 
 
+CONF = keystone.conf.CONF
+
+
 class TestTokenDataHelper(unit.TestCase):
     def setUp(self):
         super(TestTokenDataHelper, self).setUp()
@@ -54,3 +61,58 @@ class TestTokenDataHelper(unit.TestCase):
                           self.v3_data_helper._populate_audit_info,
                           token_data=token_data,
                           audit_info=audit_info)
+
+
+class TestScopedTokenDataCache(unit.TestCase):
+    def setUp(self):
+        super(TestScopedTokenDataCache, self).setUp()
+        self.useFixture(database.Database())
+        self.load_backends()
+        self.load_fixtures(default_fixtures)
+        self.v3_data_helper = common.V3TokenDataHelper()
+
+        domain_id = CONF.identity.default_domain_id
+        self.user = self.identity_api.create_user(
+            unit.new_user_ref(domain_id=domain_id))
+        self.project = self.resource_api.create_project(
+            uuid.uuid4().hex, unit.new_project_ref(domain_id=domain_id))
+        self.role = self.role_api.create_role(
+            uuid.uuid4().hex, unit.new_role_ref())
+        self.assignment_api.create_grant(
+            self.role['id'], user_id=self.user['id'],
+            project_id=self.project['id'])
+
+    def _get_token_data(self):
+        return self.v3_data_helper.get_token_data(
+            self.user['id'], ['password'], project_id=self.project['id'],
+            include_catalog=False)['token']
+
+    def test_scoped_token_data_is_cached(self):
+        token_data = self._get_token_data()
+        with mock.patch.object(self.assignment_api,
+                               'get_roles_for_user_and_project') as get_roles:
+            self.assertEqual(token_data['roles'],
+                             self._get_token_data()['roles'])
+            self.assertFalse(get_roles.called)
+
+    def test_cached_token_data_is_not_shared(self):
+        self._get_token_data()['roles'].append({'id': uuid.uuid4().hex})
+        self.assertEqual([self.role['id']],
+                         [r['id'] for r in self._get_token_data()['roles']])
+
+    def test_grant_invalidates_cached_token_data(self):
+        self._get_token_data()
+        role = self.role_api.create_role(uuid.uuid4().hex, unit.new_role_ref())
+        self.assignment_api.create_grant(
+            role['id'], user_id=self.user['id'],
+            project_id=self.project['id'])
+        roles = self._get_token_data()['roles']
+        self.assertItemsEqual([self.role['id'], role['id']],
+                              [r['id'] for r in roles])
+
+    def test_project_update_invalidates_cached_token_data(self):
+        self._get_token_data()
+        self.project['name'] = uuid.uuid4().hex
+        self.resource_api.update_project(self.project['id'], self.project)
+        self.assertEqual(self.project['name'],
+                         self._get_token_data()['project']['name'])
@@ -22,12 +22,14 @@ import uuid
 
 from oslo_cache import core as oslo_cache
 from oslo_log import log
+from oslo_utils import reflection
 from oslo_utils import timeutils
 import six
 
 from keystone.common import cache
 from keystone.common import dependency
 from keystone.common import manager
+from keystone.common import utils as ks_utils
 import keystone.conf
 from keystone import exception
 from keystone.i18n import _, _LE
@@ -46,6 +48,14 @@ MEMOIZE_TOKENS = cache.get_memoization_decorator(
     group='token',
     region=TOKENS_REGION)
 
+# NOTE: The user, scope and role sections of a token body only depend on who
+# the token was issued to and what it is scoped to, so they are shared between
+# all tokens with the same user, scope and trust.
+TOKEN_DATA_REGION = oslo_cache.create_region()
+MEMOIZE_TOKEN_DATA = cache.get_memoization_decorator(
+    group='token',
+    region=TOKEN_DATA_REGION)
+
 # NOTE(morganfainberg): This is for compatibility in case someone was relying
 # on the old location of the UnsupportedTokenVersionException for their code.
 UnsupportedTokenVersionException = exception.UnsupportedTokenVersionException
@@ -104,6 +114,21 @@ def default_expire_time():
     return timeutils.utcnow() + expire_delta
 
 
+def default_catalog_filter():
+    """Determine which part of the service catalog goes in tokens.
+
+    The selection varies based on configuration (see ``[token]
+    catalog_interfaces``, ``catalog_regions`` and ``catalog_service_types``).
+
+    :returns: a dict of keyword arguments for
+              ``catalog_api.get_v3_catalog()``
+
+    """
+    return {'interfaces': CONF.token.catalog_interfaces or None,
+            'regions': CONF.token.catalog_regions or None,
+            'service_types': CONF.token.catalog_service_types or None}
+
+
 def audit_info(parent_audit_id):
     """Build the audit data for a token.
 
@@ -126,7 +151,7 @@ def audit_info(parent_audit_id):
 
 
 @dependency.provider('token_provider_api')
-@dependency.requires('assignment_api', 'revoke_api')
+@dependency.requires('assignment_api', 'catalog_api', 'revoke_api')
 class Manager(manager.Manager):
     """Default pivot point for the token provider backend.
 
@@ -147,6 +172,10 @@ class Manager(manager.Manager):
     def __init__(self):
         super(Manager, self).__init__(CONF.token.provider)
         self._register_callback_listeners()
+        self._validated_tokens = None
+        if CONF.token.validated_token_cache_size:
+            self._validated_tokens = ks_utils.LRUCache(
+                CONF.token.validated_token_cache_size)
 
     def _register_callback_listeners(self):
         # This is used by the @dependency.provider decorator to register the
@@ -177,6 +206,24 @@ class Manager(manager.Manager):
                 notifications.register_event_callback(event, resource_type,
                                                       callback_fns)
 
+        # Any change to an entity that is rendered into a token body makes the
+        # cached token data stale.
+        token_data_events = {
+            notifications.ACTIONS.deleted: [
+                'OS-TRUST:trust', 'user', 'group', 'project', 'domain',
+                'role'],
+            notifications.ACTIONS.disabled: ['user', 'project', 'domain'],
+            notifications.ACTIONS.updated: [
+                'user', 'group', 'project', 'domain', 'role'],
+            notifications.ACTIONS.internal: [
+                notifications.INVALIDATE_USER_TOKEN_PERSISTENCE,
+                notifications.INVALIDATE_USER_PROJECT_TOKEN_PERSISTENCE],
+        }
+        for event, resource_types in token_data_events.items():
+            for resource_type in resource_types:
+                notifications.register_event_callback(
+                    event, resource_type, self._invalidate_token_data_callback)
+
     @property
     def _needs_persistence(self):
         return self.driver.needs_persistence()
@@ -206,13 +253,46 @@ class Manager(manager.Manager):
             except exception.TokenNotFound:
                 six.reraise(*exc_info)
 
+    def _get_validated_token(self, cache_key):
+        """Look up a token in the in-process validated token cache.
+
+        :returns: a tuple of the cached token data, or None if the token has to
+                  be validated again, and the current revocation epoch to
+                  store the token with once validated.
+
+        """
+        if self._validated_tokens is None:
+            return None, None
+
+        epoch = self.revoke_api.revocation_epoch
+        entry = self._validated_tokens.get(cache_key)
+        if entry is None:
+            return None, epoch
+
+        token_epoch, expiry, token = entry
+        current_time = timeutils.normalize_time(timeutils.utcnow())
+        if token_epoch != epoch or current_time >= expiry:
+            # Revocation events were added since the token was validated, or
+            # the token expired.
+            self._validated_tokens.pop(cache_key)
+            return None, epoch
+        return token, epoch
+
+    def _set_validated_token(self, cache_key, token, epoch):
+        if self._validated_tokens is not None:
+            self._validated_tokens.set(
+                cache_key, (epoch, self._get_token_expiry(token), token))
+
     def validate_token(self, token_id, belongs_to=None):
         unique_id = utils.generate_unique_id(token_id)
         # NOTE(morganfainberg): Ensure we never use the long-form token_id
         # (PKI) as part of the cache_key.
-        token = self._validate_token(unique_id)
+        token, epoch = self._get_validated_token((None, unique_id))
+        if token is None:
+            token = self._validate_token(unique_id)
+            self._is_valid_token(token)
+            self._set_validated_token((None, unique_id), token, epoch)
         self._token_belongs_to(token, belongs_to)
-        self._is_valid_token(token)
         return token
 
     def check_revocation_v2(self, token):
@@ -273,6 +353,11 @@ class Manager(manager.Manager):
         if not token_id:
             raise exception.TokenNotFound(_('No token in the request'))
 
+        unique_id = utils.generate_unique_id(token_id)
+        token_ref, epoch = self._get_validated_token((self.V3, unique_id))
+        if token_ref is not None:
+            return token_ref
+
         try:
             # NOTE(lbragstad): Only go to persistent storage if we have a token
             # to fetch from the backend (the driver persists the token).
@@ -281,17 +366,67 @@ class Manager(manager.Manager):
             if not self._needs_persistence:
                 token_ref = self.validate_non_persistent_token(token_id)
             else:
-                unique_id = utils.generate_unique_id(token_id)
                 # NOTE(morganfainberg): Ensure we never use the long-form
                 # token_id (PKI) as part of the cache_key.
                 token_ref = self._persistence.get_token(unique_id)
                 token_ref = self._validate_v3_token(token_ref)
             self._is_valid_token(token_ref)
+            self._set_validated_token((self.V3, unique_id), token_ref, epoch)
             return token_ref
         except exception.Unauthorized as e:
             LOG.debug('Unable to validate token: %s', e)
             raise exception.TokenNotFound(token_id=token_id)
 
+    def validate_v3_tokens(self, token_ids):
+        """Validate a batch of tokens.
+
+        All the tokens are checked against the same revocation events, and
+        duplicate token IDs are only validated once.
+
+        :returns: a dict mapping each token ID to its token data, or to the
+                  exception raised validating it.
+
+        """
+        results = {}
+        with self.revoke_api.pinned_events():
+            for token_id in token_ids:
+                if token_id in results:
+                    continue
+                try:
+                    results[token_id] = self.validate_v3_token(token_id)
+                except exception.Error as e:
+                    results[token_id] = e
+        return results
+
+    def check_v3_token(self, token_id):
+        """Check that a token is valid without building its response body.
+
+        Non-persistent tokens are checked for expiration, revocation and that
+        their user and scope are still enabled, without populating the
+        catalog.
+
+        :raises keystone.exception.TokenNotFound: If the token is invalid.
+
+        """
+        if not token_id:
+            raise exception.TokenNotFound(_('No token in the request'))
+
+        if self._needs_persistence:
+            self.validate_v3_token(token_id)
+            return
+
+        unique_id = utils.generate_unique_id(token_id)
+        token_ref, __ = self._get_validated_token((self.V3, unique_id))
+        if token_ref is not None:
+            return
+
+        try:
+            token_ref = self.driver.check_non_persistent_token(token_id)
+            self._is_valid_token(token_ref)
+        except (exception.Unauthorized, AssertionError) as e:
+            LOG.debug('Unable to validate token: %s', e)
+            raise exception.TokenNotFound(token_id=token_id)
+
     @MEMOIZE_TOKENS
     def validate_non_persistent_token(self, token_id):
         return self.driver.validate_non_persistent_token(token_id)
@@ -325,10 +460,8 @@ class Manager(manager.Manager):
     def _validate_v3_token(self, token_id):
         return self.driver.validate_v3_token(token_id)
 
-    def _is_valid_token(self, token):
-        """Verify the token is valid format and has not expired."""
-        current_time = timeutils.normalize_time(timeutils.utcnow())
-
+    def _get_token_expiry(self, token):
+        """Return the expiration time of the token as a naive UTC datetime."""
         try:
             # Get the data we need from the correct location (V2 and V3 tokens
             # differ in structure, Try V3 first, fall back to V2 second)
@@ -337,13 +470,18 @@ class Manager(manager.Manager):
                                         token_data.get('expires'))
             if not expires_at:
                 expires_at = token_data['token']['expires']
-            expiry = timeutils.normalize_time(
+            return timeutils.normalize_time(
                 timeutils.parse_isotime(expires_at))
         except Exception:
             LOG.exception(_LE('Unexpected error or malformed token '
                               'determining token expiry: %s'), token)
             raise exception.TokenNotFound(_('Failed to validate token'))
 
+    def _is_valid_token(self, token):
+        """Verify the token is valid format and has not expired."""
+        current_time = timeutils.normalize_time(timeutils.utcnow())
+        expiry = self._get_token_expiry(token)
+
         if current_time < expiry:
             self.check_revocation(token)
             # Token has not expired and has not been revoked.
@@ -386,11 +524,26 @@ class Manager(manager.Manager):
     def issue_v3_token(self, user_id, method_names, expires_at=None,
                        project_id=None, is_domain=False, domain_id=None,
                        auth_context=None, trust=None, metadata_ref=None,
-                       include_catalog=True, parent_audit_id=None):
+                       include_catalog=True, parent_audit_id=None,
+                       catalog_filter=None):
+        kwargs = {}
+        filter_catalog = False
+        if catalog_filter is not None:
+            if self._driver_accepts_catalog_filter():
+                kwargs['catalog_filter'] = catalog_filter
+            else:
+                filter_catalog = True
         token_id, token_data = self.driver.issue_v3_token(
             user_id, method_names, expires_at, project_id, domain_id,
             auth_context, trust, metadata_ref, include_catalog,
-            parent_audit_id)
+            parent_audit_id, **kwargs)
+
+        if filter_catalog and 'catalog' in token_data['token']:
+            # NOTE: Providers that predate catalog filters include their
+            # usual catalog, which is narrowed here.
+            token = token_data['token']
+            token['catalog'] = self.catalog_api.filter_v3_catalog(
+                token['catalog'], **catalog_filter)
 
         if metadata_ref is None:
             metadata_ref = {}
@@ -423,6 +576,11 @@ class Manager(manager.Manager):
             self._create_token(token_id, data)
         return token_id, token_data
 
+    def _driver_accepts_catalog_filter(self):
+        issue_v3_token = self.driver.issue_v3_token
+        return ('catalog_filter' in reflection.get_callable_args(
+            issue_v3_token) or reflection.accepts_kwargs(issue_v3_token))
+
     def invalidate_individual_token_cache(self, token_id):
         # NOTE(morganfainberg): invalidate takes the exact same arguments as
         # the normal method, this means we need to pass "self" in (which gets
@@ -433,6 +591,9 @@ class Manager(manager.Manager):
         # consulted before accepting a token as valid.  For now we will
         # do the explicit individual token invalidation.
 
+        if self._validated_tokens is not None:
+            self._validated_tokens.pop((None, token_id))
+            self._validated_tokens.pop((self.V3, token_id))
         self._validate_token.invalidate(self, token_id)
         self._validate_v2_token.invalidate(self, token_id)
         self._validate_v3_token.invalidate(self, token_id)
@@ -470,6 +631,10 @@ class Manager(manager.Manager):
             self._persistence.delete_tokens(user_id=trust['trustor_user_id'],
                                             trust_id=trust_id)
 
+    def _invalidate_token_data_callback(self, service, resource_type,
+                                        operation, payload):
+        TOKEN_DATA_REGION.invalidate()
+
     def _delete_user_tokens_callback(self, service, resource_type, operation,
                                      payload):
         if CONF.token.revoke_by_id:
@@ -555,7 +720,7 @@ class Provider(object):
     def issue_v3_token(self, user_id, method_names, expires_at=None,
                        project_id=None, domain_id=None, auth_context=None,
                        trust=None, metadata_ref=None, include_catalog=True,
-                       parent_audit_id=None):
+                       parent_audit_id=None, catalog_filter=None):
         """Issue a V3 Token.
 
         :param user_id: identity of the user
@@ -578,6 +743,11 @@ class Provider(object):
         :type include_catalog: boolean
         :param parent_audit_id: optional, the audit id of the parent token
         :type parent_audit_id: string
+        :param catalog_filter: optional, keyword arguments for
+                               ``catalog_api.get_v3_catalog()`` selecting the
+                               part of the catalog to include in token data,
+                               see :func:`default_catalog_filter`
+        :type catalog_filter: dict
         :returns: (token_id, token_data)
         """
         raise exception.NotImplemented()  # pragma: no cover
@@ -607,6 +777,20 @@ class Provider(object):
         """
         raise exception.NotImplemented()  # pragma: no cover
 
+    def check_non_persistent_token(self, token_id):
+        """Check a given non-persistent token id.
+
+        Providers may return token data without the parts of the token body
+        that are not needed to check the token's expiration and revocation,
+        such as the service catalog.
+
+        :param token_id: the token id
+        :type token_id: string
+        :returns: token data
+        :raises keystone.exception.TokenNotFound: When the token is invalid
+        """
+        return self.validate_non_persistent_token(token_id)
+
     @abc.abstractmethod
     def validate_v3_token(self, token_ref):
         """Validate the given V3 token and return the token_data.
@@ -12,6 +12,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import copy
+
 from oslo_log import log
 from oslo_serialization import jsonutils
 import six
@@ -488,7 +490,8 @@ class V3TokenDataHelper(object):
             token_data['roles'] = filtered_roles
 
     def _populate_service_catalog(self, token_data, user_id,
-                                  domain_id, project_id, trust):
+                                  domain_id, project_id, trust,
+                                  catalog_filter=None):
         if 'catalog' in token_data:
             # no need to repopulate service catalog
             return
@@ -496,14 +499,21 @@ class V3TokenDataHelper(object):
         if CONF.trust.enabled and trust:
             user_id = trust['trustor_user_id']
         if project_id or domain_id:
+            if catalog_filter is None:
+                catalog_filter = provider.default_catalog_filter()
             service_catalog = self.catalog_api.get_v3_catalog(
-                user_id, project_id)
+                user_id, project_id, **catalog_filter)
             token_data['catalog'] = service_catalog
 
     def _populate_service_providers(self, token_data):
         if 'service_providers' in token_data:
             return
 
+        is_federated = federation_constants.FEDERATION in token_data.get(
+            'user', {})
+        if not (CONF.token.include_service_providers or is_federated):
+            return
+
         service_providers = self.federation_api.get_enabled_service_providers()
         if service_providers:
             token_data['service_providers'] = service_providers
@@ -528,10 +538,34 @@ class V3TokenDataHelper(object):
             LOG.error(msg)
             raise exception.UnexpectedError(msg)
 
+    def _populate_scoped_token_data(self, token_data, user_id, domain_id,
+                                    project_id, trust, access_token):
+        self._populate_scope(token_data, domain_id, project_id)
+        if token_data.get('project'):
+            self._populate_is_admin_project(token_data)
+        self._populate_user(token_data, user_id, trust)
+        self._populate_roles(token_data, user_id, domain_id, project_id, trust,
+                             access_token)
+
+    @provider.MEMOIZE_TOKEN_DATA
+    def _get_scoped_token_data(self, user_id, domain_id, project_id,
+                               trust_id):
+        """Return the parts of a token body that only depend on its scope.
+
+        The result is cached per user, scope and trust; callers must copy it
+        before modifying it.
+
+        """
+        trust = self.trust_api.get_trust(trust_id) if trust_id else None
+        token_data = {}
+        self._populate_scoped_token_data(token_data, user_id, domain_id,
+                                         project_id, trust, None)
+        return token_data
+
     def get_token_data(self, user_id, method_names, domain_id=None,
                        project_id=None, expires=None, trust=None, token=None,
                        include_catalog=True, bind=None, access_token=None,
-                       issued_at=None, audit_info=None):
+                       issued_at=None, audit_info=None, catalog_filter=None):
         token_data = {'methods': method_names}
 
         # We've probably already written these to the token
@@ -543,17 +577,20 @@ class V3TokenDataHelper(object):
         if bind:
             token_data['bind'] = bind
 
-        self._populate_scope(token_data, domain_id, project_id)
-        if token_data.get('project'):
-            self._populate_is_admin_project(token_data)
-        self._populate_user(token_data, user_id, trust)
-        self._populate_roles(token_data, user_id, domain_id, project_id, trust,
-                             access_token)
+        if token or access_token:
+            # Federated and OAuth tokens carry their own roles, so their scoped
+            # data cannot be shared with other tokens.
+            self._populate_scoped_token_data(token_data, user_id, domain_id,
+                                             project_id, trust, access_token)
+        else:
+            trust_id = trust['id'] if CONF.trust.enabled and trust else None
+            token_data.update(copy.deepcopy(self._get_scoped_token_data(
+                user_id, domain_id, project_id, trust_id)))
         self._populate_audit_info(token_data, audit_info)
 
         if include_catalog:
             self._populate_service_catalog(token_data, user_id, domain_id,
-                                           project_id, trust)
+                                           project_id, trust, catalog_filter)
         self._populate_service_providers(token_data)
         self._populate_token_dates(token_data, expires=expires,
                                    issued_at=issued_at)
@@ -609,7 +646,7 @@ class BaseProvider(provider.Provider):
     def issue_v3_token(self, user_id, method_names, expires_at=None,
                        project_id=None, domain_id=None, auth_context=None,
                        trust=None, metadata_ref=None, include_catalog=True,
-                       parent_audit_id=None):
+                       parent_audit_id=None, catalog_filter=None):
         if auth_context and auth_context.get('bind'):
             # NOTE(lbragstad): Check if the token provider being used actually
             # supports bind authentication methods before proceeding.
@@ -648,7 +685,8 @@ class BaseProvider(provider.Provider):
             token=token_ref,
             include_catalog=include_catalog,
             access_token=access_token,
-            audit_info=parent_audit_id)
+            audit_info=parent_audit_id,
+            catalog_filter=catalog_filter)
 
         token_id = self._get_token_id(token_data)
         return token_id, token_data
@@ -805,6 +843,35 @@ class BaseProvider(provider.Provider):
             access_token=access_token,
             audit_info=audit_ids)
 
+    def check_non_persistent_token(self, token_id):
+        try:
+            (user_id, methods, audit_ids, domain_id, project_id, trust_id,
+                federated_info, access_token_id, created_at, expires_at) = (
+                    self.token_formatter.validate_token(token_id))
+        except exception.ValidationError as e:
+            raise exception.TokenNotFound(e)
+
+        if federated_info or trust_id or access_token_id:
+            # The federated, trust and OAuth sections have to be rebuilt to be
+            # validated, so these tokens go through full validation.
+            return self.validate_non_persistent_token(token_id)
+
+        self.identity_api.assert_user_enabled(user_id)
+        if project_id:
+            self.resource_api.assert_project_enabled(project_id)
+        if domain_id:
+            self.resource_api.assert_domain_enabled(domain_id)
+
+        # The scoped token data is all that revocation events match against,
+        # and is usually cached.
+        token_data = dict(self.v3_token_data_helper._get_scoped_token_data(
+            user_id, domain_id, project_id, None))
+        token_data['methods'] = methods
+        token_data['audit_ids'] = audit_ids
+        token_data['issued_at'] = created_at
+        token_data['expires_at'] = expires_at
+        return {'token': token_data}
+
     def validate_v3_token(self, token_ref):
         # FIXME(gyee): performance or correctness? Should we return the
         # cached token or reconstruct it? Obviously if we are going with
@@ -57,13 +57,12 @@ class TokenFormatter(object):
         ``encrypt(plaintext)`` and ``decrypt(ciphertext)``.
 
         """
-        keys = utils.load_keys()
+        crypto = utils.KEY_RING.crypto
 
-        if not keys:
+        if crypto is None:
             raise exception.KeysNotFound()
 
-        fernet_instances = [fernet.Fernet(key) for key in keys]
-        return fernet.MultiFernet(fernet_instances)
+        return crypto
 
     def pack(self, payload):
         """Pack a payload for transport as a token.
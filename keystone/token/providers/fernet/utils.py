@@ -12,6 +12,7 @@
 
 import os
 import stat
+import threading
 
 from cryptography import fernet
 from oslo_log import log
@@ -221,6 +222,10 @@ def rotate_keys(keystone_user_id=None, keystone_group_id=None):
         LOG.info(_LI('Excess key to purge: %s'), key_to_purge)
         os.remove(key_to_purge)
 
+    # Keys loaded by this process are now stale, don't wait for the key
+    # repository's mtime to tell us about it.
+    KEY_RING.invalidate()
+
 
 def load_keys():
     """Load keys from disk into a list.
@@ -262,3 +267,78 @@ def load_keys():
 
     # return the encryption_keys, sorted by key number, descending
     return [keys[x] for x in sorted(keys.keys(), reverse=True)]
+
+
+def _key_repository_signature():
+    """Return a cheap fingerprint of the key repository directory.
+
+    Key rotation always creates, renames or removes files in the key
+    repository, which updates the directory's modification time. Replacing
+    the whole repository (e.g. atomically moving a synced copy into place)
+    changes its inode instead. Returns None if the repository can't be
+    inspected.
+
+    """
+    path = CONF.fernet_tokens.key_repository
+    try:
+        stat_info = os.stat(path)
+    except OSError:
+        return None
+    mtime = getattr(stat_info, 'st_mtime_ns', stat_info.st_mtime)
+    return (path, stat_info.st_dev, stat_info.st_ino, mtime)
+
+
+class KeyRing(object):
+    """Process-wide cache of the keys in the Fernet key repository.
+
+    Keys are read from disk and turned into a ``MultiFernet`` instance once,
+    then reused until the key repository changes on disk or the ring is
+    explicitly invalidated (which ``rotate_keys()`` does for the current
+    process).
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._signature = None
+        self._crypto = None
+        self.reload_count = 0
+        self.invalidation_count = 0
+
+    @property
+    def crypto(self):
+        """Return a ``MultiFernet`` instance built from the current keys.
+
+        Returns None if there are no keys available.
+
+        """
+        signature = _key_repository_signature()
+        crypto = self._crypto
+        if crypto is not None and signature == self._signature:
+            return crypto
+
+        with self._lock:
+            if self._crypto is not None and signature == self._signature:
+                return self._crypto
+            keys = load_keys()
+            self.reload_count += 1
+            if not keys:
+                # Don't cache an empty key ring, so that keys appearing later
+                # are picked up even if the directory signature is unchanged.
+                self._signature = None
+                self._crypto = None
+                return None
+            self._crypto = fernet.MultiFernet(
+                [fernet.Fernet(key) for key in keys])
+            self._signature = signature
+            return self._crypto
+
+    def invalidate(self):
+        """Force the keys to be reloaded from disk on next use."""
+        with self._lock:
+            self._signature = None
+            self._crypto = None
+            self.invalidation_count += 1
+
+
+KEY_RING = KeyRing()
@@ -24,6 +24,7 @@ import keystone.conf
 from keystone import exception
 from keystone.i18n import _
 from keystone.token.providers import common
+from keystone.token.providers import signer
 
 
 CONF = keystone.conf.CONF
@@ -44,11 +45,18 @@ class Provider(common.BaseProvider):
             # str()
             # TODO(ayoung): Make to a byte_str for Python3
             token_json = jsonutils.dumps(token_data, cls=utils.PKIEncoder)
-            token_id = str(cms.pkiz_sign(token_json,
+            try:
+                token_id = signer.pkiz_sign(token_json,
+                                            CONF.signing.certfile,
+                                            CONF.signing.keyfile)
+            except ValueError:
+                # NOTE: The in-process signer only supports RSA keys, leave
+                # anything else to openssl.
+                token_id = cms.pkiz_sign(token_json,
                                          CONF.signing.certfile,
-                                         CONF.signing.keyfile))
-            return token_id
-        except subprocess.CalledProcessError:
+                                         CONF.signing.keyfile)
+            return str(token_id)
+        except (subprocess.CalledProcessError, EnvironmentError):
             LOG.exception(ERROR_MESSAGE)
             raise exception.UnexpectedError(ERROR_MESSAGE)
 
@@ -0,0 +1,223 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""In-process CMS signing for PKI and PKIZ tokens.
+
+``keystoneclient.common.cms`` signs tokens by running ``openssl cms -sign``
+in a subprocess for every token. The functions in this module produce the
+same output without forking, using a certificate and private key that are
+only loaded again when their files change.
+
+"""
+
+import base64
+import os
+import textwrap
+import threading
+import zlib
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from cryptography import x509
+from keystoneclient.common import cms
+import six
+
+from keystone.i18n import _
+
+
+# DER encodings of the constant parts of the CMS structure, matching what
+# ``openssl cms -sign -md sha256 -nodetach -nocerts -noattr -nosmimecap``
+# produces for an RSA signing key.
+_SIGNED_DATA_OID = b'\x06\x09\x2a\x86\x48\x86\xf7\x0d\x01\x07\x02'
+_DATA_OID = b'\x06\x09\x2a\x86\x48\x86\xf7\x0d\x01\x07\x01'
+_SHA256_ALGORITHM = b'\x30\x0b\x06\x09\x60\x86\x48\x01\x65\x03\x04\x02\x01'
+_RSA_ALGORITHM = (b'\x30\x0d\x06\x09\x2a\x86\x48\x86\xf7\x0d\x01\x01\x01'
+                  b'\x05\x00')
+_VERSION_1 = b'\x02\x01\x01'
+
+_SEQUENCE = 0x30
+_SET = 0x31
+_OCTET_STRING = 0x04
+_INTEGER = 0x02
+_CONTEXT_0 = 0xa0
+
+_PEM_HEADER = '-----BEGIN CMS-----\n'
+_PEM_FOOTER = '-----END CMS-----\n'
+
+
+def _encode(tag, *values):
+    """Return the DER encoding of an element from its encoded contents."""
+    value = b''.join(values)
+    length = len(value)
+    if length < 0x80:
+        encoded_length = bytearray([length])
+    else:
+        octets = bytearray()
+        while length:
+            octets.insert(0, length & 0xff)
+            length >>= 8
+        encoded_length = bytearray([0x80 | len(octets)]) + octets
+    return bytes(bytearray([tag]) + encoded_length) + value
+
+
+def _decode(der, offset):
+    """Return the tag, contents offset and end offset of a DER element."""
+    tag = der[offset]
+    length = der[offset + 1]
+    start = offset + 2
+    if length & 0x80:
+        octets = length & 0x7f
+        length = 0
+        for octet in der[start:start + octets]:
+            length = (length << 8) | octet
+        start += octets
+    return tag, start, start + length
+
+
+def _issuer_and_serial_number(certificate):
+    """Return the DER encoded IssuerAndSerialNumber of a certificate.
+
+    The issuer and serial number are copied verbatim from the certificate,
+    as openssl does.
+
+    """
+    der = bytearray(certificate.public_bytes(serialization.Encoding.DER))
+    __, tbs_start, __ = _decode(der, 0)
+    __, offset, __ = _decode(der, tbs_start)
+    tag, __, end = _decode(der, offset)
+    if tag == _CONTEXT_0:
+        # Skip the explicit version.
+        offset = end
+    tag, __, serial_end = _decode(der, offset)
+    if tag != _INTEGER:
+        raise ValueError(_('Unable to parse the signing certificate.'))
+    serial = bytes(der[offset:serial_end])
+    # Skip the signature algorithm.
+    __, __, issuer_start = _decode(der, serial_end)
+    __, __, issuer_end = _decode(der, issuer_start)
+    issuer = bytes(der[issuer_start:issuer_end])
+    return _encode(_SEQUENCE, issuer, serial)
+
+
+class CMSSigner(object):
+    """Sign data with a certificate and RSA private key.
+
+    :raises ValueError: If the key is not an RSA key matching the certificate.
+
+    """
+
+    def __init__(self, certfile, keyfile):
+        backend = default_backend()
+        with open(certfile, 'rb') as f:
+            certificate = x509.load_pem_x509_certificate(f.read(), backend)
+        with open(keyfile, 'rb') as f:
+            self._key = serialization.load_pem_private_key(
+                f.read(), password=None, backend=backend)
+
+        if not isinstance(self._key, rsa.RSAPrivateKey):
+            raise ValueError(_('The signing key is not an RSA key.'))
+        if (self._key.public_key().public_numbers() !=
+                certificate.public_key().public_numbers()):
+            raise ValueError(
+                _('The signing key does not match the signing certificate.'))
+        self._signer_id = _issuer_and_serial_number(certificate)
+
+    def _sign_digest(self, data):
+        if hasattr(self._key, 'sign'):
+            return self._key.sign(data, padding.PKCS1v15(), hashes.SHA256())
+        # cryptography < 1.4
+        signer = self._key.signer(padding.PKCS1v15(), hashes.SHA256())
+        signer.update(data)
+        return signer.finalize()
+
+    def sign(self, data):
+        """Return the DER encoded CMS SignedData for the data.
+
+        :param data: the data to sign, which must not contain line breaks
+                     since openssl would canonicalize them.
+        :type data: six.binary_type
+
+        """
+        if b'\n' in data or b'\r' in data:
+            raise ValueError(_('Unable to sign data with line breaks.'))
+
+        signer_info = _encode(
+            _SEQUENCE,
+            _VERSION_1,
+            self._signer_id,
+            _SHA256_ALGORITHM,
+            _RSA_ALGORITHM,
+            _encode(_OCTET_STRING, self._sign_digest(data)))
+        signed_data = _encode(
+            _SEQUENCE,
+            _VERSION_1,
+            _encode(_SET, _SHA256_ALGORITHM),
+            _encode(_SEQUENCE,
+                    _DATA_OID,
+                    _encode(_CONTEXT_0, _encode(_OCTET_STRING, data))),
+            _encode(_SET, signer_info))
+        return _encode(_SEQUENCE,
+                       _SIGNED_DATA_OID,
+                       _encode(_CONTEXT_0, signed_data))
+
+
+_signer_lock = threading.Lock()
+_signer = None
+_signer_files = None
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return path, stat.st_ino, stat.st_mtime
+
+
+def get_signer(certfile, keyfile):
+    """Return a CMSSigner, only loading the files again when they change."""
+    global _signer, _signer_files
+
+    files = (_file_signature(certfile), _file_signature(keyfile))
+    if files != _signer_files:
+        with _signer_lock:
+            if files != _signer_files:
+                _signer = CMSSigner(certfile, keyfile)
+                _signer_files = files
+    return _signer
+
+
+def _to_bytes(text):
+    if isinstance(text, six.text_type):
+        return text.encode('utf-8')
+    return text
+
+
+def _to_pem(der):
+    encoded = base64.b64encode(der).decode('utf-8')
+    return (_PEM_HEADER + '\n'.join(textwrap.wrap(encoded, 64)) + '\n' +
+            _PEM_FOOTER)
+
+
+def cms_sign_token(text, certfile, keyfile):
+    """Sign a token like ``keystoneclient.common.cms.cms_sign_token``."""
+    der = get_signer(certfile, keyfile).sign(_to_bytes(text))
+    return cms.cms_to_token(_to_pem(der))
+
+
+def pkiz_sign(text, certfile, keyfile, compression_level=6):
+    """Sign a token like ``keystoneclient.common.cms.pkiz_sign``."""
+    der = get_signer(certfile, keyfile).sign(_to_bytes(text))
+    compressed = zlib.compress(_to_pem(der).encode('utf-8'),
+                               compression_level)
+    return cms.PKIZ_PREFIX + base64.urlsafe_b64encode(
+        compressed).decode('utf-8')
@@ -34,6 +34,12 @@ _VERSIONS = []
 # admin or public service so either admin or public works.
 latest_app = None
 
+# NOTE: The documents served by the Version controller only change with the
+# URLs keystone is reached at, so they are serialized once and cached in
+# process. These URLs can come from the requests, so the number of documents
+# cached is bounded.
+_MAX_CACHED_DOCUMENTS = 64
+
 
 def request_v3_json_home(new_prefix):
     if 'v3' not in _VERSIONS:
@@ -105,9 +111,31 @@ class Version(wsgi.Application):
     def __init__(self, version_type, routers=None):
         self.endpoint_url_type = version_type
         self._routers = routers
+        self._documents = {}
 
         super(Version, self).__init__()
 
+    def _render_document(self, request, key, build_document, status=None,
+                         content_type=MimeTypes.JSON):
+        """Render a document, serializing it once for each key.
+
+        The response has a strong ETag and honors If-None-Match, so clients
+        can avoid downloading the document again.
+
+        """
+        key = key + (tuple(_VERSIONS),)
+        try:
+            body, etag = self._documents[key]
+        except KeyError:
+            body = wsgi.serialize_response_body(build_document())
+            etag = wsgi.compute_etag(body)
+            if len(self._documents) >= _MAX_CACHED_DOCUMENTS:
+                self._documents.clear()
+            self._documents[key] = (body, etag)
+        return wsgi.render_conditional_response(
+            request, body, etag, status=status,
+            headers=(('Content-Type', content_type),))
+
     def _get_identity_url(self, context, version):
         """Return a URL to keystone's own endpoint."""
         url = self.base_url(context, self.endpoint_url_type)
@@ -164,20 +192,24 @@ class Version(wsgi.Application):
 
         req_mime_type = v3_mime_type_best_match(request)
         if req_mime_type == MimeTypes.JSON_HOME:
-            v3_json_home = request_v3_json_home('/v3')
-            return wsgi.render_response(
-                body=v3_json_home,
-                headers=(('Content-Type', MimeTypes.JSON_HOME),))
-
-        versions = self._get_versions_list(request.context_dict)
-        return wsgi.render_response(
-            status=(http_client.MULTIPLE_CHOICES,
-                    http_client.responses[http_client.MULTIPLE_CHOICES]),
-            body={
+            return self._render_document(
+                request, ('versions-json-home',),
+                lambda: request_v3_json_home('/v3'),
+                content_type=MimeTypes.JSON_HOME)
+
+        def build_versions():
+            versions = self._get_versions_list(request.context_dict)
+            return {
                 'versions': {
                     'values': list(versions.values())
                 }
-            })
+            }
+
+        url = self.base_url(request.context_dict, self.endpoint_url_type)
+        return self._render_document(
+            request, ('versions', url), build_versions,
+            status=(http_client.MULTIPLE_CHOICES,
+                    http_client.responses[http_client.MULTIPLE_CHOICES]))
 
     def get_version_v2(self, request):
         versions = self._get_versions_list(request.context_dict)
@@ -200,17 +232,19 @@ class Version(wsgi.Application):
         }
 
     def get_version_v3(self, request):
-        versions = self._get_versions_list(request.context_dict)
         if 'v3' in _VERSIONS:
             req_mime_type = v3_mime_type_best_match(request)
 
             if req_mime_type == MimeTypes.JSON_HOME:
-                return wsgi.render_response(
-                    body=self._get_json_home_v3(),
-                    headers=(('Content-Type', MimeTypes.JSON_HOME),))
+                return self._render_document(
+                    request, ('v3-json-home',), self._get_json_home_v3,
+                    content_type=MimeTypes.JSON_HOME)
 
-            return wsgi.render_response(body={
-                'version': versions['v3']
-            })
+            def build_version():
+                versions = self._get_versions_list(request.context_dict)
+                return {'version': versions['v3']}
+
+            url = self.base_url(request.context_dict, self.endpoint_url_type)
+            return self._render_document(request, ('v3', url), build_version)
         else:
             raise exception.VersionNotFound(version='v3')